@@ -1,21 +1,51 @@
-from fastapi import Header, HTTPException, Depends
+from typing import Optional
+from fastapi import Header, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import all_models
+from ..core.tokens import InvalidToken, user_cache, verify_token
 
-def get_current_user(x_user_id: str = Header(..., alias="X-User-ID"), db: Session = Depends(get_db)):
+def get_current_user_id(authorization: Optional[str] = Header(None)) -> int:
     """
-    Simulates authentication by verifying the X-User-ID header exists 
-    and corresponds to a valid user in the database.
+    Verifies the `Authorization: Bearer <token>` header issued by
+    /api/auth/register or /api/auth/login. Signature and expiry only, no DB query.
     """
-    if not x_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Authentication required", headers={"WWW-Authenticate": "Bearer"})
     try:
-        user_id = int(x_user_id)
-        user = db.query(all_models.User).filter(all_models.User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid User ID")
+        return verify_token(token.strip())
+    except InvalidToken as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+
+def get_optional_user_id(
+    access_token: Optional[str] = Query(None, description="Token from /api/auth, for clients that cannot send headers (EventSource)"),
+    authorization: Optional[str] = Header(None),
+) -> Optional[int]:
+    """
+    Like get_current_user_id, but None when no token is sent, and the token
+    may also come as ?access_token= (EventSource cannot set headers).
+    """
+    if authorization:
+        return get_current_user_id(authorization)
+    if not access_token:
+        return None
+    try:
+        return verify_token(access_token)
+    except InvalidToken as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+
+def get_current_user(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    """
+    The authenticated User row, for handlers that need more than the id.
+    Served from a short TTL cache; the object is detached from the session.
+    """
+    user = user_cache.get(user_id)
+    if user is not None:
         return user
-    except ValueError:
-        raise HTTPException(status_code=401, detail="Invalid User ID format")
+    user = db.query(all_models.User).filter(all_models.User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid User ID")
+    db.expunge(user)
+    user_cache.set(user_id, user)
+    return user
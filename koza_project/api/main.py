@@ -1,16 +1,92 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from sqlalchemy import text
 import os
+import time
 from sqlalchemy.orm import Session
-from . import routes_pregnancy, routes_forum, routes_tools, routes_names, routes_gallery, routes_nutrition, routes_upload, routes_auth
-from ..database import engine, Base
+from .middleware import CompressionMiddleware, MetricsMiddleware
+from .responses import FastJSONResponse
+from . import utils, routes_pregnancy, routes_forum, routes_tools, routes_names, routes_gallery, routes_nutrition, routes_upload, routes_auth, routes_storage, routes_sync, routes_events, routes_timeline
+from contextlib import asynccontextmanager
+from ..database import engine, read_engine, SessionLocal
 from ..models import all_models
+from ..core.reminders import scheduler as reminder_scheduler
+from ..core.names import rebuild_name_index
+from ..core.nutrition import reload_nutrition_catalog
+from ..core import thumbnails
+from ..core.blobstore import garbage_collector as blob_gc
+from ..core import group_commit
+from ..core.jobs import job_queue
+from ..core.events import event_bus
+from ..core.shards import tracker_shards
+from ..core.storage import get_storage
+from ..core.assets import PrecompressedStaticFiles, ui_directory
+from ..core.metrics import metrics
+from ..core.tokens import check_auth_secret
 
-# Create Tables
-Base.metadata.create_all(bind=engine)
+# Count SQL statements (and time) per request for /metrics
+metrics.instrument_engine(engine)
+metrics.instrument_engine(read_engine)
+for shard in tracker_shards.shards:
+    metrics.instrument_engine(shard.engine)
+    metrics.instrument_engine(shard.read_engine)
 
-app = FastAPI(title="Koza - Happy Mom Clone API", version="1.0.0")
+# --- Startup ---
+# Filled by the lifespan; /health/ready reports 503 until `ready` is set
+startup_state = {"ready": False, "timings_ms": {}}
+
+def _timed(name: str, step, *args):
+    started = time.perf_counter()
+    step(*args)
+    startup_state["timings_ms"][name] = round((time.perf_counter() - started) * 1000, 1)
+
+def _migrate():
+    from ..core.schema import upgrade_database  # alembic is only needed here, keep it out of import time
+    upgrade_database()
+
+def initialize():
+    """Schema, directories, seed data and in-memory caches. Runs once, before traffic."""
+    check_auth_secret()
+    _timed("migrations", _migrate)
+    _timed("upload_dirs", utils.ensure_upload_dirs)
+    _timed("legacy_upload_dir", routes_gallery.ensure_legacy_upload_dir)
+    # Seed once and build the in-memory name index / nutrition catalog
+    db = SessionLocal()
+    try:
+        _timed("seed_names", routes_names.seed_names, db)
+        _timed("seed_nutrition", routes_nutrition.seed_nutrition, db)
+        _timed("name_index", rebuild_name_index, db)
+        _timed("nutrition_catalog", reload_nutrition_catalog, db)
+    finally:
+        db.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    initialize()
+
+    # Badges, notifications and thumbnails run after the response (core.jobs)
+    job_queue.start()
+    # Appointment reminders are delivered through the forum notification manager
+    reminder_scheduler.start(routes_forum.manager.notify_user)
+    blob_gc.start()
+    # Batched commits for water/kick/weight logs and comment likes (KOZA_GROUP_COMMIT=1)
+    if group_commit.ENABLED:
+        group_commit.start_all()
+    startup_state["timings_ms"]["total"] = round((time.perf_counter() - started) * 1000, 1)
+    startup_state["ready"] = True
+    print(f"Startup finished in {startup_state['timings_ms']['total']:.0f}ms: {startup_state['timings_ms']}")
+    yield
+    # Stop taking traffic first, then drain background work
+    startup_state["ready"] = False
+    await reminder_scheduler.stop()
+    await job_queue.stop()
+    await blob_gc.stop()
+    group_commit.stop_all()
+    tracker_shards.dispose()
+    thumbnails.shutdown_pool()
+
+app = FastAPI(title="Koza - Happy Mom Clone API", version="1.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # CORS
 app.add_middleware(
@@ -21,14 +97,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Static Files (Frontend)
-# Static Files (Frontend)
-ui_path = os.path.join(os.path.dirname(__file__), "..", "ui")
-app.mount("/ui", StaticFiles(directory=ui_path, html=True), name="ui")
+# Brotli/gzip for JSON and HTML over 1KB (precompressed static files are left as they are)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+# Outermost, so latency includes compression and static files
+app.add_middleware(MetricsMiddleware)
+
+# Static Files (Frontend): the fingerprinted/precompressed build if present
+# (python -m koza_project.core.assets), otherwise the sources
+app.mount("/ui", PrecompressedStaticFiles(directory=ui_directory(), html=True), name="ui")
 
-# Static Files (Uploads)
-static_path = os.path.join(os.path.dirname(__file__), "..", "static")
-app.mount("/static", StaticFiles(directory=static_path), name="static")
+# Static Files (Uploads): local directory, or redirects to the S3 bucket
+app.mount("/static", get_storage().static_app(), name="static")
 
 # Include Routers
 app.include_router(routes_pregnancy.router, prefix="/api/pregnancy", tags=["Pregnancy"])
@@ -39,9 +118,41 @@ app.include_router(routes_gallery.router, prefix="/api/gallery", tags=["Gallery"
 app.include_router(routes_nutrition.router, prefix="/api/nutrition", tags=["Nutrition"])
 app.include_router(routes_upload.router, prefix="/api", tags=["Upload"])
 app.include_router(routes_auth.router, prefix="/api/auth", tags=["Auth"])
+app.include_router(routes_storage.router, prefix="/api/storage", tags=["Storage"])
+app.include_router(routes_sync.router, prefix="/api/sync", tags=["Sync"])
+app.include_router(routes_events.router, prefix="/api/events", tags=["Events"])
+app.include_router(routes_timeline.router, prefix="/api/timeline", tags=["Timeline"])
 
-from fastapi.responses import RedirectResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse
 
 @app.get("/")
 def read_root():
     return RedirectResponse(url="/ui/")
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text format: request latency/status/in-flight, SQL query counts, background jobs and SSE feed."""
+    body = metrics.render() + job_queue.render_metrics() + event_bus.render_metrics()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live", include_in_schema=False)
+def health_live():
+    """The process is up (no dependencies checked)."""
+    return {"status": "alive"}
+
+@app.get("/health/ready", include_in_schema=False)
+def health_ready():
+    """
+    Load balancer / autoscaler probe: 503 until the lifespan has migrated,
+    seeded and warmed the caches (and again while shutting down), or when
+    the database does not answer.
+    """
+    if not startup_state["ready"]:
+        return FastJSONResponse({"status": "starting"}, status_code=503)
+    try:
+        with read_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        print(f"Readiness check failed: {e}")
+        return FastJSONResponse({"status": "database_unavailable"}, status_code=503)
+    return {"status": "ready", "startup_ms": startup_state["timings_ms"]}
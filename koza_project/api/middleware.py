@@ -0,0 +1,170 @@
+import time
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from ..core.assets import accepted_encodings
+from ..core.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+# Streams that must reach the client as they are produced
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compresses and flushes, so each streamed chunk is decodable on arrival."""
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush()
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip for responses of at least `minimum_size` bytes, picked by
+    Accept-Encoding. Already encoded responses (precompressed static files),
+    partial content and event streams pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                content_type = headers.get("content-type", "")
+                if ("content-encoding" in headers or "content-range" in headers
+                        or start_message["status"] in (204, 206, 304)
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)
+                        or content_type.startswith(UNCOMPRESSED_TYPES)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    # Length is unknown until the stream ends
+                    del headers["Content-Length"]
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": encoder.chunk(body), "more_body": True})
+                else:
+                    compressed = encoder.finish(body)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                return
+
+            if more_body:
+                await send({"type": "http.response.body", "body": encoder.chunk(body), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": encoder.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def route_label(scope) -> str:
+    """Route template ("/api/forum/posts/{post_id}/comments"), never the raw path."""
+    # Newer FastAPI resolves included routers lazily: the full path is on the effective context
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if getattr(context, "path", None):
+        return context.path
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    if scope.get("root_path"):
+        # Mounted app (static files): one series per mount
+        return scope["root_path"] + "/{path}"
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Per-route latency, status codes, in-flight requests and SQL statement
+    counts (via core.metrics), exposed at /metrics.
+    """
+
+    def __init__(self, app, registry=None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = self.registry.request_started()
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.request_finished(
+                scope["method"], route_label(scope), status, time.perf_counter() - started, stats
+            )
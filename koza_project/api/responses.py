@@ -0,0 +1,45 @@
+import json
+from decimal import Decimal
+from typing import Any, List
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(value: Any):
+    # Types neither encoder handles: Decimal (PostgreSQL numeric / avg()) as a number, like
+    # jsonable_encoder. For the stdlib fallback also dates as ISO strings, the same shape as orjson
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class of the app (orjson when installed).
+
+    Endpoints that return this directly skip FastAPI's jsonable_encoder /
+    response_model pass; orjson handles datetime and date itself, Decimal
+    goes through _default (as a float).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(result) -> List[dict]:
+    """Core result rows -> plain dicts keyed by the selected column labels (no ORM objects)."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
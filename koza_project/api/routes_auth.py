@@ -5,6 +5,7 @@ from typing import Optional
 from datetime import date
 from ..database import get_db
 from ..models import all_models
+from ..core.tokens import issue_token, ACCESS_TOKEN_TTL_SECONDS
 
 router = APIRouter()
 
@@ -16,6 +17,17 @@ class RegisterResponse(BaseModel):
     user_id: int
     name: Optional[str]
     message: str
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+def token_fields(user_id: int) -> dict:
+    """Send as `Authorization: Bearer <access_token>` to authenticated endpoints."""
+    return {
+        "access_token": issue_token(user_id),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL_SECONDS
+    }
 
 @router.post("/register", response_model=RegisterResponse)
 def register_user(item: Item, db: Session = Depends(get_db)):
@@ -42,7 +54,8 @@ def register_user(item: Item, db: Session = Depends(get_db)):
     return {
         "user_id": new_user.id,
         "name": new_user.name,
-        "message": "User created successfully"
+        "message": "User created successfully",
+        **token_fields(new_user.id)
     }
 
 @router.post("/login")
@@ -53,6 +66,6 @@ def login_user(item: Item, db: Session = Depends(get_db)):
         email = f"user_{item.device_id}@koza.com"
         user = db.query(all_models.User).filter(all_models.User.email == email).first()
         if user:
-            return {"user_id": user.id, "name": user.name}
+            return {"user_id": user.id, "name": user.name, **token_fields(user.id)}
     
     return {"error": "User not found"}
@@ -0,0 +1,92 @@
+from typing import List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import Response, StreamingResponse
+
+from ..core.events import HEARTBEAT_SECONDS, RETRY_MS, event_bus, forum_channel, resync_frame, user_channel
+from .dependencies import get_optional_user_id
+from .routes_forum import ForumCategory
+
+router = APIRouter()
+
+LONG_POLL_MAX_SECONDS = 30
+
+def _channels(categories: Optional[List[ForumCategory]], user_id: Optional[int]) -> Set[str]:
+    channels = {forum_channel(c.value) for c in (categories or ForumCategory)}
+    if user_id is not None:
+        channels.add(user_channel(user_id))
+    return channels
+
+def _resume_point(last_event_id: Optional[str]) -> Tuple[int, bool]:
+    """(sequence to continue after, resync needed). No id: only new events."""
+    if not last_event_id:
+        return event_bus.seq, False
+    seq = event_bus.parse_event_id(last_event_id)
+    return (event_bus.seq, True) if seq is None else (seq, False)
+
+async def _event_stream(channels: Set[str], after: int, resync: bool):
+    event_bus.subscribers += 1
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode("ascii")
+        if resync:
+            yield resync_frame()[0]
+        while True:
+            events = await event_bus.wait(channels, after, HEARTBEAT_SECONDS)
+            # wait() read the ring up to the current sequence: continue from there
+            after = event_bus.seq
+            if events is None:
+                yield resync_frame()[0]
+            elif events:
+                yield b"".join(e.frame for e in events)
+            else:
+                yield b": ping\n\n"
+    finally:
+        event_bus.subscribers -= 1
+
+@router.get("/stream")
+async def stream_events(
+    categories: Optional[List[ForumCategory]] = Query(None, description="Forum categories to follow (default: all)"),
+    since: Optional[str] = Query(None, description="Last received event id, for clients that cannot send Last-Event-ID"),
+    last_event_id: Optional[str] = Header(None),
+    user_id: Optional[int] = Depends(get_optional_user_id),
+):
+    """
+    Server-Sent Events: `post` events ({id, title, category, author_id,
+    created_at}) for the chosen forum categories and, with a token
+    (`access_token` or Authorization), `notification` events ({message})
+    of that user. Reconnecting with Last-Event-ID resumes where the stream
+    stopped; `resync` means events were missed (refetch).
+    """
+    after, resync = _resume_point(last_event_id or since)
+    return StreamingResponse(
+        _event_stream(_channels(categories, user_id), after, resync),
+        media_type="text/event-stream",
+        # No caching, and no buffering by nginx-style proxies
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/poll")
+async def poll_events(
+    categories: Optional[List[ForumCategory]] = Query(None, description="Forum categories to follow (default: all)"),
+    since: Optional[str] = Query(None, description="`last_event_id` of the previous response"),
+    timeout: float = Query(25, ge=0, le=LONG_POLL_MAX_SECONDS, description="Seconds to wait for an event"),
+    user_id: Optional[int] = Depends(get_optional_user_id),
+):
+    """
+    Long-poll fallback with the same events as /stream: answers as soon as
+    there is an event after `since`, or with an empty list after `timeout`.
+    Send the returned `last_event_id` as `since` on the next call.
+    """
+    after, resync = _resume_point(since)
+    if resync:
+        events = [resync_frame()[1]]
+    else:
+        event_bus.subscribers += 1
+        try:
+            found = await event_bus.wait(_channels(categories, user_id), after, timeout)
+        finally:
+            event_bus.subscribers -= 1
+        events = [resync_frame()[1]] if found is None else [e.json for e in found]
+    # Events are stored as encoded JSON already: assemble the body without re-encoding
+    body = '{"events":[' + ",".join(events) + '],"last_event_id":"' + event_bus.event_id(event_bus.seq) + '"}'
+    return Response(body, media_type="application/json")
@@ -3,12 +3,17 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException, Query
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+import asyncio
+from sqlalchemy import case, func, or_, select, update
 from enum import Enum
 from pydantic import BaseModel
 from datetime import datetime
-from ..database import get_db
+from ..database import SessionLocal, get_db
 from ..models import all_models
+from ..core.group_commit import execute_write
+from ..core.jobs import job, job_queue
+from ..core.events import event_bus, forum_channel, user_channel
+from .responses import FastJSONResponse, rows_to_dicts
 
 router = APIRouter()
 
@@ -77,8 +82,13 @@ class ConnectionManager:
         self.active_connections.remove(websocket)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        # A dead socket must not stop the others (or fail the job with a re-send to everyone)
+        for connection in list(self.active_connections):
+            try:
+                await connection.send_text(message)
+            except Exception:
+                if connection in self.active_connections:
+                    self.disconnect(connection)
     
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
@@ -86,6 +96,8 @@ class ConnectionManager:
     # Conceptual: In a real app we'd map user_id -> websocket. 
     # For now, we broadcast to all ("User X replied to Y") for simplicity in this demo.
     async def notify_user(self, user_id: int, message: str):
+        # SSE / long-poll subscribers get it on their own channel
+        event_bus.publish(user_channel(user_id), "notification", {"message": message})
         # Implementation of targeted notification
         await self.broadcast(f"[Notification for User {user_id}]: {message}")
 
@@ -113,44 +125,37 @@ def get_posts(
     """
     List topics with optional category filtering, search, and author checking.
     """
-    query = db.query(all_models.ForumPost)
+    Post, User = all_models.ForumPost, all_models.User
+    # One joined Core select instead of an ORM load plus a User query per post
+    query = select(
+        Post.id,
+        Post.title,
+        Post.content,
+        Post.author_id,
+        case((User.id.is_(None), "Anonim"), else_=User.name).label("author_name"),
+        case((User.id.is_(None), "Yeni Anne"), else_=User.badge).label("author_badge"),
+        Post.category.label("category_id"), # Returning the stored string as category_id
+        Post.created_at
+    ).outerjoin(User, User.id == Post.author_id)
     
     if category:
-        query = query.filter(all_models.ForumPost.category == category.value)
+        query = query.where(Post.category == category.value)
     
     if q:
         search = f"%{q}%"
-        query = query.filter(
+        query = query.where(
             or_(
-                all_models.ForumPost.title.ilike(search),
-                all_models.ForumPost.content.ilike(search)
+                Post.title.ilike(search),
+                Post.content.ilike(search)
             )
         )
     
     if author_id:
-        query = query.filter(all_models.ForumPost.author_id == author_id)
-    
-    posts = query.all()
-    
-    # Simple mapping to match response model if column names differ slightly
-    results = []
-    for p in posts:
-        # Fetch author badge (Optimization: could join tables instead)
-        author = db.query(all_models.User).filter(all_models.User.id == p.author_id).first()
-        badge = author.badge if author else "Yeni Anne"
-        name = author.name if author else "Anonim"
-        
-        results.append(PostResponse(
-            id=p.id,
-            title=p.title,
-            content=p.content,
-            author_id=p.author_id,
-            author_name=name, # Added
-            author_badge=badge,
-            category_id=p.category, # Returning the stored string as category_id
-            created_at=p.created_at
-        ))
-    return results
+        query = query.where(Post.author_id == author_id)
+
+    # Oldest first, as SQLite returned them in rowid order; explicit so PostgreSQL agrees
+    query = query.order_by(Post.id)
+    return FastJSONResponse(rows_to_dicts(db.execute(query)))
 
 # --- Badge Logic ---
 def update_user_badge(user_id: int, db: Session):
@@ -189,6 +194,33 @@ def update_user_badge(user_id: int, db: Session):
         user.badge = new_badge
         db.commit()
 
+# --- Background Jobs (core.jobs): run after the request returned ---
+@job("update_user_badge")
+def recompute_user_badge(user_id: int):
+    db = SessionLocal()
+    try:
+        update_user_badge(user_id, db)
+    finally:
+        db.close()
+
+@job("broadcast")
+async def broadcast_message(message: str):
+    await manager.broadcast(message)
+
+def _post_author_and_title(post_id: int):
+    db = SessionLocal()
+    try:
+        P = all_models.ForumPost
+        return db.execute(select(P.author_id, P.title).where(P.id == post_id)).first()
+    finally:
+        db.close()
+
+@job("notify_post_author")
+async def notify_post_author(post_id: int, preview: str):
+    post = await asyncio.to_thread(_post_author_and_title, post_id)
+    if post:
+        await manager.notify_user(post.author_id, f"Someone commented on your post '{post.title}': {preview}...")
+
 # --- Endpoints ---
 
 @router.post("/posts", response_model=PostResponse)
@@ -210,13 +242,17 @@ async def create_post(post: PostCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(new_post)
     
-    # Update Badge
-    update_user_badge(post.user_id, db)
+    # SSE / long-poll subscribers of the category (in-memory, immediate)
+    event_bus.publish(forum_channel(new_post.category), "post", {
+        "id": new_post.id, "title": new_post.title, "category": new_post.category,
+        "author_id": new_post.author_id, "created_at": new_post.created_at,
+    })
+
+    # Badge and the WebSocket broadcast run in the background
+    job_queue.enqueue("update_user_badge", user_id=post.user_id)
+    job_queue.enqueue("broadcast", message=f"New Post in {post.category_id.value}: {post.title}")
     
-    # Notify users about new post via WebSocket
-    await manager.broadcast(f"New Post in {post.category_id.value}: {post.title}")
-    
-    # Fetch latest badge
+    # Current badge (the recomputed one shows up from the next request on)
     user = db.query(all_models.User).filter(all_models.User.id == post.user_id).first()
     badge = user.badge if user else "Yeni Anne"
     
@@ -245,42 +281,47 @@ async def create_comment(comment: CommentCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(new_comment)
 
-    # 2. Notify Post Author
-    # Fetch post to get author_id
-    post = db.query(all_models.ForumPost).filter(all_models.ForumPost.id == comment.post_id).first()
-    if post:
-        await manager.notify_user(post.author_id, f"Someone commented on your post '{post.title}': {comment.content[:20]}...")
+    # 2. Notify Post Author (background job: looks up the post and sends)
+    job_queue.enqueue("notify_post_author", post_id=comment.post_id, preview=comment.content[:20])
 
     return new_comment
 
 @router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
 def get_comments(post_id: int, db: Session = Depends(get_db)):
-    comments = db.query(all_models.ForumComment).filter(all_models.ForumComment.post_id == post_id).all()
-    return comments
+    C = all_models.ForumComment
+    comments = db.execute(select(
+        C.id, C.post_id, C.author_id, C.content,
+        func.coalesce(C.like_count, 0).label("like_count"),
+        func.coalesce(C.is_helpful_count, 0).label("is_helpful_count"),
+        C.created_at
+    ).where(C.post_id == post_id))
+    return FastJSONResponse(rows_to_dicts(comments))
 
 @router.post("/comments/{comment_id}/like")
 def like_comment(comment_id: int, db: Session = Depends(get_db)):
-    comment = db.query(all_models.ForumComment).filter(all_models.ForumComment.id == comment_id).first()
-    if not comment:
+    # Atomic increment (no read-modify-write race between concurrent likes)
+    C = all_models.ForumComment
+    rows = execute_write(db, update(C).where(C.id == comment_id)
+                         .values(like_count=func.coalesce(C.like_count, 0) + 1)
+                         .returning(C.like_count, C.author_id))
+    if not rows:
         raise HTTPException(status_code=404, detail="Comment not found")
+    likes, author_id = rows[0]
     
-    comment.like_count += 1
-    db.commit()
-    
-    # Update Badge for the comment author
-    update_user_badge(comment.author_id, db)
+    # Update Badge for the comment author (background job)
+    job_queue.enqueue("update_user_badge", user_id=author_id)
     
-    return {"status": "success", "likes": comment.like_count}
+    return {"status": "success", "likes": likes}
 
 @router.post("/comments/{comment_id}/helpful")
 def mark_helpful_comment(comment_id: int, db: Session = Depends(get_db)):
-    comment = db.query(all_models.ForumComment).filter(all_models.ForumComment.id == comment_id).first()
-    if not comment:
+    C = all_models.ForumComment
+    rows = execute_write(db, update(C).where(C.id == comment_id)
+                         .values(is_helpful_count=func.coalesce(C.is_helpful_count, 0) + 1)
+                         .returning(C.is_helpful_count))
+    if not rows:
         raise HTTPException(status_code=404, detail="Comment not found")
-    
-    comment.is_helpful_count += 1
-    db.commit()
-    return {"status": "success", "helpful_count": comment.is_helpful_count}
+    return {"status": "success", "helpful_count": rows[0][0]}
 
 class ReportRequest(BaseModel):
     reason: str
@@ -313,17 +354,18 @@ def get_reports(db: Session = Depends(get_db)):
     """
     Moderator endpoint to see flagged content.
     """
-    flagged_posts = db.query(all_models.ForumPost).filter(all_models.ForumPost.is_flagged == True).all()
-    flagged_comments = db.query(all_models.ForumComment).filter(all_models.ForumComment.is_flagged == True).all()
+    Post, Comment = all_models.ForumPost, all_models.ForumComment
+    flagged_posts = db.execute(select(
+        Post.id, Post.title, Post.flag_reason.label("reason")
+    ).where(Post.is_flagged == True))
+    flagged_comments = db.execute(select(
+        Comment.id, Comment.post_id, Comment.content, Comment.flag_reason.label("reason")
+    ).where(Comment.is_flagged == True))
     
-    return {
-        "flagged_posts": [
-            {"id": p.id, "title": p.title, "reason": p.flag_reason} for p in flagged_posts
-        ],
-        "flagged_comments": [
-            {"id": c.id, "post_id": c.post_id, "content": c.content, "reason": c.flag_reason} for c in flagged_comments
-        ]
-    }
+    return FastJSONResponse({
+        "flagged_posts": rows_to_dicts(flagged_posts),
+        "flagged_comments": rows_to_dicts(flagged_comments)
+    })
 
 # --- Blocking ---
 @router.post("/users/{target_id}/block")
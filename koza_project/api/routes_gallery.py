@@ -1,59 +1,126 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import all_models
-import shutil
+from .utils import stream_upload, store_upload, verify_direct_upload, multipart_openapi, MAX_FILE_SIZE
+from ..core import blobstore
+from ..core.storage import get_storage
+from .responses import FastJSONResponse
+from ..core.thumbnails import run_blob_derivatives, derivative_urls, blob_derivative_urls
+from ..core.jobs import job, job_queue
+from ..core.sync import record_deletion
+import asyncio
+import glob
 import os
-from datetime import datetime
 
 router = APIRouter()
 
 UPLOAD_DIR = "ui/uploads" # Keeping inside ui for easy serving in this simple setup
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-@router.post("/upload")
+def ensure_legacy_upload_dir():
+    """Called from the app lifespan, not at import."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+class UploadCompleteRequest(BaseModel):
+    user_id: int
+    week: int
+    key: str # From POST /api/storage/presign
+
+@job("blob_derivatives")
+async def build_blob_derivatives(key: str):
+    """Background job: thumbnails on the process pool, then the blob is marked ready."""
+    if await run_blob_derivatives(key) is not None:
+        await asyncio.to_thread(blobstore.mark_derivatives_ready, blobstore.sha_from_path(key))
+
+def _schedule_blob_derivatives(key: str):
+    job_queue.enqueue("blob_derivatives", key=key)
+
+@router.post("/upload", openapi_extra=multipart_openapi(user_id="integer", week="integer"))
 async def upload_photo(
-    user_id: int = Form(...),
-    week: int = Form(...),
-    file: UploadFile = File(...),
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    # Generate unique filename
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f"user_{user_id}_week_{week}_{timestamp}_{file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
+    # Stream the body to disk (size limit + magic byte check), no blocking copy
+    upload = await stream_upload(request, blobstore.TMP_DIR, MAX_FILE_SIZE)
+    try:
+        user_id = int(upload.fields.get("user_id", ""))
+        week = int(upload.fields.get("week", ""))
+    except ValueError:
+        await upload.discard()
+        raise HTTPException(status_code=422, detail="user_id and week are required integers.")
+
+    # Content-addressed: a retried/duplicate upload reuses the stored file
+    key = await store_upload(db, upload)
+
+    # Build thumbnails in the background (job queue -> process pool), skipped if already there
+    _schedule_blob_derivatives(key)
+
     # Create DB Record
-    # Relative path for frontend access (assuming ui is served as root or similar)
-    # Since visualizer serves ui/, we can access via uploads/filename
-    web_path = f"uploads/{filename}"
-    
     new_log = all_models.PhotoLog(
         user_id=user_id,
         week=week,
-        photo_path=web_path
+        photo_path=key
     )
     db.add(new_log)
     db.commit()
     
-    return {"status": "success", "path": web_path}
+    return {"status": "success", "path": key, "url": get_storage().url_for(key)}
+
+@router.post("/upload-complete")
+async def complete_photo_upload(req: UploadCompleteRequest, db: Session = Depends(get_db)):
+    """Registers a photo the client already PUT to storage with a pre-signed URL."""
+    sha256, ext, size = await verify_direct_upload(req.key)
+    if not blobstore.register_direct_upload(db, sha256, ext, size):
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    _schedule_blob_derivatives(req.key)
+
+    new_log = all_models.PhotoLog(user_id=req.user_id, week=req.week, photo_path=req.key)
+    db.add(new_log)
+    db.commit()
+    return {"status": "success", "path": req.key, "url": get_storage().url_for(req.key)}
+
+def remove_legacy_file(photo_path: str):
+    """Legacy uploads are unique per photo, so the file and its derivatives can go."""
+    stem = os.path.splitext(os.path.basename(photo_path))[0]
+    for path in glob.glob(os.path.join(UPLOAD_DIR, glob.escape(stem) + ".*")):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Could not remove {path}: {e}")
+
+def _photo_urls(photo_path: str, ready: set) -> dict:
+    sha256 = blobstore.sha_from_path(photo_path)
+    if sha256:
+        return blob_derivative_urls(blobstore.key_from_path(photo_path), sha256 in ready)
+    return derivative_urls(photo_path, UPLOAD_DIR) # Legacy "uploads/<name>" paths
 
 @router.get("/photos")
 def get_photos(user_id: int, db: Session = Depends(get_db)):
     photos = db.query(all_models.PhotoLog).filter(
         all_models.PhotoLog.user_id == user_id
     ).order_by(all_models.PhotoLog.week.asc()).all()
-    
-    return [{
-        "id": p.id,
-        "week": p.week,
-        "url": p.photo_path,
-        "date": p.created_at
-    } for p in photos]
+
+    # One query for the thumbnail state of every blob on the page
+    shas = {blobstore.sha_from_path(p.photo_path) for p in photos} - {None}
+    ready = set()
+    if shas:
+        Blob = all_models.StoredBlob
+        ready = {sha for (sha,) in db.query(Blob.sha256).filter(
+            Blob.sha256.in_(shas), Blob.derivatives_ready.is_(True)
+        )}
+
+    result = []
+    for p in photos:
+        urls = _photo_urls(p.photo_path, ready)
+        result.append({
+            "id": p.id,
+            "week": p.week,
+            "url": urls["original"],
+            "urls": urls,
+            "date": p.created_at
+        })
+    return FastJSONResponse(result)
 
 @router.delete("/{photo_id}")
 def delete_photo(photo_id: int, user_id: int, db: Session = Depends(get_db)):
@@ -64,9 +131,14 @@ def delete_photo(photo_id: int, user_id: int, db: Session = Depends(get_db)):
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
         
-    # Ideally delete file from disk too
-    # os.remove(...)
+    sha256 = blobstore.sha_from_path(photo.photo_path)
+    if sha256:
+        # Shared file: drop our reference, the GC sweep removes it once unused
+        blobstore.release_blob(db, sha256)
+    else:
+        remove_legacy_file(photo.photo_path)
     
     db.delete(photo)
+    record_deletion(db, photo.user_id, all_models.PhotoLog.__tablename__, photo.id)
     db.commit()
     return {"status": "success"}
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, Query
-from typing import Optional
+from typing import List, Optional, Set
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_db, insert_ignore
 from ..models import all_models
+from ..core.names import get_name_index
+from ..core.sync import record_deletion
+from .responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -26,11 +31,43 @@ INITIAL_NAMES = [
 ]
 
 def seed_names(db: Session):
-    if db.query(all_models.BabyName).count() == 0:
-        for n in INITIAL_NAMES:
-            db.add(all_models.BabyName(**n))
+    """
+    Bulk inserts INITIAL_NAMES into an empty table. Called once at startup.
+    """
+    if db.query(all_models.BabyName.id).first() is None:
+        db.execute(insert(all_models.BabyName), INITIAL_NAMES)
         db.commit()
 
+# --- Favorites ---
+class FavoriteChange(BaseModel):
+    name_id: int
+    favorite: bool
+
+class FavoriteBatchRequest(BaseModel):
+    user_id: int
+    changes: List[FavoriteChange]
+
+def get_favorite_ids(db: Session, user_id: int) -> Set[int]:
+    # Served from ux_favorite_names_user_name alone (covering index, no table access)
+    rows = db.execute(
+        select(all_models.FavoriteName.baby_name_id).where(all_models.FavoriteName.user_id == user_id)
+    )
+    return {r[0] for r in rows}
+
+def _set_favorites(db: Session, user_id: int, add_ids: List[int], remove_ids: List[int]):
+    if add_ids:
+        db.execute(
+            insert_ignore(db, all_models.FavoriteName),
+            [{"user_id": user_id, "baby_name_id": i} for i in add_ids]
+        )
+    if remove_ids:
+        removed = db.execute(delete(all_models.FavoriteName).where(
+            all_models.FavoriteName.user_id == user_id,
+            all_models.FavoriteName.baby_name_id.in_(remove_ids)
+        )).rowcount
+        if removed:
+            record_deletion(db, user_id, all_models.FavoriteName.__tablename__)
+
 # --- Endpoints ---
 
 @router.get("/")
@@ -41,63 +78,90 @@ def get_names(
     only_favorites: bool = False,
     db: Session = Depends(get_db)
 ):
-    # Ensure seeded
-    seed_names(db)
-    
-    query = db.query(all_models.BabyName)
-    
-    # Favorites Filter
+    # Names are served from the in-memory index built at startup;
+    # only the (small) per-user favorites set comes from the DB.
+    index = get_name_index()
+
+    fav_ids = get_favorite_ids(db, user_id)
+
+    # Favorites Filter (gender is ignored when listing favorites)
     if only_favorites:
-        query = query.join(all_models.FavoriteName).filter(all_models.FavoriteName.user_id == user_id)
-    
-    # Gender Filter
-    if gender and not only_favorites:
-        # If searching favorites, maybe we ignore gender trigger or combine?
-        # Let's assume standard filtering
-        if gender == 'U':
-            query = query.filter(all_models.BabyName.gender == 'U')
-        else:
-            # If K or E, usually include that specific gender + Unisex? 
-            # Or strict? Let's go strict for now based on request "Kız, Erkek, Üniseks buttons".
-            query = query.filter(all_models.BabyName.gender == gender)
-            
-    # Search Filter
-    if search:
-        query = query.filter(all_models.BabyName.name.ilike(f"%{search}%"))
-        
-    results = query.all()
-    
-    # Check Favorites status for each
-    # Allow efficient check
-    user_favorites = db.query(all_models.FavoriteName.baby_name_id).filter(all_models.FavoriteName.user_id == user_id).all()
-    fav_ids = {f[0] for f in user_favorites}
-    
-    output = []
-    for n in results:
-        output.append({
-            "id": n.id,
-            "name": n.name,
-            "gender": n.gender,
-            "meaning": n.meaning,
-            "is_favorite": n.id in fav_ids
-        })
-        
-    return output
+        results = index.favorites(fav_ids, search)
+    else:
+        # Gender is strict: K, E or U ("Kız, Erkek, Üniseks buttons")
+        results = index.search(gender, search)
+        if search and not results:
+            # e.g. "gunes" typed without Turkish letters -> fall back to fuzzy matches
+            results = [e for _, e in index.fuzzy.search(search, gender)]
+
+    return FastJSONResponse([{
+        "id": n_id,
+        "name": name,
+        "gender": n_gender,
+        "meaning": meaning,
+        "is_favorite": n_id in fav_ids
+    } for n_id, name, n_gender, meaning in results])
+
+@router.get("/search")
+def search_names(
+    user_id: int,
+    q: str = Query(..., min_length=1),
+    gender: Optional[str] = None, # K, E, U
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked fuzzy search over names and meanings (trigram similarity,
+    Turkish diacritics folded: "ruzgar" finds "Rüzgar").
+    """
+    fav_ids = get_favorite_ids(db, user_id)
+
+    return FastJSONResponse([{
+        "id": n_id,
+        "name": name,
+        "gender": n_gender,
+        "meaning": meaning,
+        "score": round(score, 3),
+        "is_favorite": n_id in fav_ids
+    } for score, (n_id, name, n_gender, meaning) in get_name_index().fuzzy.search(q, gender, limit)])
 
 @router.post("/{name_id}/favorite")
-def toggle_favorite(name_id: int, user_id: int, db: Session = Depends(get_db)):
-    existing = db.query(all_models.FavoriteName).filter(
-        all_models.FavoriteName.user_id == user_id,
-        all_models.FavoriteName.baby_name_id == name_id
-    ).first()
-    
-    if existing:
-        db.delete(existing)
-        is_fav = False
+def toggle_favorite(name_id: int, user_id: int, favorite: Optional[bool] = None, db: Session = Depends(get_db)):
+    """
+    Toggles a favorite, or sets it idempotently when `favorite` is given
+    (safe against double taps and retries).
+    """
+    if favorite is None:
+        # Toggle: a DELETE that hits nothing means it was not a favorite yet
+        removed = db.execute(delete(all_models.FavoriteName).where(
+            all_models.FavoriteName.user_id == user_id,
+            all_models.FavoriteName.baby_name_id == name_id
+        )).rowcount
+        is_fav = removed == 0
+        if is_fav:
+            _set_favorites(db, user_id, [name_id], [])
+        else:
+            record_deletion(db, user_id, all_models.FavoriteName.__tablename__)
     else:
-        new_fav = all_models.FavoriteName(user_id=user_id, baby_name_id=name_id)
-        db.add(new_fav)
-        is_fav = True
-        
+        is_fav = favorite
+        _set_favorites(db, user_id, [name_id] if is_fav else [], [] if is_fav else [name_id])
+
     db.commit()
     return {"status": "success", "is_favorite": is_fav}
+
+@router.post("/favorites/batch")
+def batch_favorites(request: FavoriteBatchRequest, db: Session = Depends(get_db)):
+    """
+    Applies a list of favorite changes in one transaction.
+    If a name appears more than once, the last change wins.
+    """
+    final = {}
+    for change in request.changes:
+        final[change.name_id] = change.favorite
+
+    add_ids = [i for i, fav in final.items() if fav]
+    remove_ids = [i for i, fav in final.items() if not fav]
+    _set_favorites(db, request.user_id, add_ids, remove_ids)
+    db.commit()
+
+    return {"status": "success", "added": len(add_ids), "removed": len(remove_ids)}
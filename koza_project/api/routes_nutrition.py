@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Request, Response
 from typing import Optional
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from ..database import get_db
 from ..models import all_models
+from ..core.nutrition import get_nutrition_catalog
 
 router = APIRouter()
 
@@ -21,35 +22,34 @@ INITIAL_FOODS = [
 ]
 
 def seed_nutrition(db: Session):
-    if db.query(all_models.NutritionItem).count() == 0:
-        for f in INITIAL_FOODS:
-            db.add(all_models.NutritionItem(**f))
+    """
+    Bulk inserts INITIAL_FOODS into an empty table. Called once at startup.
+    """
+    if db.query(all_models.NutritionItem.id).first() is None:
+        db.execute(insert(all_models.NutritionItem), INITIAL_FOODS)
         db.commit()
 
 # --- Endpoints ---
 
 @router.get("/")
 def get_nutrition_guide(
+    request: Request,
     search: Optional[str] = None,
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    status: Optional[str] = None, # SAFE, CAUTION, BANNED
 ):
-    seed_nutrition(db)
-    
-    query = db.query(all_models.NutritionItem)
-    
-    if search:
-        query = query.filter(all_models.NutritionItem.name.ilike(f"%{search}%"))
-        
-    if category:
-        query = query.filter(all_models.NutritionItem.category == category)
-        
-    items = query.all()
-    
-    return [{
-        "id": i.id,
-        "name": i.name,
-        "category": i.category,
-        "status": i.status,
-        "description": i.description
-    } for i in items]
+    """
+    Served from the catalog snapshot built at startup (no DB access).
+    The ETag only changes when the catalog is reloaded.
+    """
+    catalog = get_nutrition_catalog()
+    headers = {"ETag": catalog.etag, "Cache-Control": "no-cache"}
+
+    if request.headers.get("if-none-match") == catalog.etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=catalog.payload_for(search, category, status),
+        media_type="application/json",
+        headers=headers
+    )
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from datetime import date
 from pydantic import BaseModel
 from typing import Optional
-from ..database import get_db
+from ..database import get_db, get_write_db
 from ..core.pregnancy import calculate_pregnancy_status
+from ..core.tokens import user_cache
 from ..models import all_models
 
 router = APIRouter()
@@ -88,7 +89,8 @@ def get_weekly_summary(week: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/profile/{user_id}")
-def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+def get_user_profile(user_id: int, db: Session = Depends(get_write_db)):
+    # Writer session: a missing profile row is created on first read
     user = db.query(all_models.User).filter(all_models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -175,6 +177,7 @@ def patch_user_profile(request: ProfilePatchRequest, db: Session = Depends(get_d
         week_info = calculate_pregnancy_status(request.last_period_date)
 
     db.commit()
+    user_cache.invalidate(user.id)
     
     return {
         "status": "success", 
@@ -0,0 +1,69 @@
+import hmac
+import re
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from .dependencies import get_current_user_id
+from .utils import stream_body, MAX_FILE_SIZE
+from ..core import blobstore
+from ..core.storage import get_storage, sign_local_upload
+
+router = APIRouter()
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+EXTENSIONS = {mime: ext for ext, mime in blobstore.CONTENT_TYPES.items() if ext != ".webp"}
+
+class PresignRequest(BaseModel):
+    content_type: str # image/jpeg, image/png or image/gif
+    size: int
+    sha256: str # Hex digest of the file, computed by the client
+
+@router.post("/presign")
+def presign_upload(req: PresignRequest, current_user_id: int = Depends(get_current_user_id)):
+    """
+    Returns a pre-signed URL so the client can send the image bytes straight
+    to storage instead of through the API.
+
+    - The URL only accepts exactly `size` bytes with the given SHA-256.
+    - `upload` is null when the same content is already stored: skip the PUT.
+    - Afterwards call /api/upload-image/complete or /api/gallery/upload-complete with `key`.
+    """
+    ext = EXTENSIONS.get(req.content_type)
+    if not ext:
+        raise HTTPException(status_code=400, detail="Invalid file type. Only .jpg, .png, .gif allowed.")
+    if not 0 < req.size <= MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB.")
+    sha256 = req.sha256.lower()
+    if not SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="sha256 must be a hex digest.")
+
+    storage = get_storage()
+    key = blobstore.blob_key(sha256, ext)
+    if storage.exists(key):
+        return {"key": key, "upload": None}
+    return {"key": key, "upload": storage.presign_upload(key, req.content_type, req.size, sha256)}
+
+@router.put("/upload")
+async def signed_upload(request: Request, key: str, content_type: str, size: int, sha256: str, expires: int, sig: str):
+    """
+    Target of the local backend's pre-signed URLs (S3 handles its own).
+    The URL signature, not a bearer token, authorizes the request.
+    """
+    storage = get_storage()
+    if not storage.is_local:
+        raise HTTPException(status_code=404, detail="Uploads go directly to the storage backend.")
+    expected = sign_local_upload(key, content_type, size, sha256, expires)
+    if not hmac.compare_digest(expected, sig) or expires < time.time():
+        raise HTTPException(status_code=403, detail="Invalid or expired upload URL.")
+
+    upload = await stream_body(request, blobstore.TMP_DIR, min(size, MAX_FILE_SIZE))
+    if upload.size != size or upload.sha256 != sha256 or blobstore.blob_key(sha256, upload.ext) != key:
+        await upload.discard()
+        raise HTTPException(status_code=400, detail="Uploaded content does not match the signed size/hash.")
+
+    await run_in_threadpool(storage.put_file, upload.temp_path, key, upload.content_type)
+    upload.temp_path = None
+    return {"key": key}
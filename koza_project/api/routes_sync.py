@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..core.sync import InvalidCursor, collect_changes
+from .dependencies import get_current_user_id
+from .responses import FastJSONResponse
+
+router = APIRouter()
+
+@router.get("/changes")
+def get_changes(
+    since: Optional[str] = Query(None, description="`cursor` of the previous response; omit for a full sync"),
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Everything that changed for the calling user since `since`: profile,
+    tracker logs, photos, appointments, favorites (as the whole id set),
+    new or edited forum posts and deleted rows (`id: null` = all rows of
+    that table). Only non-empty sections are included. Apply `deleted`
+    first, then upsert `changes` by id.
+
+    Store `cursor` and send it next time; while `has_more` is true, call
+    again right away. With `full: true` (no `since`) replace the local
+    cache instead of merging.
+    """
+    try:
+        return FastJSONResponse(collect_changes(db, current_user_id, since))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
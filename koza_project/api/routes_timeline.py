@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..core.sync import InvalidCursor
+from ..core.timeline import MAX_PAGE_SIZE, PAGE_SIZE, collect_timeline
+from .responses import FastJSONResponse
+
+router = APIRouter()
+
+@router.get("/{user_id}")
+def get_timeline(
+    user_id: int,
+    cursor: Optional[str] = Query(None, description="`cursor` of the previous page; omit for the newest entries"),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    The user's diary history in one list, newest first: water (`water`),
+    kick (`kick`), weight (`weight`), daily (`daily`) and photo (`photo`)
+    logs and forum posts (`post`). Each item is `{type, at, data}`; daily
+    logs are placed at the start of their day.
+
+    While `has_more` is true, send `cursor` back for the next page.
+    """
+    try:
+        return FastJSONResponse(collect_timeline(db, user_id, cursor, limit))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
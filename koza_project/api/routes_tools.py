@@ -1,10 +1,17 @@
 from typing import Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import date, datetime # Added datetime import for KickSessionRequest
 from ..database import get_db
 from ..models import all_models
+from ..core.group_commit import execute_write
+from ..core.shards import tracker_session, tracker_shards
+from ..core.sync import record_deletion
+from ..core.reminders import default_remind_at, scheduler as reminder_scheduler, to_utc_naive
+from ..core.tokens import user_cache
+from .responses import FastJSONResponse, rows_to_dicts
 
 router = APIRouter()
 
@@ -17,6 +24,7 @@ class AppointmentRequest(BaseModel):
     doctor_name: str
     date: date
     notes: str
+    remind_at: Optional[datetime] = None # UTC unless it has an offset; defaults to 09:00 local time (KOZA_TIMEZONE) the day before
 
 class KickSessionRequest(BaseModel):
     user_id: int
@@ -48,12 +56,11 @@ def log_water(request: WaterLogRequest, db: Session = Depends(get_db)):
     Logs a specific water intake (e.g., 200ml).
     Stored as a timestamped entry in water_logs.
     """
-    new_log = all_models.WaterLog(
-        user_id=request.user_id,
-        amount_ml=request.amount_ml
-    )
-    db.add(new_log)
-    db.commit()
+    with tracker_session(db, request.user_id) as tdb:
+        execute_write(tdb, insert(all_models.WaterLog).values(
+            user_id=request.user_id,
+            amount_ml=request.amount_ml
+        ))
     return {"status": "success", "added_ml": request.amount_ml}
 
 @router.get("/water/today")
@@ -68,11 +75,12 @@ def get_daily_water_total(user_id: int, db: Session = Depends(get_db)):
     today_start = datetime.combine(date.today(), time.min)
     today_end = datetime.combine(date.today(), time.max)
     
-    total = db.query(func.sum(all_models.WaterLog.amount_ml)).filter(
-        all_models.WaterLog.user_id == user_id,
-        all_models.WaterLog.created_at >= today_start,
-        all_models.WaterLog.created_at <= today_end
-    ).scalar()
+    with tracker_session(db, user_id) as tdb:
+        total = tdb.query(func.sum(all_models.WaterLog.amount_ml)).filter(
+            all_models.WaterLog.user_id == user_id,
+            all_models.WaterLog.created_at >= today_start,
+            all_models.WaterLog.created_at <= today_end
+        ).scalar()
     
     return {"user_id": user_id, "date": date.today(), "total_ml": total or 0}
 
@@ -101,6 +109,7 @@ def update_settings(update: SettingsUpdate, db: Session = Depends(get_db)):
     if update.auto_anonymous is not None: user.auto_anonymous_post = update.auto_anonymous
     
     db.commit()
+    user_cache.invalidate(user.id)
     return {"status": "success"}
 
 @router.post("/settings/reset-data")
@@ -108,14 +117,18 @@ def reset_user_data(user_id: int, db: Session = Depends(get_db)):
     """
     Deletes all user logs (Water, Kick, Weight). Keep User account active.
     """
-    db.query(all_models.WaterLog).filter(all_models.WaterLog.user_id == user_id).delete()
-    db.query(all_models.KickLog).filter(all_models.KickLog.user_id == user_id).delete()
-    db.query(all_models.WeightLog).filter(all_models.WeightLog.user_id == user_id).delete()
-    # DailyLog also contains weight info, maybe clear that too or specific columns?
-    # For now assume DailyLog corresponds mainly to weight/water daily summaries
-    db.query(all_models.DailyLog).filter(all_models.DailyLog.user_id == user_id).delete()
-    
-    db.commit()
+    with tracker_session(db, user_id) as tdb:
+        tdb.query(all_models.WaterLog).filter(all_models.WaterLog.user_id == user_id).delete()
+        tdb.query(all_models.KickLog).filter(all_models.KickLog.user_id == user_id).delete()
+        tdb.query(all_models.WeightLog).filter(all_models.WeightLog.user_id == user_id).delete()
+        # DailyLog also contains weight info, maybe clear that too or specific columns?
+        # For now assume DailyLog corresponds mainly to weight/water daily summaries
+        tdb.query(all_models.DailyLog).filter(all_models.DailyLog.user_id == user_id).delete()
+        # One tombstone per table tells synced clients to drop their copies
+        for model in (all_models.WaterLog, all_models.KickLog, all_models.WeightLog, all_models.DailyLog):
+            record_deletion(tdb, user_id, model.__tablename__)
+
+        tdb.commit()
     return {"status": "success", "message": "All tracking data has been reset."}
 
 @router.get("/settings/export-data/{user_id}")
@@ -123,17 +136,22 @@ def export_user_data(user_id: int, db: Session = Depends(get_db)):
     """
     Exports all tracking data as JSON.
     """
-    water = db.query(all_models.WaterLog).filter(all_models.WaterLog.user_id == user_id).all()
-    kicks = db.query(all_models.KickLog).filter(all_models.KickLog.user_id == user_id).all()
-    weights = db.query(all_models.WeightLog).filter(all_models.WeightLog.user_id == user_id).all()
-    
-    return {
+    Water, Kick, Weight = all_models.WaterLog, all_models.KickLog, all_models.WeightLog
+    with tracker_session(db, user_id) as tdb:
+        water = rows_to_dicts(tdb.execute(select(Water.created_at.label("date"), Water.amount_ml.label("amount"))
+                                          .where(Water.user_id == user_id).order_by(Water.created_at)))
+        kicks = rows_to_dicts(tdb.execute(select(Kick.start_time.label("start"), Kick.total_kicks.label("kicks"))
+                                          .where(Kick.user_id == user_id).order_by(Kick.created_at)))
+        weights = rows_to_dicts(tdb.execute(select(Weight.date, Weight.weight_kg.label("weight"))
+                                            .where(Weight.user_id == user_id).order_by(Weight.date)))
+
+    return FastJSONResponse({
         "user_id": user_id,
         "exported_at": datetime.utcnow(),
-        "water_logs": [ {"date": w.created_at, "amount": w.amount_ml} for w in water],
-        "kick_logs": [ {"start": k.start_time, "kicks": k.total_kicks} for k in kicks],
-        "weight_logs": [ {"date": wl.date, "weight": wl.weight_kg} for wl in weights]
-    }
+        "water_logs": water,
+        "kick_logs": kicks,
+        "weight_logs": weights
+    })
 
 # --- Reminder Logic (To be called by Scheduler/Cron) ---
 async def check_and_send_water_reminders(db: Session, manager):
@@ -146,18 +164,19 @@ async def check_and_send_water_reminders(db: Session, manager):
     two_hours_ago = datetime.utcnow() - timedelta(hours=2)
     
     users = db.query(all_models.User).filter(all_models.User.water_reminder_enabled == True).all()
-    
+
+    # Last log per user, one grouped query per tracker shard (instead of one query per user)
+    W = all_models.WaterLog
+    last_logged = dict(tracker_shards.gather_rows(select(W.user_id, func.max(W.created_at)).group_by(W.user_id)))
+
     for user in users:
-        # Get last log
-        last_log = db.query(all_models.WaterLog).filter(
-            all_models.WaterLog.user_id == user.id
-        ).order_by(all_models.WaterLog.created_at.desc()).first()
-        
+        last_log_at = last_logged.get(user.id)
+
         # Condition: No log at all OR last log older than 2 hours
         should_remind = False
-        if not last_log:
+        if not last_log_at:
             should_remind = True # If never logged, maybe remind? Or assume they just started. Let's remind.
-        elif last_log.created_at < two_hours_ago:
+        elif last_log_at < two_hours_ago:
             should_remind = True
             
         if should_remind:
@@ -171,43 +190,45 @@ def save_kick_session(session: KickSessionRequest, db: Session = Depends(get_db)
     """
     Saves a kick counting session.
     """
-    new_log = all_models.KickLog(
-        user_id=session.user_id,
-        start_time=session.start_time,
-        end_time=session.end_time,
-        total_kicks=session.total_kicks,
-        note=session.note
-    )
-    db.add(new_log)
-    db.commit()
+    K = all_models.KickLog
+    with tracker_session(db, session.user_id) as tdb:
+        [(log_id,)] = execute_write(tdb, insert(K).values(
+            user_id=session.user_id,
+            start_time=session.start_time,
+            end_time=session.end_time,
+            total_kicks=session.total_kicks,
+            note=session.note
+        ).returning(K.id))
     
     msg = "Session saved."
     if session.total_kicks >= 10:
         msg = "Tebrikler, bebeğin bugün oldukça hareketli! 🦶🎉"
         
-    return {"status": "success", "message": msg, "id": new_log.id}
+    return {"status": "success", "message": msg, "id": log_id}
 
 @router.get("/kick-counter/history")
 def get_kick_history(user_id: int, db: Session = Depends(get_db)):
     """
     Returns kick sessions (e.g., 'Bugün 14:00 - 10 Tekme (12 dk)')
     """
-    logs = db.query(all_models.KickLog).filter(
-        all_models.KickLog.user_id == user_id
-    ).order_by(all_models.KickLog.created_at.desc()).all()
+    K = all_models.KickLog
+    with tracker_session(db, user_id) as tdb:
+        logs = tdb.execute(select(
+            K.id, K.start_time, K.end_time, K.total_kicks
+        ).where(K.user_id == user_id).order_by(K.created_at.desc())).all()
     
     history = []
-    for log in logs:
-        duration = (log.end_time - log.start_time).total_seconds() / 60
+    for log_id, start_time, end_time, total_kicks in logs:
+        duration = (end_time - start_time).total_seconds() / 60
         history.append({
-            "id": log.id,
-            "date": log.start_time.strftime("%Y-%m-%d"),
-            "time": log.start_time.strftime("%H:%M"),
-            "kicks": log.total_kicks,
+            "id": log_id,
+            "date": start_time.strftime("%Y-%m-%d"),
+            "time": start_time.strftime("%H:%M"),
+            "kicks": total_kicks,
             "duration_min": int(duration)
         })
         
-    return history
+    return FastJSONResponse(history)
 
 @router.post("/weight")
 def log_weight(request: WeightLogRequest, db: Session = Depends(get_db)):
@@ -225,38 +246,48 @@ def log_weight(request: WeightLogRequest, db: Session = Depends(get_db)):
         else:
             week_num = 0
 
-    new_log = all_models.WeightLog(
-        user_id=request.user_id, 
-        weight_kg=request.weight_kg, 
-        week_no=week_num,
-        date=log_date
-    )
-    db.add(new_log)
-    db.commit()
-    return {"status": "success", "id": new_log.id}
+    W = all_models.WeightLog
+    with tracker_session(db, request.user_id) as tdb:
+        [(log_id,)] = execute_write(tdb, insert(W).values(
+            user_id=request.user_id,
+            weight_kg=request.weight_kg,
+            week_no=week_num,
+            date=log_date
+        ).returning(W.id))
+    return {"status": "success", "id": log_id}
 
 @router.delete("/weight/{log_id}")
 def delete_weight_log(log_id: int, user_id: int, db: Session = Depends(get_db)):
-    # In real app, verify user_id owns the log
-    log = db.query(all_models.WeightLog).filter(all_models.WeightLog.id == log_id).first()
-    if not log:
-        raise HTTPException(status_code=404, detail="Log not found")
-    
-    db.delete(log)
-    db.commit()
+    # Log ids are only unique per tracker shard: always look up within the owner's rows
+    W = all_models.WeightLog
+    with tracker_session(db, user_id) as tdb:
+        log = tdb.query(W).filter(W.id == log_id, W.user_id == user_id).first()
+        if not log:
+            raise HTTPException(status_code=404, detail="Log not found")
+
+        tdb.delete(log)
+        record_deletion(tdb, user_id, W.__tablename__, log_id)
+        tdb.commit()
     return {"status": "success"}
 
 @router.put("/weight/{log_id}")
-def update_weight_log(log_id: int, update: WeightLogUpdate, db: Session = Depends(get_db)):
-    log = db.query(all_models.WeightLog).filter(all_models.WeightLog.id == log_id).first()
-    if not log:
-        raise HTTPException(status_code=404, detail="Log not found")
-    
-    log.weight_kg = update.weight_kg
-    if update.week_no is not None:
-        log.week_no = update.week_no
-        
-    db.commit()
+def update_weight_log(log_id: int, update: WeightLogUpdate, user_id: Optional[int] = None, db: Session = Depends(get_db)):
+    if user_id is None and tracker_shards.enabled:
+        raise HTTPException(status_code=400, detail="user_id is required.")
+    W = all_models.WeightLog
+    with tracker_session(db, user_id) as tdb:
+        query = tdb.query(W).filter(W.id == log_id)
+        if user_id is not None:
+            query = query.filter(W.user_id == user_id)
+        log = query.first()
+        if not log:
+            raise HTTPException(status_code=404, detail="Log not found")
+
+        log.weight_kg = update.weight_kg
+        if update.week_no is not None:
+            log.week_no = update.week_no
+
+        tdb.commit()
     return {"status": "success"}
 
 @router.get("/weight/history")
@@ -268,30 +299,23 @@ def get_weight_history(user_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    logs = db.query(all_models.WeightLog).filter(
-        all_models.WeightLog.user_id == user_id
-    ).order_by(all_models.WeightLog.date.asc()).all()
+    W = all_models.WeightLog
+    with tracker_session(db, user_id) as tdb:
+        history = rows_to_dicts(tdb.execute(select(
+            W.id, W.date, W.weight_kg.label("weight"), W.week_no.label("week")
+        ).where(W.user_id == user_id).order_by(W.date.asc())))
 
-    history = []
     start_weight = 0
     
-    if logs:
-        start_weight = logs[0].weight_kg
-
-    for log in logs:
-        history.append({
-            "id": log.id,
-            "date": log.date,
-            "weight": log.weight_kg,
-            "week": log.week_no
-        })
+    if history:
+        start_weight = history[0]["weight"]
         
-    return {
+    return FastJSONResponse({
         "start_weight": start_weight,
-        "current_weight": logs[-1].weight_kg if logs else start_weight,
+        "current_weight": history[-1]["weight"] if history else start_weight,
         "history": history,
         "analysis": generate_weight_analysis(start_weight, user.height_cm or 165.0)
-    }
+    })
 
 def generate_weight_analysis(start_weight: float, height_cm: float):
     """
@@ -352,6 +376,27 @@ def generate_weight_analysis(start_weight: float, height_cm: float):
 
 @router.post("/appointments")
 def schedule_appointment(request: AppointmentRequest, db: Session = Depends(get_db)):
-    # Mocking Appointment scheduling (Model for Appointment wasn't strictly in 'all_models' main block but implied)
-    # We will just return success for this mock
-    return {"status": "success", "message": f"Appointment set with {request.doctor_name} on {request.date}"}
+    """
+    Stores an appointment and registers its reminder with the scheduler.
+    """
+    remind_at = to_utc_naive(request.remind_at) if request.remind_at else default_remind_at(request.date)
+
+    appointment = all_models.Appointment(
+        user_id=request.user_id,
+        doctor_name=request.doctor_name,
+        date=request.date,
+        notes=request.notes,
+        remind_at=remind_at
+    )
+    db.add(appointment)
+    db.commit()
+    db.refresh(appointment)
+
+    reminder_scheduler.add(appointment)
+
+    return {
+        "status": "success",
+        "id": appointment.id,
+        "remind_at": appointment.remind_at,
+        "message": f"Appointment set with {request.doctor_name} on {request.date}"
+    }
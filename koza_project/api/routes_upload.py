@@ -1,43 +1,35 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
 from typing import List
+from sqlalchemy.orm import Session
 
-from .dependencies import get_current_user
-from .utils import upload_image_to_server
+from .dependencies import get_current_user_id
+from .utils import upload_image_to_server, verify_direct_upload, absolute_url, multipart_openapi, MAX_FILE_SIZE
+from ..core import blobstore
+from ..core.storage import get_storage
+from ..database import get_db
 from ..models import all_models
 
 router = APIRouter()
 
-MAX_FILE_SIZE = 5 * 1024 * 1024 # 5MB
-ALLOWED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif"}
+class UploadCompleteRequest(BaseModel):
+    key: str # From POST /api/storage/presign
 
-@router.post("/upload-image")
+@router.post("/upload-image", openapi_extra=multipart_openapi())
 async def upload_image(
     request: Request,
-    file: UploadFile = File(...),
-    current_user: all_models.User = Depends(get_current_user)
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
 ):
     """
     Uploads an image file.
     - **Method**: POST only.
-    - **Auth**: Required (X-User-ID header).
-    - **Validation**: Images only (jpg, png, gif), Max 5MB.
+    - **Auth**: Required (Authorization: Bearer <token>, checked without a DB query).
+    - **Validation**: Images only (jpg, png, gif, checked by magic bytes), Max 5MB.
+    - The body is streamed to disk and rejected as soon as it exceeds the limit.
     """
-    
-    # 1. Validate Content Type (MIME) - Quick check before processing
-    if file.content_type not in ALLOWED_CONTENT_TYPES:
-        raise HTTPException(status_code=400, detail="Invalid file type. Only .jpg, .png, .gif allowed.")
-
-    # 2. Validate File Size
-    file.file.seek(0, 2) # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0) # Reset
-
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 5MB.")
-
-    # 3. Use Utility Function to Save
     try:
-        file_url = await upload_image_to_server(file, request)
+        upload = await upload_image_to_server(request, db, MAX_FILE_SIZE)
     except Exception as e:
         # Re-raise HTTP exceptions from util, or generic 500
         if isinstance(e, HTTPException):
@@ -45,7 +37,27 @@ async def upload_image(
         raise HTTPException(status_code=500, detail=str(e))
     
     return {
-        "filename": file.filename, # Original name for reference
-        "url": file_url, 
-        "size": file_size
+        "filename": upload.filename, # Original name for reference
+        "url": upload.url, 
+        "size": upload.size
+    }
+
+@router.post("/upload-image/complete")
+async def complete_image_upload(
+    req: UploadCompleteRequest,
+    request: Request,
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Second step of a direct upload (see /api/storage/presign): checks the
+    stored object (size, magic bytes) and takes a reference on it.
+    """
+    sha256, ext, size = await verify_direct_upload(req.key)
+    if not blobstore.register_direct_upload(db, sha256, ext, size):
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    return {
+        "filename": None,
+        "url": absolute_url(request, get_storage().url_for(req.key)),
+        "size": size
     }
@@ -1,54 +1,322 @@
+import hashlib
 import os
 import uuid
-import shutil
-from fastapi import UploadFile, HTTPException, Request
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from ..core import blobstore
+from ..core.storage import get_storage
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # older python-multipart releases
+    from multipart.multipart import MultipartParser, parse_options_header
 
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "static", "uploads")
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif"}
 
-# Ensure directory exists (Utility level check)
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+MAX_FILE_SIZE = 5 * 1024 * 1024 # 5MB
+MAX_FORM_OVERHEAD = 64 * 1024 # Boundaries, headers and small text fields
+
+# Magic bytes -> (extension, MIME type). The client's content_type is not trusted.
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", ".jpg", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", ".png", "image/png"),
+    (b"GIF87a", ".gif", "image/gif"),
+    (b"GIF89a", ".gif", "image/gif"),
+]
+SNIFF_BYTES = 8
+
+def ensure_upload_dirs():
+    """Creates the local upload directories. Called from the app lifespan, not at import."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    blobstore.ensure_dirs()
+
+def multipart_openapi(**fields: str) -> dict:
+    """OpenAPI body for endpoints that stream the form themselves (no File() param)."""
+    properties = {"file": {"type": "string", "format": "binary"}}
+    properties.update({name: {"type": t} for name, t in fields.items()})
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": list(properties), "properties": properties
+    }}}}}
 
-async def upload_image_to_server(file: UploadFile, request: Request = None) -> str:
+def sniff_image_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """Returns (extension, mime) for a known image signature, else None."""
+    for signature, ext, mime in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext, mime
+    return None
+
+class StreamedUpload:
     """
-    Saves an uploaded image with a unique UUID filename.
-    
-    Args:
-        file: The uploaded file object.
-        request: FastAPI Request object (optional, for constructing full URL).
-        
-    Returns:
-        str: The full URL or absolute path to the uploaded image.
-    """
-    
-    # 1. Validate Extension
-    filename = file.filename
-    file_ext = os.path.splitext(filename)[1].lower() if filename else ""
-    
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(status_code=400, detail="Geçersiz dosya türü. Sadece .jpg, .png, .gif kabul edilir.")
-        
-    # 2. Generate Unique Filename
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # 3. Save File
+    Result of stream_upload: the file is already on disk at `temp_path`,
+    the caller moves it to its final name with `commit_to()` or drops it with `discard()`.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.temp_path: Optional[str] = None
+        self.size = 0
+        self.sha256: Optional[str] = None
+        self.ext: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.path: Optional[str] = None
+        self.url: Optional[str] = None
+
+    async def commit_to(self, final_path: str) -> str:
+        await run_in_threadpool(os.replace, self.temp_path, final_path)
+        self.path, self.temp_path = final_path, None
+        return final_path
+
+    async def discard(self):
+        if self.temp_path and os.path.exists(self.temp_path):
+            await run_in_threadpool(os.remove, self.temp_path)
+        self.temp_path = None
+
+class _PartCollector:
+    """Sync python-multipart callbacks; the async side drains `file_data` after each chunk."""
+
+    def __init__(self, file_field: str):
+        self.file_field = file_field
+        self.header_field = bytearray()
+        self.header_value = bytearray()
+        self.headers: Dict[bytes, bytes] = {}
+        self.current_name: Optional[str] = None
+        self.current_is_file = False
+        self.field_data = bytearray()
+        self.file_data = bytearray()
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.file_seen = False
+        self.field_bytes = 0
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": lambda d, s, e: self.header_field.extend(d[s:e]),
+            "on_header_value": lambda d, s, e: self.header_value.extend(d[s:e]),
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self.headers = {}
+        self.field_data = bytearray()
+
+    def on_header_end(self):
+        self.headers[bytes(self.header_field).lower()] = bytes(self.header_value)
+        self.header_field = bytearray()
+        self.header_value = bytearray()
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        self.current_name = options.get(b"name", b"").decode("utf-8", "replace")
+        self.current_is_file = self.current_name == self.file_field and b"filename" in options
+        if self.current_is_file:
+            self.file_seen = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def on_part_data(self, data, start, end):
+        if self.current_is_file:
+            self.file_data.extend(data[start:end])
+        else:
+            self.field_bytes += end - start
+            self.field_data.extend(data[start:end])
+
+    def on_part_end(self):
+        if not self.current_is_file and self.current_name:
+            self.fields[self.current_name] = self.field_data.decode("utf-8", "replace")
+        self.current_is_file = False
+
+class _ImageSink:
+    """
+    Writes an image stream to a temp file: sniffs magic bytes on the first
+    chunk, enforces `max_size` and hashes while writing.
+    """
+
+    def __init__(self, upload: StreamedUpload, max_size: int):
+        self.upload = upload
+        self.max_size = max_size
+        self.digest = hashlib.sha256()
+        self.head = bytearray()
+        self.out = None
+
+    def too_large(self) -> HTTPException:
+        return HTTPException(status_code=400, detail=f"File too large. Maximum size is {self.max_size // (1024 * 1024)}MB.")
+
+    async def _open(self):
+        sniffed = sniff_image_type(bytes(self.head[:SNIFF_BYTES]))
+        if not sniffed:
+            raise HTTPException(status_code=400, detail="Invalid file type. Only .jpg, .png, .gif allowed.")
+        self.upload.ext, self.upload.content_type = sniffed
+        self.out = await run_in_threadpool(open, self.upload.temp_path, "wb")
+        data, self.head = bytes(self.head), bytearray()
+        await self._write(data)
+
+    async def _write(self, data: bytes):
+        self.digest.update(data)
+        await run_in_threadpool(self.out.write, data)
+
+    async def write(self, data: bytes):
+        self.upload.size += len(data)
+        if self.upload.size > self.max_size:
+            raise self.too_large()
+        if self.out is None:
+            # Wait for enough bytes to sniff the type
+            self.head.extend(data)
+            if len(self.head) >= SNIFF_BYTES:
+                await self._open()
+            return
+        await self._write(data)
+
+    async def finish(self) -> bool:
+        """Flushes a file shorter than SNIFF_BYTES. Returns False if nothing was written."""
+        if self.out is None and self.head:
+            await self._open()
+        self.upload.sha256 = self.digest.hexdigest()
+        return self.out is not None
+
+    async def close(self):
+        if self.out is not None:
+            await run_in_threadpool(self.out.close)
+            self.out = None
+
+async def stream_upload(request: Request, dest_dir: str, max_size: int = MAX_FILE_SIZE, file_field: str = "file") -> StreamedUpload:
+    """
+    Reads a multipart/form-data body chunk by chunk straight from the socket.
+
+    - Rejects a declared Content-Length over the limit before reading anything.
+    - Aborts as soon as the file part grows over `max_size`.
+    - Checks magic bytes of the first chunk instead of trusting content_type.
+    - Writes through the thread pool so the event loop is never blocked on disk I/O.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload.")
+
+    upload = StreamedUpload()
+    upload.temp_path = os.path.join(dest_dir, f".{uuid.uuid4().hex}.part")
+    sink = _ImageSink(upload, max_size)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_size + MAX_FORM_OVERHEAD:
+        raise sink.too_large()
+
+    collector = _PartCollector(file_field)
+    parser = MultipartParser(boundary, collector.callbacks())
+
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
+        async for chunk in request.stream():
+            parser.write(chunk)
+
+            if collector.field_bytes > MAX_FORM_OVERHEAD:
+                raise HTTPException(status_code=400, detail="Form fields too large.")
+
+            if collector.file_data:
+                data = bytes(collector.file_data)
+                collector.file_data.clear()
+                await sink.write(data)
+
+        parser.finalize()
+        if not collector.file_seen or not await sink.finish():
+            raise HTTPException(status_code=400, detail="No file uploaded.")
+    except Exception:
+        await sink.close()
+        await upload.discard()
+        raise
+    finally:
+        await sink.close()
+
+    upload.fields = collector.fields
+    upload.filename = collector.filename
+    return upload
+
+async def stream_body(request: Request, dest_dir: str, max_size: int = MAX_FILE_SIZE) -> StreamedUpload:
+    """Same checks as stream_upload for a raw (non-multipart) request body, e.g. a signed PUT."""
+    upload = StreamedUpload()
+    upload.temp_path = os.path.join(dest_dir, f".{uuid.uuid4().hex}.part")
+    sink = _ImageSink(upload, max_size)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_size:
+        raise sink.too_large()
+
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await sink.write(chunk)
+        if not await sink.finish():
+            raise HTTPException(status_code=400, detail="No file uploaded.")
+    except Exception:
+        await sink.close()
+        await upload.discard()
+        raise
+    finally:
+        await sink.close()
+    return upload
+
+async def store_upload(db: Session, upload: StreamedUpload) -> str:
+    """
+    Moves a streamed upload into the content-addressed blob store
+    (identical files are stored once) and returns its storage key.
+    """
+    try:
+        upload.path = await run_in_threadpool(
+            blobstore.store_blob, db, upload.temp_path, upload.sha256, upload.ext, upload.size
+        )
+    except OSError as e:
         print(f"File save error: {e}")
+        await upload.discard()
         raise HTTPException(status_code=500, detail="Dosya kaydedilemedi.")
-        
-    # 4. Construct Return URL
-    # If request is provided, Try to build full URL: https://domain.com/static/uploads/...
-    # Otherwise return absolute path /static/uploads/...
-    
-    relative_path = f"/static/uploads/{unique_filename}"
-    
-    if request:
-        base_url = str(request.base_url).rstrip("/")
-        full_url = f"{base_url}{relative_path}"
-        return full_url
-        
-    return relative_path
+    upload.temp_path = None
+    return upload.path
+
+def absolute_url(request: Request, url: str) -> str:
+    """Storage URLs are relative for the local backend (/static/...) and absolute for S3."""
+    if url.startswith("/"):
+        return str(request.base_url).rstrip("/") + url
+    return url
+
+async def verify_direct_upload(key: str) -> Tuple[str, str, int]:
+    """
+    Checks an object the client uploaded straight to storage before it is
+    referenced: well-formed blob key, size limit and magic bytes.
+    Returns (sha256, ext, size).
+    """
+    parsed = blobstore.parse_blob_key(key)
+    if not parsed:
+        raise HTTPException(status_code=400, detail="Invalid upload key.")
+    sha256, ext = parsed
+    storage = get_storage()
+    size = await run_in_threadpool(storage.size, key)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    if size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB.")
+    head = await run_in_threadpool(storage.read_head, key, SNIFF_BYTES)
+    sniffed = sniff_image_type(head)
+    if not sniffed or sniffed[0] != ext:
+        raise HTTPException(status_code=400, detail="Invalid file type. Only .jpg, .png, .gif allowed.")
+    return sha256, ext, size
+
+async def upload_image_to_server(request: Request, db: Session, max_size: int = MAX_FILE_SIZE) -> StreamedUpload:
+    """
+    Streams an uploaded image into the content-addressed store.
+
+    Args:
+        request: FastAPI Request object (body is read as a stream; also used for the full URL).
+        db: Session used to take the blob reference.
+        max_size: Upload limit in bytes.
+
+    Returns:
+        StreamedUpload: with `path` set to the storage key and `url` to the full URL of the image.
+    """
+    upload = await stream_upload(request, blobstore.TMP_DIR, max_size)
+    key = await store_upload(db, upload)
+
+    # Local: https://domain.com/static/blobs/ab/cd/<sha256>.png, S3: bucket/CDN URL
+    upload.url = absolute_url(request, get_storage().url_for(key))
+    return upload
@@ -0,0 +1,264 @@
+"""
+SQLite / PostgreSQL parity check: same seeded data, same API calls, same responses.
+
+For each backend a fresh interpreter (KOZA_DATABASE_URL set before the app
+is imported) migrates an empty database, seeds it with core.synthetic (fixed
+seed and clock) and drives the API through its lifespan with TestClient:
+reads over every router, writes followed by the reads they affect, and error
+cases. Responses are compared call by call; timestamps written during the run
+and tokens are masked. A list that only differs in order is a [WARN] (the
+handler has no ORDER BY), anything else a [FAIL].
+
+The PostgreSQL database must be a scratch database: its tables are dropped first.
+
+Usage:
+    python -m koza_project.benchmarks.db_parity --postgres-url postgresql+psycopg://postgres@localhost/koza_test
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# Seeded rows end here; timestamps after it were written during the run
+SEED_NOW = datetime.combine(date.today(), dtime.min)
+DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}")
+
+
+# --- Worker (one backend) ---
+def reset_database():
+    from sqlalchemy import text
+
+    from ..database import Base, engine
+    from ..models import all_models  # noqa: F401
+
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+def scenario(client, users: int) -> list:
+    """(label, response) pairs; later calls use ids returned by earlier ones."""
+    calls = []
+
+    def call(label, method, path, **kwargs):
+        response = client.request(method, path, **kwargs)
+        calls.append((label, response))
+        return response
+
+    user = 1
+    call("pregnancy calculate", "POST", "/api/pregnancy/calculate", json={"lmp_date": str(date.today() - timedelta(days=100))})
+    call("pregnancy development", "GET", "/api/pregnancy/development/20")
+    call("pregnancy summary", "GET", "/api/pregnancy/summary/20")
+    call("profile", "GET", f"/api/pregnancy/profile/{user}")
+    call("profile missing", "GET", f"/api/pregnancy/profile/{users + 1000}")
+    call("profile patch", "PATCH", "/api/pregnancy/profile/update", json={"user_id": user, "height_cm": 168.5, "city": "İzmir"})
+    call("profile after patch", "GET", f"/api/pregnancy/profile/{user}")
+
+    call("forum feed", "GET", "/api/forum/posts")
+    call("forum by category", "GET", "/api/forum/posts", params={"category": "Beslenme"})
+    call("forum by author", "GET", "/api/forum/posts", params={"author_id": user})
+    call("forum search", "GET", "/api/forum/posts", params={"q": "bebek"})
+    call("forum search case", "GET", "/api/forum/posts", params={"q": "BEBEK"})
+    post = call("create post", "POST", "/api/forum/posts", json={
+        "title": "Parite testi", "content": "Aynı veri, aynı yanıt", "user_id": user, "category_id": "Dertleşme Köşesi"})
+    post_id = post.json().get("id") if post.status_code == 200 else 1
+    comment = call("create comment", "POST", "/api/forum/comments", json={"user_id": 2, "post_id": post_id, "content": "Katılıyorum"})
+    comment_id = comment.json().get("id") if comment.status_code == 200 else 1
+    call("like comment", "POST", f"/api/forum/comments/{comment_id}/like")
+    call("helpful comment", "POST", f"/api/forum/comments/{comment_id}/helpful")
+    call("like missing comment", "POST", "/api/forum/comments/999999999/like")
+    call("comments", "GET", f"/api/forum/posts/{post_id}/comments")
+    call("seeded comments", "GET", "/api/forum/posts/1/comments")
+    call("report post", "POST", f"/api/forum/posts/{post_id}/report", json={"reason": "spam"})
+    call("reports", "GET", "/api/forum/reports")
+    call("block", "POST", "/api/forum/users/3/block", params={"current_user_id": user})
+    call("block again", "POST", "/api/forum/users/3/block", params={"current_user_id": user})
+    call("block self", "POST", f"/api/forum/users/{user}/block", params={"current_user_id": user})
+
+    call("water log", "POST", "/api/tools/water", json={"user_id": user, "amount_ml": 250})
+    call("water today", "GET", "/api/tools/water/today", params={"user_id": user})
+    call("settings", "GET", f"/api/tools/settings/{user}")
+    call("settings update", "POST", "/api/tools/settings/update", json={"user_id": user, "water_reminder": False})
+    call("settings after update", "GET", f"/api/tools/settings/{user}")
+    start = datetime.combine(date.today() - timedelta(days=1), dtime(14, 0))
+    call("kick session", "POST", "/api/tools/kick-counter", json={
+        "user_id": user, "start_time": start.isoformat(), "end_time": (start + timedelta(minutes=12)).isoformat(), "total_kicks": 10})
+    call("kick history", "GET", "/api/tools/kick-counter/history", params={"user_id": user})
+    weight = call("weight log", "POST", "/api/tools/weight", json={"user_id": user, "weight_kg": 68.4, "week_no": 20})
+    weight_id = (weight.json() or {}).get("id", 1) if weight.status_code == 200 else 1
+    call("weight update", "PUT", f"/api/tools/weight/{weight_id}", params={"user_id": user},
+         json={"weight_kg": 68.9, "week_no": 20})
+    call("weight history", "GET", "/api/tools/weight/history", params={"user_id": user})
+    call("weight delete", "DELETE", f"/api/tools/weight/{weight_id}", params={"user_id": user})
+    call("weight missing user", "GET", "/api/tools/weight/history", params={"user_id": users + 1000})
+    call("appointment", "POST", "/api/tools/appointments", json={
+        "user_id": user, "doctor_name": "Dr. Ayşe", "date": str(date.today() + timedelta(days=7)), "notes": "Kontrol"})
+    call("export", "GET", f"/api/tools/settings/export-data/{user}")
+    call("reset data", "POST", "/api/tools/settings/reset-data", params={"user_id": 2})
+    call("export after reset", "GET", "/api/tools/settings/export-data/2")
+
+    call("names", "GET", "/api/names/", params={"user_id": user, "gender": "K"})
+    call("names search", "GET", "/api/names/search", params={"user_id": user, "q": "ay"})
+    call("favorite", "POST", "/api/names/1/favorite", params={"user_id": user, "favorite": True})
+    call("favorites batch", "POST", "/api/names/favorites/batch", json={
+        "user_id": user, "changes": [{"name_id": 2, "favorite": True}, {"name_id": 1, "favorite": False}]})
+    call("only favorites", "GET", "/api/names/", params={"user_id": user, "only_favorites": True})
+    call("nutrition", "GET", "/api/nutrition/", params={"search": "süt"})
+
+    call("photos", "GET", "/api/gallery/photos", params={"user_id": user})
+    call("register", "POST", "/api/auth/register", json={"name": "Parite"})
+    call("login", "POST", "/api/auth/login", json={"device_id": "parity-device"})
+    return calls
+
+
+def worker(users: int, days: int):
+    from ..database import SQLALCHEMY_DATABASE_URL
+
+    if SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
+        reset_database()
+
+    from fastapi.testclient import TestClient
+
+    from ..api.main import app
+    from ..api.routes_names import seed_names
+    from ..core import synthetic
+    from ..core.schema import upgrade_database
+    from ..database import SessionLocal
+
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        seed_names(db)
+        synthetic.generate(db, users, days=days, seed=7, images=synthetic.dummy_images(2), now=SEED_NOW)
+    finally:
+        db.close()
+
+    results = []
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        calls = scenario(client, users)
+        elapsed = time.perf_counter() - started
+        for label, response in calls:
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+            results.append({"label": label, "status": response.status_code, "body": body})
+    print(json.dumps({"elapsed": elapsed, "calls": results}, ensure_ascii=False))
+
+
+# --- Comparison ---
+def mask(value, key=None):
+    if isinstance(value, dict):
+        return {k: mask(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [mask(v) for v in value]
+    if key and "token" in key:
+        return "<token>"
+    if isinstance(value, str) and DATETIME_RE.match(value):
+        try:
+            if datetime.fromisoformat(value.replace("Z", "")) > SEED_NOW:
+                return "<now>"
+        except ValueError:
+            pass
+    return value
+
+
+def sort_lists(value):
+    if isinstance(value, dict):
+        return {k: sort_lists(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return sorted((sort_lists(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+
+def run_backend(name: str, url: str, users: int, days: int, workdir: str) -> dict:
+    env = dict(os.environ, KOZA_DATABASE_URL=url,
+               PYTHONPATH=PACKAGE_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run(
+        [sys.executable, "-m", "koza_project.benchmarks.db_parity", "--worker", "--users", str(users), "--days", str(days)],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{name} run failed:\n{result.stderr[-3000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def first_difference(a, b, path="$"):
+    if type(a) is not type(b):
+        return f"{path}: {a!r} != {b!r}"
+    if isinstance(a, dict):
+        for k in sorted(set(a) | set(b)):
+            if k not in a or k not in b:
+                return f"{path}.{k}: only in {'sqlite' if k in a else 'postgresql'}"
+            diff = first_difference(a[k], b[k], f"{path}.{k}")
+            if diff:
+                return diff
+        return None
+    if isinstance(a, list):
+        if len(a) != len(b):
+            return f"{path}: {len(a)} vs {len(b)} items"
+        for i, (x, y) in enumerate(zip(a, b)):
+            diff = first_difference(x, y, f"{path}[{i}]")
+            if diff:
+                return diff
+        return None
+    return None if a == b else f"{path}: {a!r} != {b!r}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--postgres-url", default=os.getenv("KOZA_PARITY_POSTGRES_URL"),
+                        help="Scratch PostgreSQL database (default $KOZA_PARITY_POSTGRES_URL)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    # Throwaway databases: a random per-run token secret is fine (see check_auth_secret)
+    os.environ.setdefault("KOZA_DEV_SECRETS", "1")
+
+    if args.worker:
+        worker(args.users, args.days)
+        return
+    if not args.postgres_url:
+        parser.error("--postgres-url (or KOZA_PARITY_POSTGRES_URL) is required")
+
+    workdir = tempfile.mkdtemp(prefix="koza-parity-")
+    try:
+        sqlite = run_backend("sqlite", f"sqlite:///{os.path.join(workdir, 'koza.db')}", args.users, args.days, workdir)
+        postgres = run_backend("postgresql", args.postgres_url, args.users, args.days, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    failures = warnings = 0
+    for left, right in zip(sqlite["calls"], postgres["calls"]):
+        a = {"status": left["status"], "body": mask(left["body"])}
+        b = {"status": right["status"], "body": mask(right["body"])}
+        if a == b:
+            status, detail = "[PASS]", ""
+        elif sort_lists(a) == sort_lists(b):
+            status, detail = "[WARN]", " (same rows, different order)"
+            warnings += 1
+        else:
+            status, detail = "[FAIL]", f" {first_difference(a, b)}"
+            failures += 1
+        print(f"{status} {left['label']} ({left['status']}){detail}")
+
+    print(f"\n{len(sqlite['calls'])} calls: sqlite {sqlite['elapsed'] * 1000:.0f}ms, "
+          f"postgresql {postgres['elapsed'] * 1000:.0f}ms")
+    if failures:
+        print(f"[FAIL] {failures} response(s) differ between SQLite and PostgreSQL ({warnings} order-only)")
+        sys.exit(1)
+    print(f"[PASS] SQLite and PostgreSQL return the same responses ({warnings} order-only differences)")
+
+
+if __name__ == "__main__":
+    main()
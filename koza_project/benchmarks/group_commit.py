@@ -0,0 +1,124 @@
+"""
+Writes per second with and without the group-commit writer.
+
+Concurrent threads call the real write handlers (water log, kick session,
+weight log, comment like / helpful), one session per call, against a
+WAL SQLite file seeded by core.synthetic. Modes:
+  direct-normal: one commit per request, synchronous=NORMAL (pool default)
+  direct-full:   one commit per request, synchronous=FULL (fsync per commit)
+  group-commit:  core.group_commit batches, synchronous=FULL (fsync per batch)
+
+Usage:
+    python -m koza_project.benchmarks.group_commit --threads 32 --duration 5
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="koza-group-commit-")
+    os.chdir(workdir)  # sqlite:///./koza.db now points into the temp dir
+
+    from sqlalchemy import event, func, select
+
+    from ..api.routes_forum import like_comment, mark_helpful_comment
+    from ..api.routes_tools import (KickSessionRequest, WaterLogRequest, WeightLogRequest, log_water,
+                                    log_weight, save_kick_session)
+    from ..core import synthetic
+    from ..core.group_commit import group_commit
+    from ..database import Base, SessionLocal, engine
+    from ..models import all_models
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        synthetic.generate(db, args.users, days=3, images=synthetic.dummy_images(2))
+        comments = db.execute(select(func.max(all_models.ForumComment.id))).scalar()
+    finally:
+        db.close()
+
+    synchronous = {"value": "NORMAL"}
+
+    @event.listens_for(engine, "connect")
+    def set_synchronous(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA synchronous={synchronous['value']}")
+        cursor.close()
+
+    now = datetime.utcnow()
+    operations = [
+        lambda rng, db: log_water(WaterLogRequest(user_id=rng.randint(1, args.users), amount_ml=250), db=db),
+        lambda rng, db: save_kick_session(KickSessionRequest(
+            user_id=rng.randint(1, args.users), start_time=now, end_time=now + timedelta(minutes=12),
+            total_kicks=rng.randint(5, 20)), db=db),
+        lambda rng, db: log_weight(WeightLogRequest(user_id=rng.randint(1, args.users), weight_kg=68.5), db=db),
+        lambda rng, db: like_comment(comment_id=rng.randint(1, comments), db=db),
+        lambda rng, db: mark_helpful_comment(comment_id=rng.randint(1, comments), db=db),
+    ]
+    # Tracker writes dominate the evening peak
+    weights = [50, 10, 10, 20, 10]
+
+    def run() -> tuple:
+        latencies = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.duration
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local = []
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                session = SessionLocal()
+                try:
+                    rng.choices(operations, weights)[0](rng, session)
+                finally:
+                    session.close()
+                local.append((time.perf_counter() - started) * 1000)
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        latencies.sort()
+        return len(latencies) / (time.perf_counter() - started), latencies
+
+    try:
+        print(f"{args.threads} threads, {args.duration:.0f}s per mode")
+        for mode in ("direct-normal", "direct-full", "group-commit"):
+            synchronous["value"] = "NORMAL" if mode == "direct-normal" else "FULL"
+            engine.dispose()
+            if mode == "group-commit":
+                group_commit.start()
+            batches, statements = group_commit.batches, group_commit.statements
+            rate, latencies = run()
+            extra = ""
+            if mode == "group-commit":
+                group_commit.stop()
+                n = group_commit.batches - batches
+                extra = f", {(group_commit.statements - statements) / max(1, n):.1f} statements/commit"
+            p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+            print(f"{mode:<14} {rate:8,.0f} writes/s  p50 {p(0.5):6.2f}ms  p99 {p(0.99):6.2f}ms{extra}")
+    finally:
+        engine.dispose()
+        os.chdir(tempfile.gettempdir())
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Cold start budget: import time of the API module and lifespan startup time.
+
+Each run is a fresh interpreter in a temp directory (new SQLite file):
+  import:  python -X importtime -c "import koza_project.api.main"
+  startup: import + the app's lifespan startup (migrations, seeding, caches),
+           i.e. the time until /health/ready would answer 200
+Prints the medians, the slowest modules by cumulative import time and the
+project's own modules, then [PASS]/[FAIL] against the budgets.
+
+Usage:
+    python -m koza_project.benchmarks.import_time --runs 5 --import-budget-ms 1000 --startup-budget-ms 2000
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+STARTUP_SCRIPT = """
+import asyncio, json, time
+started = time.perf_counter()
+from koza_project.api import main
+imported = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        print(json.dumps({"import_ms": (imported - started) * 1000, "startup_ms": (ready - started) * 1000,
+                          "steps_ms": main.startup_state["timings_ms"]}))
+
+asyncio.run(run())
+"""
+
+
+def run_python(args, workdir: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run([sys.executable, *args], cwd=workdir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"python {' '.join(args[:2])} failed:\n{result.stderr[-2000:]}")
+    return result
+
+
+def parse_importtime(stderr: str) -> dict:
+    """module -> (self_us, cumulative_us, depth)"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--import-budget-ms", type=float, default=1000)
+    parser.add_argument("--startup-budget-ms", type=float, default=2000)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+    # Throwaway databases: a random per-run token secret is fine (see check_auth_secret)
+    os.environ.setdefault("KOZA_DEV_SECRETS", "1")
+
+    import_ms, startup_ms, profiles, steps = [], [], [], []
+    for _ in range(args.runs):
+        workdir = tempfile.mkdtemp(prefix="koza-import-time-")
+        try:
+            profile = run_python(["-X", "importtime", "-c", "import koza_project.api.main"], workdir)
+            profiles.append(parse_importtime(profile.stderr))
+            # Separate interpreter: -X importtime itself slows imports down
+            timing = json.loads(run_python(["-c", STARTUP_SCRIPT], workdir).stdout.strip().splitlines()[-1])
+            import_ms.append(timing["import_ms"])
+            startup_ms.append(timing["startup_ms"])
+            steps.append(timing["steps_ms"])
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # Median per module over the profiled runs
+    names = set.intersection(*(set(p) for p in profiles))
+    median = {n: (statistics.median(p[n][0] for p in profiles) / 1000,
+                  statistics.median(p[n][1] for p in profiles) / 1000) for n in names}
+
+    print(f"Slowest imports (cumulative ms, median of {args.runs}):")
+    for name, (self_ms, cumulative_ms) in sorted(median.items(), key=lambda i: -i[1][1])[:args.top]:
+        print(f"  {cumulative_ms:8.1f}  {self_ms:7.1f} self  {name}")
+    print("Project modules:")
+    for name, (self_ms, cumulative_ms) in sorted(median.items(), key=lambda i: -i[1][1]):
+        if name.startswith("koza_project"):
+            print(f"  {cumulative_ms:8.1f}  {self_ms:7.1f} self  {name}")
+    print("Lifespan steps (ms, last run): " + ", ".join(f"{k} {v:.0f}" for k, v in steps[-1].items()))
+
+    results = {
+        "import_ms": statistics.median(import_ms),
+        "startup_ms": statistics.median(startup_ms),
+        "steps_ms": steps[-1],
+        "slowest_imports_ms": {n: round(c, 1) for n, (_, c) in sorted(median.items(), key=lambda i: -i[1][1])[:args.top]},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {os.path.abspath(args.output)}")
+
+    failed = False
+    for label, value, budget in (("import", results["import_ms"], args.import_budget_ms),
+                                 ("startup", results["startup_ms"], args.startup_budget_ms)):
+        ok = value <= budget
+        failed |= not ok
+        print(f"{'[PASS]' if ok else '[FAIL]'} {label}: {value:.0f}ms (budget {budget:.0f}ms)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Async load test with latency regression checks (replaces the fixed 200ms checks of preflight_checklist.py).
+
+Virtual users run weighted, realistic scenarios concurrently against the API:
+home screen, forum browsing, forum posting, water logging, name/nutrition
+search and image uploads. Reports p50/p95/p99 latency and throughput per
+route, can save the results as JSON, and can compare them with an earlier
+run (exits with status 1 on a regression).
+
+Without --base-url the API is started in-process (uvicorn) on a throwaway
+SQLite database in a temp directory, seeded by core.synthetic.
+
+Usage:
+    python -m koza_project.benchmarks.load_test --users 2000 --days 30 \\
+        --concurrency 32 --duration 30 --output baseline.json
+    python -m koza_project.benchmarks.load_test --baseline baseline.json
+    python -m koza_project.benchmarks.load_test --base-url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import httpx
+
+CATEGORIES = ["Hamilelik Günlüğü", "Beslenme", "Doğum Hazırlıkları", "Bebek Bakımı", "Dertleşme Köşesi"]
+WORDS = ["bebek", "hamilelik", "hafta", "doktor", "kontrol", "bulantı", "tekme", "su", "uyku", "beslenme",
+         "vitamin", "ultrason", "doğum", "çanta", "anne", "baba", "isim", "kilo", "yürüyüş", "mutlu"]
+NAME_QUERIES = ["ay", "de", "gunes", "elif", "can", "zeynep", "yusuf", "deniz", "ali", "mira"]
+FOOD_QUERIES = ["peynir", "balık", "sushi", "kahve", "yumurta", "süt", "elma", "ıspanak"]
+
+# Relative frequency of each scenario per virtual-user iteration
+SCENARIO_WEIGHTS = {
+    "home": 30,
+    "forum_browse": 25,
+    "forum_post": 8,
+    "water": 20,
+    "search": 12,
+    "upload": 5,
+}
+# A route regresses only if it is slower by this fraction AND by at least MIN_DELTA_MS
+DEFAULT_TOLERANCE = 0.25
+MIN_DELTA_MS = 5.0
+# Tail percentiles of small samples are noise: compare p95 / p99 only above these counts
+MIN_SAMPLES = {"p95_ms": 50, "p99_ms": 200}
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def fake_png(seed: int) -> bytes:
+    # Only the signature is checked; a few variants keep uploads deduplicated
+    return b"\x89PNG\r\n\x1a\n" + random.Random(seed).randbytes(8 * 1024)
+
+
+def start_local_server(users: int, days: int, seed: int):
+    """
+    Starts the app with uvicorn in a background thread on a temp database
+    filled by core.synthetic. Returns (base_url, stop).
+    """
+    import uvicorn
+
+    workdir = tempfile.mkdtemp(prefix="koza-load-")
+    os.chdir(workdir)  # sqlite:///./koza.db now points into the temp dir
+
+    from ..api.main import app
+    from ..api.routes_names import seed_names
+    from ..core import synthetic
+    from ..core.schema import upgrade_database
+    from ..database import SessionLocal
+    from ..models import all_models
+
+    upgrade_database()  # the app's lifespan would too, but seeding comes first
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        seed_names(db)
+        counts = synthetic.generate(db, users, days, seed)
+        seeded = {sha for (sha,) in db.query(all_models.StoredBlob.sha256)}
+        print(f"Seeded {sum(counts.values()):,} rows ({users} users, {counts['forum_posts']} posts) "
+              f"in {time.perf_counter() - started:.1f}s ({workdir})")
+    finally:
+        db.close()
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit("Server failed to start")
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=10)
+        _remove_uploaded_blobs(seeded)
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+def _remove_uploaded_blobs(seeded):
+    # Uploads land in the real storage backend; the temp DB knows which ones
+    # (the seeded dummy photos may be real files from a `synthetic --images` run: kept)
+    from ..core import blobstore
+    from ..core.storage import get_storage
+    from ..database import SessionLocal
+    from ..models import all_models
+
+    db = SessionLocal()
+    try:
+        for sha, ext in db.query(all_models.StoredBlob.sha256, all_models.StoredBlob.ext):
+            if sha in seeded:
+                continue
+            get_storage().delete_prefix(blobstore.blob_key(sha, ext))
+    finally:
+        db.close()
+
+
+# --- Load generation ---
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def record(self, route: str, ms: float, status: int):
+        self.latencies[route].append(ms)
+        self.statuses[route][status] += 1
+        if status >= 500 or status == 0:
+            self.errors[route] += 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, user_id: int, token: str,
+                 post_ids, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.user_id = user_id
+        self.headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "br, gzip"}
+        self.post_ids = post_ids
+        self.rng = rng
+
+    async def call(self, method: str, url: str, route: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            await response.aread()
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        self.recorder.record(f"{method} {route}", (time.perf_counter() - started) * 1000, status)
+        return response
+
+    # --- Scenarios ---
+    async def home(self):
+        uid = self.user_id
+        profile = await self.call("GET", f"/api/pregnancy/profile/{uid}", "/api/pregnancy/profile/{user_id}")
+        lmp = (profile.json().get("last_period_date") if profile is not None and profile.status_code == 200 else None) \
+            or (date.today() - timedelta(days=100)).isoformat()
+        calc = await self.call("POST", "/api/pregnancy/calculate", "/api/pregnancy/calculate", json={"lmp_date": lmp})
+        week = calc.json().get("current_week", 12) if calc is not None and calc.status_code == 200 else 12
+        await self.call("GET", f"/api/pregnancy/development/{week}", "/api/pregnancy/development/{week}")
+        await self.call("GET", f"/api/tools/water/today?user_id={uid}", "/api/tools/water/today")
+
+    async def forum_browse(self):
+        category = self.rng.choice(CATEGORIES)
+        await self.call("GET", "/api/forum/posts", "/api/forum/posts?category", params={"category": category})
+        for _ in range(self.rng.randint(1, 3)):
+            post_id = self.rng.choice(self.post_ids)
+            await self.call("GET", f"/api/forum/posts/{post_id}/comments", "/api/forum/posts/{post_id}/comments")
+
+    async def forum_post(self):
+        if self.rng.random() < 0.3:
+            await self.call("POST", "/api/forum/posts", "/api/forum/posts", json={
+                "title": sentence(self.rng, 4), "content": sentence(self.rng, 25),
+                "user_id": self.user_id, "category_id": self.rng.choice(CATEGORIES)})
+        else:
+            await self.call("POST", "/api/forum/comments", "/api/forum/comments", json={
+                "user_id": self.user_id, "post_id": self.rng.choice(self.post_ids),
+                "content": sentence(self.rng, 10)})
+
+    async def water(self):
+        await self.call("POST", "/api/tools/water", "/api/tools/water",
+                        json={"user_id": self.user_id, "amount_ml": self.rng.choice([200, 250, 500])})
+        await self.call("GET", f"/api/tools/water/today?user_id={self.user_id}", "/api/tools/water/today")
+
+    async def search(self):
+        if self.rng.random() < 0.5:
+            await self.call("GET", "/api/names/", "/api/names/",
+                            params={"user_id": self.user_id, "search": self.rng.choice(NAME_QUERIES)})
+        else:
+            await self.call("GET", "/api/nutrition/", "/api/nutrition/",
+                            params={"search": self.rng.choice(FOOD_QUERIES)})
+
+    async def upload(self):
+        body = fake_png(self.rng.randrange(8))
+        await self.call("POST", "/api/upload-image", "/api/upload-image",
+                        files={"file": ("photo.png", body, "image/png")})
+
+    async def run(self, deadline: float, remaining: list):
+        scenarios = list(SCENARIO_WEIGHTS)
+        weights = [SCENARIO_WEIGHTS[s] for s in scenarios]
+        while time.perf_counter() < deadline and remaining[0] > 0:
+            remaining[0] -= 1
+            await getattr(self, self.rng.choices(scenarios, weights)[0])()
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, iterations: int, seed: int):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        accounts = []
+        for i in range(concurrency):
+            r = await client.post("/api/auth/register", json={"name": f"Yük Testi {i}"})
+            r.raise_for_status()
+            accounts.append((r.json()["user_id"], r.json()["access_token"]))
+        posts = (await client.get("/api/forum/posts")).json()
+        post_ids = [p["id"] for p in posts] or [1]
+
+        users = [VirtualUser(client, recorder, uid, token, post_ids, random.Random(seed + n))
+                 for n, (uid, token) in enumerate(accounts)]
+        remaining = [iterations if iterations else float("inf")]
+        started = time.perf_counter()
+        await asyncio.gather(*(u.run(started + duration, remaining) for u in users))
+        elapsed = time.perf_counter() - started
+    return recorder, elapsed
+
+
+# --- Reporting ---
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    routes = {}
+    total = 0
+    for route, values in sorted(recorder.latencies.items()):
+        values.sort()
+        total += len(values)
+        routes[route] = {
+            "count": len(values),
+            "errors": recorder.errors[route],
+            "statuses": {str(k): v for k, v in sorted(recorder.statuses[route].items())},
+            "p50_ms": round(percentile(values, 0.50), 2),
+            "p95_ms": round(percentile(values, 0.95), 2),
+            "p99_ms": round(percentile(values, 0.99), 2),
+            "rps": round(len(values) / elapsed, 2),
+        }
+    return {
+        "total": {"requests": total, "errors": sum(recorder.errors.values()),
+                  "seconds": round(elapsed, 2), "rps": round(total / elapsed, 2)},
+        "routes": routes,
+    }
+
+
+def print_report(results: dict):
+    print(f"\n{'route':<48} {'count':>7} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8}")
+    for route, r in results["routes"].items():
+        print(f"{route:<48} {r['count']:>7} {r['errors']:>5} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>6.1f}ms "
+              f"{r['p99_ms']:>6.1f}ms {r['rps']:>8.1f}")
+    t = results["total"]
+    print(f"\n{t['requests']} requests in {t['seconds']}s: {t['rps']} req/s, {t['errors']} errors")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns a list of regression messages (empty when within tolerance)."""
+    problems = []
+    for route, base in baseline["routes"].items():
+        current = results["routes"].get(route)
+        if current is None:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if min(base["count"], current["count"]) < MIN_SAMPLES[key]:
+                continue
+            old, new = base[key], current[key]
+            if new > old * (1 + tolerance) and new - old >= MIN_DELTA_MS:
+                problems.append(f"{route} {key[:3]}: {old:.1f}ms -> {new:.1f}ms")
+        old_rate = base["errors"] / max(1, base["count"])
+        new_rate = current["errors"] / max(1, current["count"])
+        if new_rate > old_rate + 0.01:
+            problems.append(f"{route} error rate: {old_rate:.1%} -> {new_rate:.1%}")
+    old_rps, new_rps = baseline["total"]["rps"], results["total"]["rps"]
+    if new_rps < old_rps * (1 - tolerance):
+        problems.append(f"throughput: {old_rps:.1f} -> {new_rps:.1f} req/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Test a running server instead of an in-process one")
+    parser.add_argument("--users", type=int, default=200, help="Seeded users (in-process only)")
+    parser.add_argument("--days", type=int, default=30, help="Days of seeded tracker history (in-process only)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run")
+    parser.add_argument("--iterations", type=int, default=0, help="Stop after this many scenarios (0: duration only)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON (use as a later --baseline)")
+    parser.add_argument("--baseline", help="Fail if p95/p99, errors or throughput regress against this JSON")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+    # Throwaway databases: a random per-run token secret is fine (see check_auth_secret)
+    os.environ.setdefault("KOZA_DEV_SECRETS", "1")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    output = os.path.abspath(args.output) if args.output else None
+
+    stop = None
+    base_url = args.base_url
+    if not base_url:
+        base_url, stop = start_local_server(args.users, args.days, args.seed)
+    try:
+        recorder, elapsed = asyncio.run(run_load(base_url, args.concurrency, args.duration, args.iterations, args.seed))
+    finally:
+        if stop:
+            stop()
+
+    results = summarize(recorder, elapsed)
+    results["config"] = {
+        "base_url": args.base_url or "in-process", "users": args.users, "days": args.days,
+        "concurrency": args.concurrency, "duration": args.duration, "seed": args.seed,
+        "run_at": datetime.utcnow().isoformat(timespec="seconds"),
+    }
+    print_report(results)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {output}")
+
+    if baseline:
+        problems = compare(results, baseline, args.tolerance)
+        if problems:
+            print(f"\n[FAIL]: regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for p in problems:
+                print(f"  - {p}")
+            sys.exit(1)
+        print(f"\n[PASS]: within {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
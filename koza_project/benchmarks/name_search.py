@@ -0,0 +1,88 @@
+"""
+Fuzzy baby-name search benchmark.
+
+Builds the in-memory NameIndex over a synthetic Turkish-looking corpus and
+times fuzzy queries (diacritics missing, typos, meaning words).
+Exits with status 1 if p95 latency is above the budget.
+
+Usage:
+    python -m koza_project.benchmarks.name_search --names 100000 --budget-ms 5
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from ..core.names import NameIndex, fold_diacritics
+
+SYLLABLES = ["ay", "şe", "gü", "neş", "rüz", "gar", "de", "fne", "ze", "ynep", "ke", "rem",
+             "al", "ya", "to", "prak", "ça", "ğla", "öz", "ge", "ıl", "dız", "se", "lin", "mi", "ray"]
+MEANING_WORDS = ["değerli", "güzel", "yiğit", "kahraman", "güneş", "ışık", "deniz", "rüzgar",
+                 "toprak", "yıldız", "çiçek", "umut", "sevgi", "bereketli", "asil", "gök"]
+
+
+def synthetic_entries(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        meaning = " ".join(rng.choice(MEANING_WORDS) for _ in range(rng.randint(2, 6))) + "."
+        yield (i, name, rng.choice("KEU"), meaning)
+
+
+def make_queries(entries, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        _, name, _, meaning = rng.choice(entries)
+        kind = rng.random()
+        if kind < 0.5:
+            queries.append(fold_diacritics(name))  # "gunes" for "Güneş"
+        elif kind < 0.8:
+            folded = fold_diacritics(name)
+            pos = rng.randrange(len(folded))
+            queries.append(folded[:pos] + folded[pos + 1:])  # one dropped letter
+        else:
+            queries.append(fold_diacritics(rng.choice(meaning.split())))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--budget-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    entries = list(synthetic_entries(args.names))
+    start = time.perf_counter()
+    index = NameIndex(entries)
+    build_s = time.perf_counter() - start
+    print(f"Built index over {len(index)} names in {build_s:.2f}s")
+
+    queries = make_queries(entries, args.queries)
+    for q in queries[:20]:  # warmup
+        index.fuzzy.search(q)
+
+    timings = []
+    empty = 0
+    for q in queries:
+        t = time.perf_counter()
+        results = index.fuzzy.search(q)
+        timings.append((time.perf_counter() - t) * 1000)
+        if not results:
+            empty += 1
+
+    timings.sort()
+    p50 = statistics.median(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{len(queries)} queries: p50={p50:.2f}ms p95={p95:.2f}ms max={timings[-1]:.2f}ms, no results: {empty}")
+
+    if p95 > args.budget_ms:
+        print(f"[FAIL]: p95 {p95:.2f}ms is over the {args.budget_ms}ms budget")
+        sys.exit(1)
+    print(f"[PASS]: p95 within the {args.budget_ms}ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+EXPLAIN QUERY PLAN check for the hot-path queries.
+
+First upgrades a database built before migrations existed (the 0001 schema
+without alembic_version, with duplicate favorites) to the head revision.
+Then migrates a temp SQLite file to the latest revision (core.schema), seeds it
+with core.synthetic, then calls the real handlers (water/kick/weight trackers,
+forum feed and comments, badge update, gallery, favorites, profile, block
+check, data export, delta sync, timeline, reminder window) and records every SELECT they send. Each
+statement is explained with its own parameters; a full table scan
+("SCAN <table>") fails the check, a temp B-tree for ORDER BY / GROUP BY is
+reported as a warning.
+
+Usage:
+    python -m koza_project.benchmarks.query_plans --users 500
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+
+def check_baseline_upgrade(workdir: str) -> bool:
+    """A pre-migration database is stamped 0001 and upgraded in place to head."""
+    from alembic import command
+    from sqlalchemy import create_engine, inspect
+
+    from ..core.schema import BASELINE_REVISION, alembic_config, head_revision, upgrade_database
+
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'baseline.db')}")
+    try:
+        with engine.begin() as connection:
+            command.upgrade(alembic_config(connection), BASELINE_REVISION)
+            connection.exec_driver_sql("DROP TABLE alembic_version")
+            connection.exec_driver_sql("INSERT INTO users (id, name) VALUES (1, 'a')")
+            connection.exec_driver_sql("INSERT INTO baby_names (id, name) VALUES (1, 'b')")
+            connection.exec_driver_sql("INSERT INTO favorite_names (user_id, baby_name_id) VALUES (1, 1), (1, 1)")
+        revision = upgrade_database(engine)
+        with engine.connect() as connection:
+            favorites = connection.exec_driver_sql("SELECT COUNT(*) FROM favorite_names").scalar()
+            tables = set(inspect(connection).get_table_names())
+        ok = revision == head_revision() and favorites == 1 and {"appointments", "stored_blobs"} <= tables
+        print(f"{'[PASS]' if ok else '[FAIL]'} pre-migration database upgraded to {revision} "
+              f"(favorites after dedupe: {favorites})")
+        return ok
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=14)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="koza-query-plans-")
+    os.chdir(workdir)  # sqlite:///./koza.db now points into the temp dir
+
+    from sqlalchemy import event, func, select
+
+    from ..api.routes_forum import ForumCategory, block_user, get_comments, get_posts, update_user_badge
+    from ..api.routes_gallery import get_photos
+    from ..api.routes_names import get_favorite_ids, seed_names
+    from ..api.routes_pregnancy import get_user_profile
+    from ..api.routes_tools import (export_user_data, get_daily_water_total, get_kick_history,
+                                    get_weight_history)
+    from ..core import synthetic
+    from ..core.schema import upgrade_database
+    from ..core.reminders import ReminderScheduler
+    from ..core.sync import collect_changes
+    from ..core.timeline import collect_timeline
+    from ..database import SessionLocal, engine
+    from ..models import all_models
+
+    failures = 0
+    try:
+        failures += not check_baseline_upgrade(workdir)
+        print(f"Migrated to revision {upgrade_database()}")
+        db = SessionLocal()
+        try:
+            seed_names(db)
+            synthetic.generate(db, args.users, days=args.days, images=synthetic.dummy_images(2))
+            # The busiest author and post: worst case for the per-user / per-post lookups
+            Post, Comment = all_models.ForumPost, all_models.ForumComment
+            user_id = db.execute(select(Post.author_id).group_by(Post.author_id)
+                                 .order_by(func.count().desc()).limit(1)).scalar()
+            post_id = db.execute(select(Comment.post_id).group_by(Comment.post_id)
+                                 .order_by(func.count().desc()).limit(1)).scalar()
+        finally:
+            db.close()
+
+        checks = [
+            ("water today", lambda db: get_daily_water_total(user_id, db=db)),
+            ("kick history", lambda db: get_kick_history(user_id, db=db)),
+            ("weight history", lambda db: get_weight_history(user_id, db=db)),
+            ("forum by category", lambda db: get_posts(category=ForumCategory.NUTRITION, q=None, author_id=None, db=db)),
+            ("forum by author", lambda db: get_posts(category=None, q=None, author_id=user_id, db=db)),
+            ("post comments", lambda db: get_comments(post_id, db=db)),
+            ("badge update", lambda db: update_user_badge(user_id, db)),
+            ("photos", lambda db: get_photos(user_id, db=db)),
+            ("favorite names", lambda db: get_favorite_ids(db, user_id)),
+            ("profile", lambda db: get_user_profile(user_id, db=db)),
+            ("block check", lambda db: block_user(user_id + 1, current_user_id=user_id, db=db)),
+            ("data export", lambda db: export_user_data(user_id, db=db)),
+            ("full sync", lambda db: collect_changes(db, user_id)),
+            ("delta sync", lambda db: collect_changes(db, user_id, collect_changes(db, user_id)["cursor"])),
+            ("timeline", lambda db: collect_timeline(db, user_id)),
+            ("timeline next page", lambda db: collect_timeline(db, user_id, collect_timeline(db, user_id)["cursor"])),
+            ("reminder window", lambda db: ReminderScheduler(session_factory=lambda: db)._fetch_window(datetime.utcnow())),
+        ]
+
+        captured = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and not executemany:
+                captured.append((statement, parameters))
+
+        with engine.connect() as conn:
+            for name, call in checks:
+                captured.clear()
+                db = SessionLocal()
+                try:
+                    call(db)
+                finally:
+                    db.close()
+                statements = list(captured)
+                captured.clear()  # the EXPLAINs below are SELECTs too
+                for statement, parameters in statements:
+                    plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                    scans = [d for d in plan if d.startswith("SCAN ")]
+                    temp = [d for d in plan if "TEMP B-TREE" in d]
+                    status = "[FAIL]" if scans else "[WARN]" if temp else "[PASS]"
+                    failures += bool(scans)
+                    print(f"{status} {name}: {' | '.join(plan)}")
+                    if scans:
+                        print(f"       {' '.join(statement.split())}")
+    finally:
+        engine.dispose()
+        os.chdir(tempfile.gettempdir())
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if failures:
+        print(f"[FAIL] {failures} check(s) failed (pre-migration upgrade or whole table scans)")
+        sys.exit(1)
+    print("[PASS] Every hot-path statement uses an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+JSON serialization micro-benchmark for list endpoints.
+
+Compares the previous path (ORM instances -> Pydantic models / dicts ->
+jsonable_encoder -> json.dumps, i.e. FastAPI's default JSONResponse) with the
+current one (Core row tuples -> dicts -> FastJSONResponse/orjson) for
+a 1,000-post forum feed and a 1,000-row weight history.
+Uses an in-memory SQLite database.
+
+Usage:
+    python -m koza_project.benchmarks.serialization --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from ..api.responses import FastJSONResponse, orjson, rows_to_dicts
+from ..api.routes_forum import PostResponse, get_posts
+from ..database import Base
+from ..models import all_models
+
+
+def seed(db, rows: int):
+    db.execute(insert(all_models.User), [{"id": i, "name": f"Anne {i}", "badge": "Yeni Anne"} for i in range(1, 51)])
+    now = datetime(2026, 1, 1)
+    db.execute(insert(all_models.ForumPost), [{
+        "title": f"Konu {i}", "content": "Merhaba anneler, bugün bebeğim çok hareketli! " * 4,
+        "category": "Hamilelik Günlüğü", "author_id": i % 50 + 1, "created_at": now + timedelta(minutes=i)
+    } for i in range(rows)])
+    db.execute(insert(all_models.WeightLog), [{
+        "user_id": 1, "weight_kg": 60 + i / 100, "week_no": i % 40, "date": date(2024, 1, 1) + timedelta(days=i)
+    } for i in range(rows)])
+    db.commit()
+
+
+def legacy_render(content) -> bytes:
+    # What FastAPI's JSONResponse did with the endpoint's return value
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def legacy_posts(db) -> bytes:
+    posts = db.query(all_models.ForumPost).all()
+    authors = {u.id: u for u in db.query(all_models.User).all()}
+    return legacy_render([PostResponse(
+        id=p.id, title=p.title, content=p.content, author_id=p.author_id,
+        author_name=authors[p.author_id].name, author_badge=authors[p.author_id].badge,
+        category_id=p.category, created_at=p.created_at
+    ) for p in posts])
+
+
+def core_posts(db) -> bytes:
+    return get_posts(category=None, q=None, author_id=None, db=db).body
+
+
+def legacy_weights(db) -> bytes:
+    logs = db.query(all_models.WeightLog).filter(all_models.WeightLog.user_id == 1).order_by(all_models.WeightLog.date).all()
+    return legacy_render([{"id": l.id, "date": l.date, "weight": l.weight_kg, "week": l.week_no} for l in logs])
+
+
+def core_weights(db) -> bytes:
+    W = all_models.WeightLog
+    rows = db.execute(select(W.id, W.date, W.weight_kg.label("weight"), W.week_no.label("week"))
+                      .where(W.user_id == 1).order_by(W.date))
+    return FastJSONResponse(rows_to_dicts(rows)).body
+
+
+def measure(fn, db, repeat: int) -> float:
+    fn(db)  # warmup
+    timings = []
+    for _ in range(repeat):
+        db.expire_all()
+        t = time.perf_counter()
+        fn(db)
+        timings.append((time.perf_counter() - t) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.rows)
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'stdlib json (orjson not installed)'}")
+    for label, legacy, current in (("forum feed", legacy_posts, core_posts), ("weight history", legacy_weights, core_weights)):
+        assert json.loads(legacy(db)) == json.loads(current(db)), f"{label}: payloads differ"
+        old_ms = measure(legacy, db, args.repeat)
+        new_ms = measure(current, db, args.repeat)
+        print(f"{label} ({args.rows} rows): ORM+jsonable_encoder {old_ms:.2f}ms -> Core+FastJSONResponse "
+              f"{new_ms:.2f}ms ({old_ms / new_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Mixed read/write SQLite benchmark: default engine vs the tuned configuration.
+
+Seeds one database file with core.synthetic and copies it per configuration:
+  default: create_engine(url, check_same_thread=False), rollback journal, one pool
+  tuned:   database.create_sqlite_engine (WAL, synchronous=NORMAL, busy_timeout,
+           mmap, cache) with a write pool and a read-only (query_only) pool
+Reader threads call the real GET handlers (forum feed, comments, today's water
+total), writer threads the real write handlers (water log, comment like), one
+session per call. Reports ops/s, p50/p95/p99 per operation and
+"database is locked" errors.
+
+Usage:
+    python -m koza_project.benchmarks.sqlite_concurrency --users 2000 --readers 8 --writers 2 --duration 10
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from ..api.routes_forum import ForumCategory, get_comments, get_posts, like_comment
+from ..api.routes_tools import WaterLogRequest, get_daily_water_total, log_water
+from ..core import synthetic
+from ..database import Base, READ_POOL_SIZE, WRITE_POOL_SIZE, create_sqlite_engine
+from ..models import all_models
+
+
+def seed_file(path: str, users: int, days: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        counts = synthetic.generate(db, users, days, images=synthetic.dummy_images(4))
+        comments = db.execute(select(func.max(all_models.ForumComment.id))).scalar()
+    finally:
+        db.close()
+        engine.dispose()
+    return counts, comments
+
+
+def configurations(path: str):
+    url = f"sqlite:///{path}"
+    default = create_engine(url, connect_args={"check_same_thread": False})
+    yield "default", sessionmaker(bind=default), sessionmaker(bind=default), [default]
+    writer = create_sqlite_engine(url)
+    reader = create_sqlite_engine(url, readonly=True, pool_size=READ_POOL_SIZE)
+    yield "tuned", sessionmaker(bind=reader), sessionmaker(bind=writer), [writer, reader]
+
+
+def run(read_session, write_session, users: int, comments: int, readers: int, writers: int, duration: float):
+    latencies = defaultdict(list)
+    locked = defaultdict(int)
+    lock = threading.Lock()
+    categories = list(ForumCategory)
+    deadline = time.perf_counter() + duration
+
+    read_ops = {
+        "feed": lambda rng, db: get_posts(category=rng.choice(categories), q=None, author_id=None, db=db),
+        "comments": lambda rng, db: get_comments(post_id=rng.randint(1, 500), db=db),
+        "water_today": lambda rng, db: get_daily_water_total(user_id=rng.randint(1, users), db=db),
+    }
+    write_ops = {
+        "water_log": lambda rng, db: log_water(WaterLogRequest(user_id=rng.randint(1, users), amount_ml=250), db=db),
+        "like": lambda rng, db: like_comment(comment_id=rng.randint(1, comments), db=db),
+    }
+
+    def worker(seed: int, ops: dict, session_factory):
+        rng = random.Random(seed)
+        names = list(ops)
+        local = defaultdict(list)
+        local_locked = defaultdict(int)
+        while time.perf_counter() < deadline:
+            name = rng.choice(names)
+            started = time.perf_counter()
+            db = session_factory()
+            try:
+                ops[name](rng, db)
+                local[name].append((time.perf_counter() - started) * 1000)
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                db.rollback()
+                local_locked[name] += 1
+            finally:
+                db.close()
+        with lock:
+            for name, values in local.items():
+                latencies[name].extend(values)
+            for name, n in local_locked.items():
+                locked[name] += n
+
+    threads = [threading.Thread(target=worker, args=(i, read_ops, read_session)) for i in range(readers)]
+    threads += [threading.Thread(target=worker, args=(1000 + i, write_ops, write_session)) for i in range(writers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, locked, time.perf_counter() - started
+
+
+def pct(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="koza-sqlite-")
+    try:
+        seed_path = os.path.join(workdir, "seed.db")
+        counts, comments = seed_file(seed_path, args.users, args.days)
+        print(f"Seeded {sum(counts.values()):,} rows; {args.readers} readers + {args.writers} writers, "
+              f"{args.duration:.0f}s each (write pool {WRITE_POOL_SIZE}, read pool {READ_POOL_SIZE})")
+
+        for label, read_session, write_session, engines in configurations(os.path.join(workdir, "bench.db")):
+            shutil.copy(seed_path, os.path.join(workdir, "bench.db"))
+            latencies, locked, elapsed = run(read_session, write_session, args.users, comments,
+                                             args.readers, args.writers, args.duration)
+            for engine in engines:
+                engine.dispose()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(os.path.join(workdir, "bench.db" + suffix)):
+                    os.remove(os.path.join(workdir, "bench.db" + suffix))
+
+            reads = sum(len(latencies[n]) for n in ("feed", "comments", "water_today"))
+            writes = sum(len(latencies[n]) for n in ("water_log", "like"))
+            print(f"\n[{label}] reads {reads / elapsed:,.0f}/s, writes {writes / elapsed:,.0f}/s, "
+                  f"'database is locked': {sum(locked.values())}")
+            for name in ("feed", "comments", "water_today", "water_log", "like"):
+                values = latencies[name]
+                print(f"  {name:<12} n={len(values):>6}  p50 {pct(values, 0.5):7.2f}ms  p95 {pct(values, 0.95):7.2f}ms  "
+                      f"p99 {pct(values, 0.99):7.2f}ms  locked {locked[name]}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Idle connection capacity of the SSE feed (/api/events/stream) per worker.
+
+Starts one uvicorn worker on a throwaway SQLite database, opens --connections
+idle SSE streams with raw asyncio sockets (all forum categories, plus the
+notification channel of a different user per stream, authenticated with a
+token signed with a shared KOZA_AUTH_SECRET), then reports:
+  - server memory per idle connection (VmRSS growth / connections)
+  - fan-out: time until every stream received one new forum post
+  - koza_event_subscribers from /metrics (every stream registered)
+and prints [PASS]/[FAIL] against the budgets. Linux only (reads /proc);
+raises the open-file limit as far as it is allowed to.
+
+Usage:
+    python -m koza_project.benchmarks.sse_connections --connections 20000 \\
+        --max-kb-per-connection 64 --max-fanout-ms 3000
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import resource
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# File descriptors the server needs besides the streams (listen socket, SQLite files, pools)
+FD_RESERVE = 256
+CONNECT_CONCURRENCY = 500
+
+
+def raise_fd_limit(wanted: int) -> int:
+    """Raises RLIMIT_NOFILE (inherited by the server process); returns the soft limit reached."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    for limit in (max(wanted, hard), hard):
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, limit), limit))
+            break
+        except (ValueError, OSError):
+            continue
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmRSS not found")
+
+
+def http(method: str, url: str, payload: dict = None) -> bytes:
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def start_server(workdir: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "koza_project.api.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log", "--backlog", "4096"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            http("GET", f"http://127.0.0.1:{port}/health/ready")
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited:\n{server.stderr.read().decode()[-2000:]}")
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not become ready")
+
+
+class Stream:
+    """One idle SSE client: connects, then waits for `event: post`."""
+
+    def __init__(self, port: int, token: str):
+        self.port = port
+        self.token = token
+        self.writer = None
+        self.received_at = None
+
+    async def connect(self):
+        reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.writer.write(f"GET /api/events/stream?access_token={self.token} HTTP/1.1\r\n"
+                          f"Host: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await self.writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        if not head.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(head.decode(errors="replace").splitlines()[0])
+        return reader
+
+    async def listen(self, reader):
+        buffer = b""
+        while self.received_at is None:
+            chunk = await reader.read(4096)
+            if not chunk:
+                return
+            buffer = (buffer + chunk)[-256:]
+            if b"event: post" in buffer:
+                self.received_at = time.perf_counter()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run(port: int, server_pid: int, connections: int, settle: float):
+    from ..core.tokens import issue_token  # after KOZA_AUTH_SECRET is set, like the server
+
+    baseline = rss_kb(server_pid)
+    streams = [Stream(port, issue_token(user_id)) for user_id in range(1, connections + 1)]
+    listeners = []
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def open_stream(stream):
+        async with gate:
+            reader = await stream.connect()
+        listeners.append(asyncio.create_task(stream.listen(reader)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(open_stream(s) for s in streams))
+    connect_s = time.perf_counter() - started
+    await asyncio.sleep(settle)
+    idle_rss = rss_kb(server_pid)
+    metrics = (await asyncio.to_thread(http, "GET", f"http://127.0.0.1:{port}/metrics")).decode()
+    subscribers = next(int(float(l.split()[-1])) for l in metrics.splitlines() if l.startswith("koza_event_subscribers "))
+
+    # Fan-out: one post in one category reaches every stream (all follow all categories)
+    posted_at = time.perf_counter()
+    await asyncio.to_thread(http, "POST", f"http://127.0.0.1:{port}/api/forum/posts",
+                            {"title": "fan-out", "content": "sse benchmark", "user_id": 1, "category_id": "Beslenme"})
+    await asyncio.wait(listeners, timeout=60)
+    delays_ms = sorted((s.received_at - posted_at) * 1000 for s in streams if s.received_at is not None)
+    for s in streams:
+        s.close()
+    for task in listeners:
+        task.cancel()
+    return {
+        "connections": connections,
+        "connect_seconds": round(connect_s, 2),
+        "subscribers": subscribers,
+        "baseline_rss_mb": round(baseline / 1024, 1),
+        "idle_rss_mb": round(idle_rss / 1024, 1),
+        "kb_per_connection": round((idle_rss - baseline) / connections, 2),
+        "delivered": len(delays_ms),
+        "fanout_p50_ms": round(statistics.median(delays_ms), 1) if delays_ms else None,
+        "fanout_p99_ms": round(delays_ms[int(len(delays_ms) * 0.99) - 1], 1) if delays_ms else None,
+        "fanout_max_ms": round(delays_ms[-1], 1) if delays_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=20000)
+    parser.add_argument("--settle", type=float, default=3.0, help="Seconds idle before measuring memory")
+    parser.add_argument("--max-kb-per-connection", type=float, default=64)
+    parser.add_argument("--max-fanout-ms", type=float, default=3000, help="Budget for the slowest stream")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    limit = raise_fd_limit(args.connections + FD_RESERVE)
+    connections = min(args.connections, limit - FD_RESERVE)
+    if connections < args.connections:
+        print(f"[WARN] open-file limit is {limit}: testing {connections} connections instead of {args.connections}")
+
+    # Server and client sign tokens with the same secret
+    os.environ.setdefault("KOZA_AUTH_SECRET", base64.urlsafe_b64encode(os.urandom(32)).decode())
+    workdir = tempfile.mkdtemp(prefix="koza-sse-")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = start_server(workdir, port)
+    try:
+        results = asyncio.run(run(port, server.pid, connections, args.settle))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for key, value in results.items():
+        print(f"{key:>20}: {value}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {os.path.abspath(args.output)}")
+
+    checks = [
+        ("every stream subscribed", results["subscribers"] >= connections, f"{results['subscribers']}/{connections}"),
+        ("every stream got the post", results["delivered"] == connections, f"{results['delivered']}/{connections}"),
+        ("memory per idle connection", results["kb_per_connection"] <= args.max_kb_per_connection,
+         f"{results['kb_per_connection']}KB (budget {args.max_kb_per_connection:g}KB)"),
+        ("fan-out to all streams", results["fanout_max_ms"] is not None and results["fanout_max_ms"] <= args.max_fanout_ms,
+         f"{results['fanout_max_ms']}ms (budget {args.max_fanout_ms:g}ms)"),
+    ]
+    failed = False
+    for label, ok, detail in checks:
+        failed |= not ok
+        print(f"{'[PASS]' if ok else '[FAIL]'} {label}: {detail}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Auth overhead benchmark for POST /api/upload-image.
+
+Runs the same upload with the old X-User-ID lookup (one SELECT on users per
+request) and with the signed bearer token (no DB access for auth), and
+reports SQL statements and latency per request for both.
+The database is a throwaway SQLite file in a temp directory.
+
+Usage:
+    python -m koza_project.benchmarks.upload_auth --requests 300
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def run(client, headers, body, count, counter):
+    timings = []
+    for i in range(count + 10):
+        counter["n"] = 0
+        t = time.perf_counter()
+        r = client.post("/api/upload-image", headers=headers, files={"file": ("bench.png", body, "image/png")})
+        elapsed = (time.perf_counter() - t) * 1000
+        if r.status_code != 200:
+            raise SystemExit(f"Upload failed: {r.status_code} {r.text}")
+        if i >= 10:  # warmup
+            timings.append((elapsed, counter["n"]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    # Throwaway databases: a random per-run token secret is fine (see check_auth_secret)
+    os.environ.setdefault("KOZA_DEV_SECRETS", "1")
+
+    workdir = tempfile.mkdtemp(prefix="koza-bench-")
+    os.chdir(workdir)  # sqlite:///./koza.db now points into the temp dir
+
+    from fastapi import Depends, Header, HTTPException
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    from ..api.dependencies import get_current_user_id
+    from ..api.main import app
+    from ..core import blobstore
+    from ..core.storage import get_storage
+    from ..database import SessionLocal, engine, get_db
+    from ..models import all_models
+
+    def legacy_user_id(x_user_id: str = Header(..., alias="X-User-ID"), db: Session = Depends(get_db)) -> int:
+        # Previous behaviour: trust the header, then look the user up on every request
+        user = db.query(all_models.User).filter(all_models.User.id == int(x_user_id)).first()
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid User ID")
+        return user.id
+
+    counter = {"n": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    body = b"\x89PNG\r\n\x1a\n" + os.urandom(4096)
+    with TestClient(app) as client:
+        registered = client.post("/api/auth/register", json={"name": "Bench"}).json()
+        token_headers = {"Authorization": f"Bearer {registered['access_token']}"}
+
+        app.dependency_overrides[get_current_user_id] = legacy_user_id
+        legacy = run(client, {"X-User-ID": str(registered["user_id"])}, body, args.requests, counter)
+        app.dependency_overrides.clear()
+        token = run(client, token_headers, body, args.requests, counter)
+
+        # Every request referenced the same blob: drop the file again
+        db = SessionLocal()
+        try:
+            for sha, ext in db.query(all_models.StoredBlob.sha256, all_models.StoredBlob.ext):
+                get_storage().delete_prefix(blobstore.blob_key(sha, ext))
+        finally:
+            db.close()
+
+    results = {}
+    for label, timings in (("X-User-ID + SELECT", legacy), ("bearer token", token)):
+        ms = sorted(t for t, _ in timings)
+        queries = statistics.mean(q for _, q in timings)
+        results[label] = queries
+        print(f"{label:>20}: {queries:.2f} queries/request, p50={statistics.median(ms):.2f}ms "
+              f"p95={ms[int(len(ms) * 0.95) - 1]:.2f}ms ({len(ms)} requests)")
+
+    saved = results["X-User-ID + SELECT"] - results["bearer token"]
+    print(f"Saved {saved:.2f} queries per request")
+    if saved < 1:
+        print("[FAIL]: token auth should not query the database")
+        sys.exit(1)
+    print("[PASS]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+from typing import Callable, Dict, Optional
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: without it only .gz siblings are written
+    brotli = None
+
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), "..", "ui")
+BUILD_DIR = os.path.join(os.path.dirname(__file__), "..", "ui_build")
+MANIFEST_NAME = "asset-manifest.json"
+URL_PREFIX = "/ui/"
+
+# Renamed to name.<hash>.ext; sw.js and manifest.json keep stable URLs
+FINGERPRINT_EXTENSIONS = {".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".woff2"}
+UNHASHED = {"sw.js"}
+COMPRESS_EXTENSIONS = {".html", ".css", ".js", ".json", ".svg", ".txt"}
+COMPRESS_MIN_BYTES = 256
+SKIP_DIRS = {"uploads"}
+
+HASH_LENGTH = 10
+HASHED_NAME = re.compile(r"\.[0-9a-f]{%d}\.[A-Za-z0-9]+$" % HASH_LENGTH)
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+# --- Build ---
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _hashed_path(path: str, digest: str) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest}{ext}"
+
+
+def _rewrite_references(text: str, manifest: Dict[str, str], base: str) -> str:
+    """
+    Points references to fingerprinted files at their hashed names. Handles
+    '/ui/css/style.css', 'css/style.css' (relative to `base`) and '../img/x.png'.
+    """
+    def replace(match):
+        ref = match.group(2)
+        if ref.startswith(URL_PREFIX):
+            logical, absolute = ref[len(URL_PREFIX):], True
+        elif "://" in ref or ref.startswith(("/", "data:", "#")):
+            return match.group(0)
+        else:
+            logical, absolute = os.path.normpath(os.path.join(base, ref)).replace(os.sep, "/"), False
+        hashed = manifest.get(logical)
+        if not hashed:
+            return match.group(0)
+        if absolute:
+            new_ref = URL_PREFIX + hashed
+        else:
+            new_ref = os.path.relpath(hashed, base or ".").replace(os.sep, "/")
+        return match.group(1) + new_ref + match.group(3)
+
+    return re.sub(r"""(["'(])([^"'()\s?#]+)([?#"')])""", replace, text)
+
+
+def _generate_sw(source: str, manifest: Dict[str, str], pages, version: str) -> str:
+    urls = [URL_PREFIX] + [URL_PREFIX + p for p in pages] + [URL_PREFIX + h for h in sorted(manifest.values())]
+    if os.path.exists(os.path.join(SOURCE_DIR, "manifest.json")):
+        urls.append(URL_PREFIX + "manifest.json")
+    listing = "[\n" + ",\n".join(f"    '{u}'" for u in urls) + "\n]"
+    source = re.sub(r"const CACHE_NAME = '[^']*';", f"const CACHE_NAME = 'koza-{version}';", source, count=1)
+    return re.sub(r"const ASSETS_TO_CACHE = \[[^\]]*\];", f"const ASSETS_TO_CACHE = {listing};", source, count=1)
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if os.path.splitext(path)[1] in COMPRESS_EXTENSIONS and len(data) >= COMPRESS_MIN_BYTES:
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + ".br", "wb") as f:
+                f.write(brotli.compress(data, quality=11))
+
+
+def build_assets(source: str = SOURCE_DIR, target: str = BUILD_DIR) -> Dict[str, str]:
+    """
+    Copies the UI into `target` with fingerprinted asset names, rewritten
+    references, .gz/.br siblings, a generated sw.js precache list and
+    asset-manifest.json. Returns the manifest (logical path -> hashed path).
+    """
+    files = []
+    for root, dirs, names in os.walk(source):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        for name in sorted(names):
+            if not name.startswith("."):
+                files.append(os.path.relpath(os.path.join(root, name), source).replace(os.sep, "/"))
+
+    def read(rel):
+        with open(os.path.join(source, rel), "rb") as f:
+            return f.read()
+
+    fingerprinted = [f for f in files if os.path.splitext(f)[1] in FINGERPRINT_EXTENSIONS and f not in UNHASHED]
+    # Binary assets first, so CSS/JS that reference them get the final names
+    fingerprinted.sort(key=lambda f: os.path.splitext(f)[1] in (".css", ".js"))
+
+    manifest: Dict[str, str] = {}
+    outputs: Dict[str, bytes] = {}
+    for rel in fingerprinted:
+        data = read(rel)
+        if os.path.splitext(rel)[1] in (".css", ".js"):
+            data = _rewrite_references(data.decode("utf-8"), manifest, os.path.dirname(rel)).encode("utf-8")
+        manifest[rel] = _hashed_path(rel, _content_hash(data))
+        outputs[manifest[rel]] = data
+        outputs[rel] = data # Unhashed copy for pages cached before this build
+
+    pages = [f for f in files if f.endswith(".html")]
+    for rel in pages:
+        outputs[rel] = _rewrite_references(read(rel).decode("utf-8"), manifest, os.path.dirname(rel)).encode("utf-8")
+    for rel in files:
+        if rel not in outputs and rel not in UNHASHED:
+            outputs[rel] = read(rel)
+
+    version = _content_hash(json.dumps([manifest, sorted(pages), [_content_hash(outputs[p]) for p in sorted(pages)]]).encode())
+    if "sw.js" in files:
+        outputs["sw.js"] = _generate_sw(read("sw.js").decode("utf-8"), manifest, pages, version).encode("utf-8")
+    outputs[MANIFEST_NAME] = json.dumps({"version": version, "files": manifest}, indent=2, sort_keys=True).encode("utf-8")
+
+    # Build next to the target and swap, so a running server never sees half a build
+    staging = target.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    for rel, data in outputs.items():
+        _write(os.path.join(staging, rel), data)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    return manifest
+
+
+def ui_directory() -> str:
+    """The built UI if `build_assets` has run, otherwise the sources."""
+    if os.path.exists(os.path.join(BUILD_DIR, MANIFEST_NAME)):
+        return BUILD_DIR
+    return SOURCE_DIR
+
+
+# --- Serving ---
+def accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a .br/.gz sibling when the client accepts it and
+    marks fingerprinted (or otherwise immutable) files as cacheable forever.
+    Everything else gets `no-cache`, so HTML and sw.js are revalidated (ETag).
+    """
+
+    def __init__(self, *args, immutable: Optional[Callable[[str], bool]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable = immutable or (lambda path: HASHED_NAME.search(path) is not None)
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        headers = {"Cache-Control": IMMUTABLE if self.immutable(full_path) else "no-cache"}
+
+        serve_path, serve_stat = full_path, stat_result
+        if os.path.splitext(full_path)[1] in COMPRESS_EXTENSIONS:
+            headers["Vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if encoding in accepted:
+                    try:
+                        serve_stat = os.stat(full_path + suffix)
+                    except FileNotFoundError:
+                        continue
+                    serve_path = full_path + suffix
+                    headers["Content-Encoding"] = encoding
+                    break
+
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        response = FileResponse(serve_path, status_code=status_code, stat_result=serve_stat,
+                                media_type=media_type, headers=headers)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    # Usage: python -m koza_project.core.assets   (run before starting the server)
+    if len(sys.argv) != 1:
+        print("Usage: python -m koza_project.core.assets")
+        sys.exit(1)
+    manifest = build_assets()
+    print(f"Built UI into {os.path.normpath(BUILD_DIR)}: {len(manifest)} fingerprinted assets"
+          + ("" if brotli else " (brotli not installed, .gz only)"))
@@ -0,0 +1,255 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal, dialect_insert, insert_ignore
+from ..models import all_models
+from .storage import LOCAL_ROOT, get_storage
+
+# Content-addressed keys: blobs/ab/cd/abcd...<sha256>.<ext> (in the configured storage backend)
+BLOB_PREFIX = "blobs/"
+# Streamed uploads are written here first, always on local disk
+TMP_DIR = os.path.join(LOCAL_ROOT, ".tmp")
+
+CONTENT_TYPES = {".jpg": "image/jpeg", ".png": "image/png", ".gif": "image/gif", ".webp": "image/webp"}
+
+# Unreferenced blobs are kept this long before the sweep deletes them
+GC_GRACE = timedelta(hours=1)
+GC_INTERVAL_SECONDS = 15 * 60
+# Every Nth sweep also lists the store for files that never got a DB row
+GC_DISK_SCAN_EVERY = 24
+
+# Uploads and the GC sweep are serialized by the stored_blobs row, not a process lock, so any
+# number of workers can upload while another one sweeps: a reference is committed before the
+# file is written, and the sweep deletes the files inside the transaction that deletes the
+# (still unreferenced) row. A concurrent reference waits on that row until the files are gone.
+
+
+def ensure_dirs():
+    os.makedirs(TMP_DIR, exist_ok=True)
+
+
+def blob_key(sha256: str, ext: str) -> str:
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def key_from_path(photo_path: str) -> str:
+    """Accepts a stored key or an older '/static/blobs/...' URL path."""
+    if photo_path.startswith("/static/"):
+        photo_path = photo_path[len("/static/"):]
+    return photo_path.lstrip("/")
+
+
+def sha_from_path(photo_path: Optional[str]) -> Optional[str]:
+    """Returns the sha256 of a blob key, or None for legacy (non content-addressed) paths."""
+    if not photo_path or not key_from_path(photo_path).startswith(BLOB_PREFIX):
+        return None
+    sha = photo_path.rsplit("/", 1)[-1].split(".", 1)[0]
+    return sha if len(sha) == 64 else None
+
+
+def parse_blob_key(key: str):
+    """Returns (sha256, ext) if `key` is a well-formed blob key, else None."""
+    sha = sha_from_path(key)
+    if not sha:
+        return None
+    ext = os.path.splitext(key)[1].lower()
+    if ext not in CONTENT_TYPES or key != blob_key(sha, ext):
+        return None
+    return sha, ext
+
+
+def reference_blob(db: Session, sha256: str, ext: str, size: int) -> int:
+    """
+    Takes one reference on a blob and returns the reference count it had
+    before. Committed immediately so a concurrent GC sweep cannot drop it.
+    """
+    Blob = all_models.StoredBlob
+    # One statement: a separate insert and update would let the sweep delete the row in between
+    count = db.execute(
+        dialect_insert(db, Blob).values(sha256=sha256, ext=ext, size=size, ref_count=1)
+        .on_conflict_do_update(
+            index_elements=[Blob.sha256],
+            set_={"ref_count": Blob.ref_count + 1, "released_at": None, "updated_at": datetime.utcnow()},
+        )
+        .returning(Blob.ref_count)
+    ).scalar_one()
+    db.commit()
+    return count - 1
+
+
+def store_blob(db: Session, temp_path: str, sha256: str, ext: str, size: int) -> str:
+    """
+    Moves a fully written temp file into storage (or drops it if the same
+    content is already stored) and takes one reference on it.
+    Returns the blob key.
+    """
+    key = blob_key(sha256, ext)
+    storage = get_storage()
+    # Only an existing live reference guarantees the file survives; after a release the
+    # sweep may already have removed it, so the first reference always writes
+    if reference_blob(db, sha256, ext, size) > 0 and storage.exists(key):
+        os.remove(temp_path)
+        return key
+    try:
+        storage.put_file(temp_path, key, CONTENT_TYPES.get(ext, "application/octet-stream"))
+    except BaseException:
+        release_blob(db, sha256)
+        db.commit()
+        raise
+    return key
+
+
+def register_direct_upload(db: Session, sha256: str, ext: str, size: int) -> bool:
+    """
+    Reference for a blob the client uploaded straight to storage. False (and
+    no reference) if a sweep of the released blob removed the file meanwhile.
+    """
+    if reference_blob(db, sha256, ext, size) > 0 or get_storage().exists(blob_key(sha256, ext)):
+        return True
+    release_blob(db, sha256)
+    db.commit()
+    return False
+
+
+def release_blob(db: Session, sha256: str):
+    """Drops one reference. The file is removed later by the GC sweep (not committed here)."""
+    Blob = all_models.StoredBlob
+    db.execute(
+        update(Blob).where(Blob.sha256 == sha256, Blob.ref_count > 0)
+        .values(ref_count=Blob.ref_count - 1, released_at=datetime.utcnow())
+    )
+
+
+def mark_derivatives_ready(sha256: str):
+    Blob = all_models.StoredBlob
+    db = SessionLocal()
+    try:
+        db.execute(update(Blob).where(Blob.sha256 == sha256).values(derivatives_ready=True))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _remove_files(sha256: str, ext: str):
+    # The original plus any derivatives (sha.thumb.webp, ...)
+    key = blob_key(sha256, ext)
+    get_storage().delete_prefix(key[:-len(ext)] + ".")
+
+
+def collect_garbage(db: Session, grace: timedelta = GC_GRACE, scan_disk: bool = False) -> int:
+    """
+    Deletes blobs whose reference count dropped to zero more than `grace` ago.
+    With scan_disk=True also removes stored files that have no DB row at all
+    (e.g. a crash between writing and referencing) and stale temp files.
+    Returns the number of removed blobs.
+    """
+    Blob = all_models.StoredBlob
+    cutoff = datetime.utcnow() - grace
+    candidates = db.query(Blob.sha256, Blob.ext).filter(
+        Blob.ref_count <= 0,
+        Blob.released_at < cutoff
+    ).all()
+
+    removed = 0
+    for sha256, ext in candidates:
+        # Conditional: the blob may have been re-referenced since. The row stays locked until
+        # the files are gone, and a failed delete keeps it for the next sweep.
+        result = db.execute(delete(Blob).where(Blob.sha256 == sha256, Blob.ref_count <= 0))
+        if result.rowcount != 1:
+            db.rollback()
+            continue
+        try:
+            _remove_files(sha256, ext)
+        except Exception:
+            db.rollback()
+            raise
+        db.commit()
+        removed += 1
+
+    if scan_disk:
+        removed += _sweep_orphan_files(db, grace)
+    return removed
+
+
+def _sweep_orphan_files(db: Session, grace: timedelta) -> int:
+    Blob = all_models.StoredBlob
+    cutoff = time.time() - grace.total_seconds()
+
+    for name in os.listdir(TMP_DIR):
+        path = os.path.join(TMP_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    removed = 0
+    storage = get_storage()
+    for key, mtime in storage.list_keys(BLOB_PREFIX):
+        sha256 = sha_from_path(key)
+        if mtime > cutoff or not sha256:
+            continue
+        # A placeholder row claims the sha like a reference would: a concurrent upload waits
+        # for it, and a blob that got a row in the meantime is left alone
+        claimed = db.execute(insert_ignore(db, Blob).values(sha256=sha256, ref_count=0))
+        if claimed.rowcount != 1:
+            db.rollback()
+            continue
+        try:
+            storage.delete_prefix(key)
+        finally:
+            db.execute(delete(Blob).where(Blob.sha256 == sha256))
+            db.commit()
+        removed += 1
+    return removed
+
+
+class BlobGarbageCollector:
+    """Background task that runs collect_garbage periodically."""
+
+    def __init__(self, interval: float = GC_INTERVAL_SECONDS, session_factory=SessionLocal):
+        self.interval = interval
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    def _sweep(self, scan_disk: bool) -> int:
+        db = self.session_factory()
+        try:
+            return collect_garbage(db, scan_disk=scan_disk)
+        finally:
+            db.close()
+
+    async def _run(self):
+        runs = 0
+        while True:
+            try:
+                runs += 1
+                removed = await asyncio.to_thread(self._sweep, runs % GC_DISK_SCAN_EVERY == 0)
+                if removed:
+                    print(f"Blob GC removed {removed} unreferenced files")
+            except Exception as e:
+                print(f"Blob GC error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+garbage_collector = BlobGarbageCollector()
@@ -0,0 +1,149 @@
+"""
+In-memory event feed for Server-Sent Events and long-polling
+(/api/events/stream, /api/events/poll): new forum posts per category and
+per-user notifications, one-way, as a lighter alternative to the WebSocket.
+
+Events live in a fixed-size ring buffer, so a client that reconnects with
+its last event id (Last-Event-ID) gets what it missed. A client that fell
+further behind than the buffer, or whose id comes from before a restart,
+gets a "resync" event (refetch, e.g. /api/sync/changes).
+
+Built for many idle connections per worker: each event is encoded once at
+publish time, an idle connection is a single future registered under its
+channels (no queue per client), and a publish wakes only the connections
+subscribed to that channel. Events are per process, like the WebSocket
+connections: with several workers a client only sees events published by
+its own worker.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+RING_SIZE = int(os.getenv("KOZA_EVENT_BUFFER", "4096"))
+# Comment line sent on idle SSE streams so proxies keep them open
+HEARTBEAT_SECONDS = 15.0
+# Reconnect delay the browser/EventSource client should use
+RETRY_MS = 3000
+# Event ids are "<boot>-<seq>": ids from before a restart are recognized as stale
+BOOT = format(int(time.time()), "x")
+
+
+def forum_channel(category: str) -> str:
+    return f"forum:{category}"
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def _iso(value):
+    # Dates as ISO strings, like the JSON responses
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+class Event:
+    __slots__ = ("seq", "channel", "frame", "json")
+
+    def __init__(self, seq: int, channel: str, frame: bytes, json_text: str):
+        self.seq = seq
+        self.channel = channel
+        self.frame = frame  # encoded SSE frame, shared by every stream
+        self.json = json_text  # the same event as a JSON object, for long-polling
+
+
+class EventBus:
+    def __init__(self, size: int = RING_SIZE):
+        self.size = size
+        self._ring: List[Optional[Event]] = [None] * size
+        self.seq = 0  # last published
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.subscribers = 0
+        self.published = 0
+
+    # --- Ids ---
+    def event_id(self, seq: int) -> str:
+        return f"{BOOT}-{seq}"
+
+    def parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        """Sequence number of a client's last event id; None if it is unusable (resync)."""
+        boot, _, seq = (event_id or "").partition("-")
+        if boot != BOOT or not seq.isdigit() or int(seq) > self.seq:
+            return None
+        return int(seq)
+
+    # --- Publishing ---
+    def publish(self, channel: str, event_type: str, data: dict):
+        """Appends an event and wakes its subscribers. Safe to call from worker threads."""
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop or self._loop is None
+        except RuntimeError:
+            on_loop = self._loop is None
+        if not on_loop:
+            self._loop.call_soon_threadsafe(self.publish, channel, event_type, data)
+            return
+        self.seq += 1
+        self.published += 1
+        event_id = self.event_id(self.seq)
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_iso)
+        frame = f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode("utf-8")
+        json_text = f'{{"id":"{event_id}","type":"{event_type}","channel":{json.dumps(channel, ensure_ascii=False)},"data":{payload}}}'
+        self._ring[self.seq % self.size] = Event(self.seq, channel, frame, json_text)
+        for waiter in self._waiters.pop(channel, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    # --- Reading ---
+    def since(self, channels: Iterable[str], after: int) -> Optional[List[Event]]:
+        """Events after sequence `after` on `channels`; None if some were already overwritten."""
+        if after < self.seq - self.size:
+            return None
+        return [e for e in (self._ring[s % self.size] for s in range(after + 1, self.seq + 1)) if e.channel in channels]
+
+    async def wait(self, channels: Set[str], after: int, timeout: float) -> Optional[List[Event]]:
+        """
+        Returns the events after `after` as soon as there is at least one,
+        or an empty list after `timeout` seconds (None: resync needed).
+        """
+        events = self.since(channels, after)
+        if events != []:
+            return events
+        self._loop = asyncio.get_running_loop()
+        waiter = self._loop.create_future()
+        for channel in channels:
+            self._waiters.setdefault(channel, set()).add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for channel in channels:
+                waiting = self._waiters.get(channel)
+                if waiting is not None:
+                    waiting.discard(waiter)
+                    if not waiting:
+                        del self._waiters[channel]
+        return self.since(channels, after)
+
+    def render_metrics(self) -> str:
+        """Prometheus lines for /metrics."""
+        return "\n".join([
+            "# HELP koza_event_subscribers Open SSE / long-poll connections.",
+            "# TYPE koza_event_subscribers gauge",
+            f"koza_event_subscribers {self.subscribers}",
+            "# HELP koza_events_published_total Events published to the SSE / long-poll feed.",
+            "# TYPE koza_events_published_total counter",
+            f"koza_events_published_total {self.published}",
+        ]) + "\n"
+
+
+event_bus = EventBus()
+
+
+def resync_frame(bus: EventBus = event_bus) -> Tuple[bytes, str]:
+    """SSE frame and JSON object telling the client to refetch; carries the current id."""
+    event_id = bus.event_id(bus.seq)
+    return (f"id: {event_id}\nevent: resync\ndata: {{}}\n\n".encode("ascii"),
+            f'{{"id":"{event_id}","type":"resync","channel":null,"data":{{}}}}')
@@ -0,0 +1,161 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..database import engine
+
+# Off by default; KOZA_GROUP_COMMIT=1 routes the small tracker/like writes through the batcher
+ENABLED = os.getenv("KOZA_GROUP_COMMIT", "0") == "1"
+# A batch is committed this long after its first write arrived, or earlier when full
+MAX_DELAY_SECONDS = float(os.getenv("KOZA_GROUP_COMMIT_DELAY_MS", "3")) / 1000
+MAX_BATCH = int(os.getenv("KOZA_GROUP_COMMIT_BATCH", "256"))
+# Callers give up waiting for their commit after this long
+RESULT_TIMEOUT_SECONDS = 10.0
+
+
+class GroupCommitWriter:
+    """
+    Coalesces small INSERT/UPDATE statements from many requests into one
+    transaction. A dedicated thread drains the queue every few milliseconds
+    (or once MAX_BATCH statements are waiting) and commits them together;
+    each caller blocks until the commit that contains its statement is done.
+
+    Its connection runs with synchronous=FULL: the single fsync per batch is
+    cheap, so acknowledged writes survive a power loss.
+    If a batch fails, its statements are retried one by one so only the
+    failing statement reports an error.
+    """
+
+    def __init__(self, bind=engine, max_delay: float = MAX_DELAY_SECONDS, max_batch: int = MAX_BATCH):
+        self.bind = bind
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.statements = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Commits whatever is queued, then stops the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    # --- Public API ---
+    def submit(self, statement) -> Future:
+        """Queues a statement. The future resolves to its RETURNING rows once committed."""
+        future: Future = Future()
+        self._queue.put((statement, future))
+        return future
+
+    # --- Worker ---
+    def _collect(self, first) -> List[tuple]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    @staticmethod
+    def _rows(result) -> list:
+        return result.all() if result.returns_rows else []
+
+    def _commit(self, conn, batch: List[tuple]):
+        try:
+            with conn.begin():
+                results = [self._rows(conn.execute(statement)) for statement, _ in batch]
+        except Exception:
+            # Isolate the failing statement; the others still commit
+            for statement, future in batch:
+                try:
+                    with conn.begin():
+                        rows = self._rows(conn.execute(statement))
+                    future.set_result(rows)
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.statements += len(batch)
+        for (_, future), rows in zip(batch, results):
+            future.set_result(rows)
+
+    def _run(self):
+        with self.bind.connect() as conn:
+            sqlite = conn.dialect.name == "sqlite"
+            if sqlite:
+                conn.exec_driver_sql("PRAGMA synchronous=FULL")
+                conn.commit()
+            try:
+                while True:
+                    item = self._queue.get()
+                    if item is None:
+                        break
+                    batch = self._collect(item)
+                    try:
+                        self._commit(conn, batch)
+                    except Exception as e:
+                        print(f"Group commit error: {e}")
+                        for _, future in batch:
+                            if not future.done():
+                                future.set_exception(e)
+            finally:
+                if sqlite:
+                    conn.exec_driver_sql("PRAGMA synchronous=NORMAL")  # back to the pool's setting
+                    conn.commit()
+
+
+group_commit = GroupCommitWriter()
+# One writer per database: the main one, plus one per tracker shard (core.shards)
+writers: Dict[object, GroupCommitWriter] = {engine: group_commit}
+
+
+def start_all():
+    for writer in writers.values():
+        writer.start()
+
+
+def stop_all():
+    for writer in writers.values():
+        writer.stop()
+
+
+def execute_write(db: Session, statement) -> list:
+    """
+    Runs one small INSERT/UPDATE and commits it, through the group-commit
+    writer of the session's database when it is running, otherwise in the
+    session itself. Returns the statement's RETURNING rows (empty list without RETURNING).
+    """
+    writer = writers.get(db.get_bind())
+    if writer is not None and writer.running:
+        return writer.submit(statement).result(timeout=RESULT_TIMEOUT_SECONDS)
+    result = db.connection().execute(statement)
+    rows = result.all() if result.returns_rows else []
+    db.commit()
+    return rows
@@ -0,0 +1,375 @@
+"""
+In-process background jobs for the side effects of a write: badge
+recomputation, forum notifications and thumbnail generation. The request
+commits its row, enqueues the job and returns.
+
+Handlers are registered by name with @job("name"): sync handlers run in a
+worker thread, async ones on the event loop. A pool of worker tasks runs
+them; a failing job is retried with exponential backoff and, after
+MAX_ATTEMPTS, written to the dead_jobs table.
+
+With KOZA_JOBS_PERSIST=1 every job is also kept in background_jobs until it
+finishes. The process refreshes the lease (claimed_at) of its jobs, and jobs
+whose lease ran out (the process stopped or crashed) are taken over by a
+running process, e.g. the next one after a restart. Jobs run at least once,
+so handlers must be idempotent.
+
+Usage (dead letters):
+    python -m koza_project.core.jobs dead
+    python -m koza_project.core.jobs requeue --id 12     # or --all (picked up with KOZA_JOBS_PERSIST=1)
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert, select, update
+
+from ..database import SessionLocal
+from ..models import all_models
+
+JOB_WORKERS = int(os.getenv("KOZA_JOB_WORKERS", "4"))
+PERSIST = os.getenv("KOZA_JOBS_PERSIST", "0") == "1"
+MAX_ATTEMPTS = int(os.getenv("KOZA_JOB_MAX_ATTEMPTS", "5"))
+# Retry delays: 0.5s, 1s, 2s, 4s ... capped
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 60.0
+# A persisted job whose lease is older than this belongs to a stopped process
+JOB_LEASE = timedelta(seconds=60)
+RECOVER_BATCH = 500
+# On shutdown, queued jobs get this long to finish
+DRAIN_SECONDS = 5.0
+
+handlers: Dict[str, Callable[..., Any]] = {}
+
+
+def job(name: str):
+    """Registers a handler under `name`; it is called with the enqueued kwargs."""
+    def register(fn):
+        handlers[name] = fn
+        return fn
+    return register
+
+
+class Job:
+    __slots__ = ("name", "payload", "attempts", "row_id")
+
+    def __init__(self, name: str, payload: dict, attempts: int = 0, row_id: Optional[int] = None):
+        self.name = name
+        self.payload = payload
+        self.attempts = attempts
+        self.row_id = row_id  # background_jobs.id when persisted
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, persist: bool = PERSIST,
+                 max_attempts: int = MAX_ATTEMPTS, lease: timedelta = JOB_LEASE, session_factory=SessionLocal):
+        self.workers = workers
+        self.persist = persist
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.session_factory = session_factory
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: List[Job] = []  # enqueued before start()
+        self._retries: Dict[int, asyncio.TimerHandle] = {}
+        self._owned: set = set()  # persisted rows this process runs (lease refreshed)
+        self._inserts: set = set()  # enqueue() calls from the event loop still writing their row
+        self.counts: Counter = Counter()  # (job name, outcome)
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    # --- Lifecycle ---
+    def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        for pending in self._pending:
+            self._queue.put_nowait(pending)
+        self._pending = []
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.persist:
+            self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self, drain: float = DRAIN_SECONDS):
+        """Waits up to `drain` seconds for queued jobs, then stops the workers."""
+        if not self.running:
+            return
+        if self._inserts:
+            await asyncio.gather(*self._inserts, return_exceptions=True)
+        try:
+            await asyncio.wait_for(self._queue.join(), drain)
+        except asyncio.TimeoutError:
+            left = self._queue.qsize() + len(self._retries)
+            print(f"Stopping with {left} unfinished jobs" + (" (run again after restart)" if self.persist else ""))
+        for handle in self._retries.values():
+            handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._retries = [], {}
+        self._queue = self._loop = None
+
+    # --- Public API ---
+    def enqueue(self, name: str, **payload):
+        """
+        Queues the handler `name` with JSON-serializable kwargs. Call it after
+        the commit it depends on. Works from the event loop and from sync
+        handlers (thread pool); when persisting, a call from the event loop
+        returns at once and the row is written from a thread.
+        """
+        if name not in handlers:
+            raise KeyError(f"Unknown job: {name}")
+        queued = Job(name, payload)
+        if not self.persist:
+            self._put(queued)
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            queued.row_id = self._insert(queued)
+            self._put(queued)
+        else:
+            # Async handlers: the INSERT must not block the event loop (busy_timeout under write contention)
+            task = loop.create_task(self._insert_and_put(queued))
+            self._inserts.add(task)
+            task.add_done_callback(self._inserts.discard)
+
+    @property
+    def queued(self) -> int:
+        return (self._queue.qsize() if self._queue else len(self._pending)) + len(self._retries)
+
+    def render_metrics(self) -> str:
+        """Prometheus lines for /metrics."""
+        lines = [
+            "# HELP koza_jobs_queued Background jobs waiting to run (including retries).",
+            "# TYPE koza_jobs_queued gauge",
+            f"koza_jobs_queued {self.queued}",
+            "# HELP koza_jobs_total Background job runs by outcome.",
+            "# TYPE koza_jobs_total counter",
+        ]
+        lines += [f'koza_jobs_total{{job="{name}",outcome="{outcome}"}} {n}'
+                  for (name, outcome), n in sorted(self.counts.items())]
+        return "\n".join(lines) + "\n"
+
+    # --- Workers ---
+    def _put(self, queued: Job):
+        if self._loop is None:
+            self._pending.append(queued)
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._queue.put_nowait(queued)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, queued)
+
+    async def _insert_and_put(self, queued: Job):
+        try:
+            queued.row_id = await asyncio.to_thread(self._insert, queued)
+        except Exception as e:
+            # Still run it, just without the restart guarantee
+            print(f"Job bookkeeping failed (_insert): {e}")
+        self._put(queued)
+
+    async def _worker(self):
+        while True:
+            queued = await self._queue.get()
+            try:
+                await self._run(queued)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, queued: Job):
+        queued.attempts += 1
+        try:
+            handler = handlers[queued.name]
+            if inspect.iscoroutinefunction(handler):
+                await handler(**queued.payload)
+            else:
+                await asyncio.to_thread(handler, **queued.payload)
+        except Exception as e:
+            await self._failed(queued, f"{type(e).__name__}: {e}")
+            return
+        self.counts[(queued.name, "done")] += 1
+        if queued.row_id is not None:
+            await self._persist(self._delete, queued)
+
+    async def _failed(self, queued: Job, error: str):
+        if queued.attempts >= self.max_attempts:
+            self.counts[(queued.name, "dead")] += 1
+            print(f"Job {queued.name} failed {queued.attempts} times, moved to dead_jobs: {error}")
+            await self._persist(self._bury, queued, error)
+            return
+        self.counts[(queued.name, "retried")] += 1
+        if queued.row_id is not None:
+            await self._persist(self._record_attempt, queued, error)
+        delay = min(RETRY_BASE_SECONDS * 2 ** (queued.attempts - 1), RETRY_MAX_SECONDS)
+        self._retries[id(queued)] = self._loop.call_later(delay, self._retry, queued)
+
+    def _retry(self, queued: Job):
+        self._retries.pop(id(queued), None)
+        self._queue.put_nowait(queued)
+
+    async def _persist(self, fn, *args):
+        # Bookkeeping failures must not kill a worker; a persisted job then simply runs again
+        try:
+            await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            print(f"Job bookkeeping failed ({fn.__name__}): {e}")
+
+    async def _maintain(self):
+        """Refreshes the lease of our persisted jobs and takes over expired ones."""
+        while True:
+            try:
+                if self._owned:
+                    await asyncio.to_thread(self._heartbeat)
+                for recovered in await asyncio.to_thread(self._claim_expired):
+                    self._queue.put_nowait(recovered)
+            except Exception as e:
+                print(f"Job recovery error: {e}")
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+
+    # --- Persistence (worker threads) ---
+    def _insert(self, queued: Job) -> int:
+        J = all_models.BackgroundJob
+        db = self.session_factory()
+        try:
+            row_id = db.execute(insert(J).values(name=queued.name, payload=json.dumps(queued.payload), attempts=0,
+                                                 claimed_at=datetime.utcnow()).returning(J.id)).scalar()
+            db.commit()
+        finally:
+            db.close()
+        self._owned.add(row_id)
+        return row_id
+
+    def _delete(self, queued: Job):
+        J = all_models.BackgroundJob
+        db = self.session_factory()
+        try:
+            db.execute(delete(J).where(J.id == queued.row_id))
+            db.commit()
+        finally:
+            db.close()
+        self._owned.discard(queued.row_id)
+
+    def _record_attempt(self, queued: Job, error: str):
+        J = all_models.BackgroundJob
+        db = self.session_factory()
+        try:
+            db.execute(update(J).where(J.id == queued.row_id).values(attempts=queued.attempts, last_error=error))
+            db.commit()
+        finally:
+            db.close()
+
+    def _bury(self, queued: Job, error: str):
+        db = self.session_factory()
+        try:
+            db.add(all_models.DeadJob(name=queued.name, payload=json.dumps(queued.payload),
+                                      attempts=queued.attempts, error=error))
+            if queued.row_id is not None:
+                J = all_models.BackgroundJob
+                db.execute(delete(J).where(J.id == queued.row_id))
+            db.commit()
+        finally:
+            db.close()
+        self._owned.discard(queued.row_id)
+
+    def _heartbeat(self):
+        J = all_models.BackgroundJob
+        owned = list(self._owned)
+        db = self.session_factory()
+        try:
+            for start in range(0, len(owned), RECOVER_BATCH):
+                db.execute(update(J).where(J.id.in_(owned[start:start + RECOVER_BATCH]))
+                           .values(claimed_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim_expired(self) -> List[Job]:
+        J = all_models.BackgroundJob
+        now = datetime.utcnow()
+        db = self.session_factory()
+        claimed = []
+        try:
+            rows = db.execute(select(J.id, J.name, J.payload, J.attempts, J.claimed_at)
+                              .where(J.claimed_at < now - self.lease).order_by(J.claimed_at)
+                              .limit(RECOVER_BATCH)).all()
+            for row in rows:
+                # Compare-and-set on the old lease: only one process takes a row over
+                taken = db.execute(update(J).where(J.id == row.id, J.claimed_at == row.claimed_at)
+                                   .values(claimed_at=now)).rowcount
+                if taken:
+                    claimed.append(Job(row.name, json.loads(row.payload), row.attempts or 0, row.id))
+            db.commit()
+        finally:
+            db.close()
+        if claimed:
+            print(f"Recovered {len(claimed)} background jobs")
+        self._owned.update(j.row_id for j in claimed)
+        return claimed
+
+
+job_queue = JobQueue()
+
+
+# --- Dead letters ---
+def requeue_dead(ids: Optional[List[int]] = None) -> int:
+    """
+    Moves dead jobs (all, or `ids`) back to background_jobs with an expired
+    lease, so a process running with KOZA_JOBS_PERSIST=1 picks them up.
+    """
+    Dead, J = all_models.DeadJob, all_models.BackgroundJob
+    db = SessionLocal()
+    try:
+        query = select(Dead.id, Dead.name, Dead.payload)
+        if ids is not None:
+            query = query.where(Dead.id.in_(ids))
+        rows = db.execute(query).all()
+        if rows:
+            expired = datetime.utcnow() - JOB_LEASE * 2
+            db.execute(insert(J), [{"name": r.name, "payload": r.payload, "attempts": 0, "claimed_at": expired}
+                                   for r in rows])
+            db.execute(delete(Dead).where(Dead.id.in_([r.id for r in rows])))
+        db.commit()
+        return len(rows)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("dead", help="List the dead-letter table")
+    retry = commands.add_parser("requeue", help="Move dead jobs back to the queue")
+    which = retry.add_mutually_exclusive_group(required=True)
+    which.add_argument("--id", type=int, action="append", help="Dead job id (repeatable)")
+    which.add_argument("--all", action="store_true")
+    args = parser.parse_args()
+
+    from .schema import upgrade_database
+
+    upgrade_database()
+    if args.command == "dead":
+        D = all_models.DeadJob
+        db = SessionLocal()
+        try:
+            for row in db.execute(select(D.id, D.name, D.payload, D.attempts, D.error, D.failed_at).order_by(D.id)):
+                print(f"{row.id:>6}  {row.failed_at:%Y-%m-%d %H:%M}  {row.name}({row.payload}) x{row.attempts}: {row.error}")
+        finally:
+            db.close()
+    else:
+        print(f"Requeued {requeue_dead(None if args.all else args.id)} jobs")
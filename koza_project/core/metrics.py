@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Requests over either limit are logged (set to 0 to disable)
+SLOW_REQUEST_MS = float(os.getenv("KOZA_SLOW_REQUEST_MS", "500"))
+MAX_QUERIES_PER_REQUEST = int(os.getenv("KOZA_MAX_QUERIES_PER_REQUEST", "20"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    """SQL work done on behalf of one request (shared with its thread-pool calls)."""
+
+    __slots__ = ("queries", "sql_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("koza_request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot: +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _labels(**labels) -> str:
+    inner = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels.items())
+    return "{" + inner + "}" if inner else ""
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """In-process metrics registry, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.request_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.request_sql_seconds: Dict[Tuple[str, str], float] = {}
+        self.in_flight = 0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+    # --- Requests ---
+    def request_started(self) -> RequestStats:
+        with self._lock:
+            self.in_flight += 1
+        stats = RequestStats()
+        _current.set(stats)
+        return stats
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.request_queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(stats.queries)
+            self.request_sql_seconds[key] = self.request_sql_seconds.get(key, 0.0) + stats.sql_seconds
+
+        slow = SLOW_REQUEST_MS and seconds * 1000 >= SLOW_REQUEST_MS
+        chatty = MAX_QUERIES_PER_REQUEST and stats.queries >= MAX_QUERIES_PER_REQUEST
+        if slow or chatty:
+            print(f"[metrics] {'slow' if slow else 'query-heavy'} request: {method} {route} -> {status} "
+                  f"in {seconds * 1000:.1f}ms, {stats.queries} queries ({stats.sql_seconds * 1000:.1f}ms SQL)")
+
+    # --- SQL ---
+    def query_finished(self, seconds: float):
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += seconds
+
+    def instrument_engine(self, engine):
+        """Counts every statement executed on `engine` (and times it)."""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("koza_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["koza_query_start"].pop()
+            self.query_finished(time.perf_counter() - started)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(context):
+            starts = context.connection.info.get("koza_query_start") if context.connection is not None else None
+            if starts:
+                starts.pop()
+
+    # --- Exposition ---
+    def _histogram_lines(self, name: str, histograms: Dict[Tuple[str, str], Histogram]):
+        for (method, route), h in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format(bound)
+                yield f"{name}_bucket{_labels(method=method, route=route, le=le)} {cumulative}"
+            yield f"{name}_sum{_labels(method=method, route=route)} {_format(h.total)}"
+            yield f"{name}_count{_labels(method=method, route=route)} {h.count}"
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP koza_http_requests_total HTTP requests by route and status.",
+                "# TYPE koza_http_requests_total counter",
+            ]
+            lines += [f"koza_http_requests_total{_labels(method=m, route=r, status=s)} {n}"
+                      for (m, r, s), n in sorted(self.requests.items())]
+            lines += [
+                "# HELP koza_http_request_duration_seconds Request latency by route.",
+                "# TYPE koza_http_request_duration_seconds histogram",
+            ]
+            lines += self._histogram_lines("koza_http_request_duration_seconds", self.latency)
+            lines += [
+                "# HELP koza_http_request_db_queries SQL statements per request.",
+                "# TYPE koza_http_request_db_queries histogram",
+            ]
+            lines += self._histogram_lines("koza_http_request_db_queries", self.request_queries)
+            lines += [
+                "# HELP koza_http_request_db_seconds_total SQL time spent inside requests, by route.",
+                "# TYPE koza_http_request_db_seconds_total counter",
+            ]
+            lines += [f"koza_http_request_db_seconds_total{_labels(method=m, route=r)} {_format(v)}"
+                      for (m, r), v in sorted(self.request_sql_seconds.items())]
+            lines += [
+                "# HELP koza_http_requests_in_flight Requests currently being served.",
+                "# TYPE koza_http_requests_in_flight gauge",
+                f"koza_http_requests_in_flight {self.in_flight}",
+                "# HELP koza_db_queries_total SQL statements, including background jobs.",
+                "# TYPE koza_db_queries_total counter",
+                f"koza_db_queries_total {self.db_queries}",
+                "# HELP koza_db_query_seconds_total SQL time, including background jobs.",
+                "# TYPE koza_db_query_seconds_total counter",
+                f"koza_db_query_seconds_total {_format(self.db_seconds)}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
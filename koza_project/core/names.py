@@ -0,0 +1,320 @@
+import csv
+import heapq
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models import all_models
+
+NameEntry = Tuple[int, str, str, str]  # (id, name, gender, meaning)
+
+GENDERS = ("K", "E", "U")
+
+
+def turkish_fold(text: str) -> str:
+    """
+    Lowercases with Turkish rules (I -> ı, İ -> i), which str.lower() gets wrong.
+    """
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+_DIACRITICS = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+
+
+def fold_diacritics(text: str) -> str:
+    """
+    Turkish case folding plus diacritic removal ("Güneş" -> "gunes"),
+    so queries typed on a keyboard without Turkish letters still match.
+    """
+    return turkish_fold(text).translate(_DIACRITICS)
+
+
+def phonetic_key(text: str) -> str:
+    """
+    Coarse phonetic form: diacritics folded, non-letters dropped, repeated
+    letters collapsed ("Ayşee" -> "ayse"). Used for the exact-match boost.
+    """
+    out = []
+    for ch in fold_diacritics(text):
+        if ch.isalpha() and (not out or out[-1] != ch):
+            out.append(ch)
+    return "".join(out)
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm style trigrams: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _TrigramIndex:
+    """
+    Inverted index from trigram to the positions of the strings containing it.
+    `match` counts shared trigrams over the posting lists (Counter.update runs
+    in C) and ranks candidates by trigram similarity, like pg_trgm's similarity().
+    """
+
+    __slots__ = ("strings", "gram_counts", "postings")
+
+    def __init__(self, strings: Sequence[str]):
+        self.strings = list(strings)
+        self.gram_counts: List[int] = []
+        postings = defaultdict(list)
+        for i, text in enumerate(self.strings):
+            grams = trigrams(text)
+            self.gram_counts.append(len(grams))
+            for g in grams:
+                postings[g].append(i)
+        self.postings = dict(postings)
+
+    def match(self, query: str, threshold: float = 0.3) -> List[Tuple[float, int]]:
+        grams = trigrams(query)
+        if not grams:
+            return []
+        counts = Counter()
+        for g in grams:
+            counts.update(self.postings.get(g, ()))
+
+        n = len(grams)
+        # similarity >= threshold needs at least this many shared trigrams
+        min_shared = max(1, int(threshold * n))
+        gram_counts = self.gram_counts
+        hits = []
+        for i, shared in counts.items():
+            if shared < min_shared:
+                continue
+            sim = shared / (n + gram_counts[i] - shared)
+            if sim >= threshold:
+                hits.append((sim, i))
+        return hits
+
+
+class FuzzyNameIndex:
+    """
+    Ranked fuzzy search over names and meanings with diacritics folded.
+    Names are indexed by their distinct folded forms, meanings by their
+    distinct words, so 100k names map to far fewer index keys.
+    """
+
+    # A hit on a meaning word counts for less than a hit on the name itself
+    MEANING_WEIGHT = 0.5
+
+    def __init__(self, entries: Sequence[NameEntry]):
+        name_keys: Dict[str, List[NameEntry]] = defaultdict(list)
+        word_entries: Dict[str, Set[int]] = defaultdict(set)
+        by_id = {}
+        for e in entries:
+            by_id[e[0]] = e
+            name_keys[fold_diacritics(e[1])].append(e)
+            for word in fold_diacritics(e[3] or "").split():
+                word = word.strip(".,;:!?()\"'")
+                if len(word) >= 3:
+                    word_entries[word].add(e[0])
+
+        self.by_id = by_id
+        self.name_keys = list(name_keys)
+        self.name_entries = [name_keys[k] for k in self.name_keys]
+        self.name_phonetic = [phonetic_key(k) for k in self.name_keys]
+        self.names = _TrigramIndex(self.name_keys)
+        self.words = list(word_entries)
+        self.word_entries = [sorted(word_entries[w]) for w in self.words]
+        self.meanings = _TrigramIndex(self.words)
+
+    def search(self, query: str, gender: Optional[str] = None, limit: int = 20) -> List[Tuple[float, NameEntry]]:
+        folded = fold_diacritics(query).strip()
+        if not folded:
+            return []
+        phonetic = phonetic_key(folded)
+        scores: Dict[int, float] = {}
+
+        for sim, i in self.names.match(folded):
+            key = self.name_keys[i]
+            if key == folded or self.name_phonetic[i] == phonetic:
+                sim = 2.0
+            elif key.startswith(folded):
+                sim += 0.5
+            for e in self.name_entries[i]:
+                if scores.get(e[0], 0.0) < sim:
+                    scores[e[0]] = sim
+
+        by_id = self.by_id
+        word_hits = []
+        for word in folded.split():
+            if len(word) >= 3:
+                word_hits.extend(self.meanings.match(word, threshold=0.5))
+
+        for sim, i in sorted(word_hits, reverse=True):
+            weighted = sim * self.MEANING_WEIGHT
+            # A common meaning word can cover most of the corpus. Ties rank by
+            # id, so only the first `limit` entries of the word can reach the top.
+            taken = 0
+            for entry_id in self.word_entries[i]:
+                if gender and by_id[entry_id][2] != gender:
+                    continue
+                if scores.get(entry_id, 0.0) < weighted:
+                    scores[entry_id] = weighted
+                taken += 1
+                if taken >= limit:
+                    break
+
+        ranked = ((score, by_id[i]) for i, score in scores.items() if not gender or by_id[i][2] == gender)
+        return heapq.nlargest(limit, ranked, key=lambda r: (r[0], -r[1][0]))
+
+
+class _Partition:
+    """
+    Names of one gender (or all genders), sorted by their folded form.
+    Prefix search is a bisect over `keys`; substring search runs str.find over
+    one newline-joined haystack and maps hits back with bisect over `offsets`.
+    """
+
+    __slots__ = ("entries", "keys", "offsets", "haystack")
+
+    def __init__(self, entries: Sequence[NameEntry]):
+        pairs = sorted(((turkish_fold(e[1]), e) for e in entries), key=lambda p: (p[0], p[1][0]))
+        self.keys: List[str] = [k for k, _ in pairs]
+        self.entries: List[NameEntry] = [e for _, e in pairs]
+        self.offsets: List[int] = []
+        pos = 0
+        for k in self.keys:
+            self.offsets.append(pos)
+            pos += len(k) + 1
+        self.haystack = "\n".join(self.keys)
+
+    def prefix(self, needle: str) -> List[NameEntry]:
+        lo = bisect_left(self.keys, needle)
+        hi = bisect_right(self.keys, needle + "\uffff", lo)
+        return self.entries[lo:hi]
+
+    def substring(self, needle: str) -> List[NameEntry]:
+        hits = []
+        last = -1
+        find = self.haystack.find
+        pos = find(needle)
+        while pos != -1:
+            i = bisect_right(self.offsets, pos) - 1
+            if i != last:
+                hits.append(i)
+                last = i
+            # Skip to the start of the next name, one hit per name is enough
+            pos = find(needle, self.offsets[i] + len(self.keys[i]) + 1)
+        return [self.entries[i] for i in hits]
+
+
+class NameIndex:
+    """
+    Immutable in-memory index over baby_names, partitioned by gender.
+    Built once at startup (and after bulk imports); swapped atomically.
+    """
+
+    def __init__(self, entries: Iterable[NameEntry]):
+        entries = list(entries)
+        self.by_id: Dict[int, NameEntry] = {e[0]: e for e in entries}
+        self.all = _Partition(entries)
+        self.partitions = {g: _Partition([e for e in entries if e[2] == g]) for g in GENDERS}
+        self.empty = _Partition([])
+        self.fuzzy = FuzzyNameIndex(entries)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "NameIndex":
+        B = all_models.BabyName
+        rows = db.query(B.id, B.name, B.gender, B.meaning).all()
+        return cls(tuple(r) for r in rows)
+
+    def search(self, gender: Optional[str] = None, search: Optional[str] = None) -> List[NameEntry]:
+        """
+        Names matching `search` as a substring (case-insensitive, Turkish aware),
+        prefix matches first, optionally restricted to one gender.
+        """
+        # Unknown gender: no matches, like the SQL filter it replaced
+        part = self.partitions.get(gender, self.empty) if gender else self.all
+        if not search:
+            return part.entries
+        needle = turkish_fold(search.replace("\n", " "))
+        prefix_hits = part.prefix(needle)
+        seen = {e[0] for e in prefix_hits}
+        return prefix_hits + [e for e in part.substring(needle) if e[0] not in seen]
+
+    def favorites(self, fav_ids: Set[int], search: Optional[str] = None) -> List[NameEntry]:
+        entries = sorted((self.by_id[i] for i in fav_ids if i in self.by_id), key=lambda e: turkish_fold(e[1]))
+        if search:
+            needle = turkish_fold(search)
+            entries = [e for e in entries if needle in turkish_fold(e[1])]
+        return entries
+
+
+_index = NameIndex([])
+
+
+def get_name_index() -> NameIndex:
+    return _index
+
+
+def rebuild_name_index(db: Session) -> NameIndex:
+    global _index
+    _index = NameIndex.from_db(db)
+    return _index
+
+
+# --- Bulk Loading ---
+def import_names_csv(db: Session, path: str, batch_size: int = 5000) -> int:
+    """
+    Streams a names CSV (columns: name, gender, meaning) into baby_names
+    using batched Core inserts. Rows whose (name, gender) already exist are skipped.
+    Returns the number of inserted rows.
+    """
+    B = all_models.BabyName
+    existing = {(turkish_fold(n), g) for n, g in db.query(B.name, B.gender)}
+    stmt = insert(B)
+    inserted = 0
+    batch = []
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("name") or "").strip()
+            gender = (row.get("gender") or "U").strip().upper()
+            if not name or gender not in GENDERS:
+                continue
+            key = (turkish_fold(name), gender)
+            if key in existing:
+                continue
+            existing.add(key)
+            batch.append({"name": name, "gender": gender, "meaning": (row.get("meaning") or "").strip()})
+            if len(batch) >= batch_size:
+                db.execute(stmt, batch)
+                inserted += len(batch)
+                batch = []
+
+    if batch:
+        db.execute(stmt, batch)
+        inserted += len(batch)
+    db.commit()
+    return inserted
+
+
+if __name__ == "__main__":
+    # Usage: python -m koza_project.core.names names.csv
+    from ..database import SessionLocal
+    from .schema import upgrade_database
+
+    if len(sys.argv) != 2:
+        print("Usage: python -m koza_project.core.names <names.csv>")
+        sys.exit(1)
+
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        count = import_names_csv(db, sys.argv[1])
+        print(f"Imported {count} names. Restart the API to rebuild the in-memory index.")
+    finally:
+        db.close()
@@ -0,0 +1,172 @@
+import csv
+import hashlib
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models import all_models
+from .names import turkish_fold
+
+STATUSES = ("SAFE", "CAUTION", "BANNED")
+
+
+def _dumps(items: List[dict]) -> bytes:
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class NutritionCatalog:
+    """
+    Immutable snapshot of nutrition_items, built at startup.
+
+    - items grouped by category and by status
+    - word-prefix search index over Turkish-folded names (sorted array + bisect)
+    - pre-serialized JSON payloads for the full list and every category
+    - an ETag derived from the full payload, so it only changes on reload
+    """
+
+    def __init__(self, items: List[dict]):
+        self.items = sorted(items, key=lambda i: i["id"])
+        self.folded_names = [turkish_fold(i["name"]) for i in self.items]
+
+        self.by_category: Dict[str, List[int]] = {}
+        self.by_status: Dict[str, List[int]] = {}
+        words: List[Tuple[str, int]] = []
+        for pos, item in enumerate(self.items):
+            self.by_category.setdefault(item["category"], []).append(pos)
+            self.by_status.setdefault(item["status"], []).append(pos)
+            for word in self.folded_names[pos].replace("(", " ").replace(")", " ").split():
+                words.append((word, pos))
+        words.sort()
+        self.word_keys = [w for w, _ in words]
+        self.word_pos = [p for _, p in words]
+
+        self.payload = _dumps(self.items)
+        self.category_payloads = {
+            category: _dumps([self.items[p] for p in positions])
+            for category, positions in self.by_category.items()
+        }
+        self.etag = '"' + hashlib.sha256(self.payload).hexdigest()[:16] + '"'
+
+    def __len__(self):
+        return len(self.items)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "NutritionCatalog":
+        N = all_models.NutritionItem
+        rows = db.query(N.id, N.name, N.category, N.status, N.description).all()
+        return cls([dict(r._mapping) for r in rows])
+
+    def _prefix_positions(self, word: str) -> set:
+        lo = bisect_left(self.word_keys, word)
+        hi = bisect_right(self.word_keys, word + "\uffff", lo)
+        return set(self.word_pos[lo:hi])
+
+    def search(self, text: str) -> List[int]:
+        """
+        Items whose name has a word starting with every query word.
+        Falls back to a plain substring match (the old ILIKE behaviour).
+        """
+        needle = turkish_fold(text).strip()
+        if not needle:
+            return list(range(len(self.items)))
+        positions = None
+        for word in needle.split():
+            hits = self._prefix_positions(word)
+            positions = hits if positions is None else positions & hits
+            if not positions:
+                break
+        if not positions:
+            positions = {p for p, name in enumerate(self.folded_names) if needle in name}
+        return sorted(positions)
+
+    def payload_for(self, search: Optional[str] = None, category: Optional[str] = None,
+                    status: Optional[str] = None) -> bytes:
+        if not search and not status:
+            if not category:
+                return self.payload
+            return self.category_payloads.get(category, b"[]")
+
+        positions = self.search(search) if search else range(len(self.items))
+        if category:
+            allowed = set(self.by_category.get(category, ()))
+            positions = [p for p in positions if p in allowed]
+        if status:
+            allowed = set(self.by_status.get(status, ()))
+            positions = [p for p in positions if p in allowed]
+        return _dumps([self.items[p] for p in positions])
+
+
+_catalog = NutritionCatalog([])
+
+
+def get_nutrition_catalog() -> NutritionCatalog:
+    return _catalog
+
+
+def reload_nutrition_catalog(db: Session) -> NutritionCatalog:
+    global _catalog
+    _catalog = NutritionCatalog.from_db(db)
+    return _catalog
+
+
+# --- Bulk Loading ---
+def import_nutrition_csv(db: Session, path: str, batch_size: int = 5000) -> int:
+    """
+    Streams a food database CSV (columns: name, category, status, description)
+    into nutrition_items using batched Core inserts. Existing names are skipped.
+    Returns the number of inserted rows.
+    """
+    N = all_models.NutritionItem
+    existing = {turkish_fold(n) for (n,) in db.query(N.name)}
+    stmt = insert(N)
+    inserted = 0
+    batch = []
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("name") or "").strip()
+            status = (row.get("status") or "").strip().upper()
+            if not name or status not in STATUSES:
+                continue
+            key = turkish_fold(name)
+            if key in existing:
+                continue
+            existing.add(key)
+            batch.append({
+                "name": name,
+                "category": (row.get("category") or "").strip(),
+                "status": status,
+                "description": (row.get("description") or "").strip()
+            })
+            if len(batch) >= batch_size:
+                db.execute(stmt, batch)
+                inserted += len(batch)
+                batch = []
+
+    if batch:
+        db.execute(stmt, batch)
+        inserted += len(batch)
+    db.commit()
+    return inserted
+
+
+if __name__ == "__main__":
+    # Usage: python -m koza_project.core.nutrition foods.csv
+    from ..database import SessionLocal
+    from .schema import upgrade_database
+
+    if len(sys.argv) != 2:
+        print("Usage: python -m koza_project.core.nutrition <foods.csv>")
+        sys.exit(1)
+
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        count = import_nutrition_csv(db, sys.argv[1])
+        print(f"Imported {count} foods. Restart the API to publish the new catalog.")
+    finally:
+        db.close()
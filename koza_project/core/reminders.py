@@ -0,0 +1,191 @@
+import asyncio
+import heapq
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import update
+
+from ..database import SessionLocal
+from ..models import all_models
+
+# How far ahead the scheduler pulls due reminders from the DB per load.
+WINDOW = timedelta(minutes=15)
+# Upper bound on a single sleep so clock drift / new windows are picked up.
+MAX_SLEEP_SECONDS = 60.0
+
+# Users' local time zone: the default reminder (09:00 the day before) is 09:00 there
+LOCAL_TIMEZONE = ZoneInfo(os.getenv("KOZA_TIMEZONE", "Europe/Istanbul"))
+DEFAULT_REMIND_TIME = time(9, 0)
+
+ReminderEntry = Tuple[datetime, int, int, str, object]  # (remind_at, appointment_id, user_id, doctor, date)
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """remind_at as stored and compared (naive UTC): aware values are converted, naive ones are UTC already."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def default_remind_at(appointment_date: date) -> datetime:
+    """09:00 local time (LOCAL_TIMEZONE) on the day before the appointment, as naive UTC."""
+    local = datetime.combine(appointment_date - timedelta(days=1), DEFAULT_REMIND_TIME, tzinfo=LOCAL_TIMEZONE)
+    return to_utc_naive(local)
+
+
+def build_reminder_message(doctor_name: str, appointment_date) -> str:
+    return f"Hatırlatma: {appointment_date} tarihinde {doctor_name} ile randevun var. 🩺"
+
+
+class ReminderScheduler:
+    """
+    In-process appointment reminder scheduler.
+
+    Only reminders inside the next time window are kept in memory (a min-heap
+    ordered by remind_at). The window is refilled with an indexed range query on
+    (reminder_sent_at, remind_at): only unsent reminders are read, so neither
+    the whole table nor the history of sent reminders is scanned.
+    A reminder is claimed in the DB (reminder_sent_at) before it is sent,
+    which means a restart never re-sends an already delivered reminder.
+    """
+
+    def __init__(self, window: timedelta = WINDOW, session_factory=SessionLocal):
+        self.window = window
+        self.session_factory = session_factory
+        self._heap: List[ReminderEntry] = []
+        self._loaded_until: Optional[datetime] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._notify: Optional[Callable[[int, str], Awaitable[None]]] = None
+
+    # --- Lifecycle ---
+    def start(self, notify: Callable[[int, str], Awaitable[None]]):
+        """Starts the background loop. `notify(user_id, message)` delivers a reminder."""
+        if self._task is not None:
+            return
+        self._notify = notify
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._heap = []
+        self._loaded_until = None
+
+    # --- Public API ---
+    def add(self, appointment: all_models.Appointment):
+        """
+        Registers a freshly committed appointment.
+        Reminders beyond the current window are left to the next window load.
+        A duplicate heap entry is harmless: _claim only succeeds once.
+        """
+        if self._task is None or appointment.remind_at is None:
+            return
+        if appointment.remind_at > datetime.utcnow() + self.window:
+            return
+        heapq.heappush(self._heap, self._entry(appointment))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @property
+    def pending_in_window(self) -> int:
+        return len(self._heap)
+
+    # --- Internals ---
+    @staticmethod
+    def _entry(a) -> ReminderEntry:
+        return (a.remind_at, a.id, a.user_id, a.doctor_name, a.date)
+
+    def _fetch_window(self, now: datetime) -> Tuple[datetime, list]:
+        """
+        Fetches unsent reminders up to now + window (runs in a worker thread).
+        The first load has no lower bound so reminders missed while the app
+        was down are caught up; later loads only fetch the new slice.
+        """
+        horizon = now + self.window
+        A = all_models.Appointment
+        db = self.session_factory()
+        try:
+            query = db.query(A.remind_at, A.id, A.user_id, A.doctor_name, A.date).filter(
+                A.reminder_sent_at.is_(None),
+                A.remind_at <= horizon,
+            )
+            if self._loaded_until is not None:
+                query = query.filter(A.remind_at > self._loaded_until)
+            rows = query.order_by(A.remind_at).all()
+        finally:
+            db.close()
+        return horizon, rows
+
+    async def _load_window(self, now: datetime):
+        horizon, rows = await asyncio.to_thread(self._fetch_window, now)
+        for row in rows:
+            heapq.heappush(self._heap, tuple(row))
+        self._loaded_until = horizon
+
+    def _claim(self, entry: ReminderEntry) -> bool:
+        """
+        Marks the reminder as sent. Returns False if it was already sent
+        or the appointment was rescheduled/removed in the meantime.
+        """
+        remind_at, appointment_id = entry[0], entry[1]
+        A = all_models.Appointment
+        db = self.session_factory()
+        try:
+            result = db.execute(
+                update(A)
+                .where(A.id == appointment_id, A.remind_at == remind_at, A.reminder_sent_at.is_(None))
+                .values(reminder_sent_at=datetime.utcnow())
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    async def _fire_due(self, now: datetime):
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not await asyncio.to_thread(self._claim, entry):
+                continue
+            _, appointment_id, user_id, doctor_name, appointment_date = entry
+            try:
+                await self._notify(user_id, build_reminder_message(doctor_name, appointment_date))
+            except Exception as e:
+                print(f"Reminder delivery failed for appointment {appointment_id}: {e}")
+
+    def _seconds_until_next(self, now: datetime) -> float:
+        next_event = self._loaded_until
+        if self._heap and self._heap[0][0] < next_event:
+            next_event = self._heap[0][0]
+        return min(MAX_SLEEP_SECONDS, max(0.0, (next_event - now).total_seconds()))
+
+    async def _run(self):
+        while True:
+            try:
+                now = datetime.utcnow()
+                if self._loaded_until is None or now >= self._loaded_until:
+                    await self._load_window(now)
+                await self._fire_due(now)
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._seconds_until_next(datetime.utcnow()))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Reminder scheduler error: {e}")
+                await asyncio.sleep(MAX_SLEEP_SECONDS)
+
+
+scheduler = ReminderScheduler()
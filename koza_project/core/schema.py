@@ -0,0 +1,72 @@
+"""
+Schema management through Alembic (koza_project/migrations).
+
+Usage:
+    python -m koza_project.core.schema            # upgrade to the latest revision
+    python -m koza_project.core.schema --check    # exit 1 if migrations are pending
+"""
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+from ..database import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "alembic.ini")
+# Revision matching the schema that create_all produced before migrations existed
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    return config
+
+
+def current_revision(connection):
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def upgrade_database(bind=engine) -> str:
+    """
+    Brings the database to the head revision. A database that has tables but
+    no alembic_version (built by create_all) is stamped as the baseline first.
+    Upgrading the main database also upgrades the tracker shards, if any.
+    Returns the revision it is at afterwards.
+    """
+    with bind.begin() as connection:
+        config = alembic_config(connection)
+        if current_revision(connection) is None and inspect(connection).has_table("users"):
+            print(f"Existing database without migration history: stamping {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+        revision = current_revision(connection)
+    if bind is engine:
+        from .shards import tracker_shards
+
+        tracker_shards.migrate()
+    return revision
+
+
+def pending_migrations(bind=engine) -> bool:
+    with bind.connect() as connection:
+        return current_revision(connection) != head_revision()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--check"]:
+        pending = pending_migrations()
+        print("Migrations pending" if pending else "Database is up to date")
+        sys.exit(1 if pending else 0)
+    if len(sys.argv) != 1:
+        print("Usage: python -m koza_project.core.schema [--check]")
+        sys.exit(1)
+    print(f"Database at revision {upgrade_database()}")
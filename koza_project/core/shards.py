@@ -0,0 +1,284 @@
+"""
+Optional user-sharded SQLite storage for the per-user tracking tables.
+
+With KOZA_TRACKER_SHARDS=N (N > 0, SQLite only) water, kick, weight and
+daily logs live in N files next to koza.db (koza_tracker_<i>.db), chosen by
+a jump consistent hash of user_id. Every shard has its own write and read
+pools, so tracker writes of different users no longer wait for one write
+lock. Users, forum, names, nutrition and photos stay in the main database.
+
+Usage (maintenance, with the API stopped):
+    python -m koza_project.core.shards status
+    python -m koza_project.core.shards rebalance --from 0 --to 4   # main db -> 4 shards
+    python -m koza_project.core.shards rebalance --from 4 --to 6   # moves ~1/3 of the users
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..database import (SQLALCHEMY_DATABASE_URL, ReadSessionLocal, SessionLocal, create_sqlite_engine,
+                        read_engine)
+from ..models import all_models
+from . import group_commit
+
+T = TypeVar("T")
+
+# 0 = off: the tracking tables stay in the main database
+SHARD_COUNT = int(os.getenv("KOZA_TRACKER_SHARDS", "0"))
+SHARD_DIR = os.getenv("KOZA_SHARD_DIR") or (
+    os.path.dirname(make_url(SQLALCHEMY_DATABASE_URL).database or "") or "."
+)
+SHARDED_MODELS = (all_models.WaterLog, all_models.KickLog, all_models.WeightLog, all_models.DailyLog)
+# Each shard only takes its own users' writes: small pools
+SHARD_WRITE_POOL_SIZE = 2
+SHARD_READ_POOL_SIZE = 4
+# Users moved per transaction by the rebalance tool
+REBALANCE_BATCH_USERS = 500
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach): going from N to N+1 buckets moves
+    only 1/(N+1) of the keys, all of them into the new bucket.
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_path(index: int, directory: str = SHARD_DIR) -> str:
+    return os.path.join(directory, f"koza_tracker_{index}.db")
+
+
+class Shard:
+    def __init__(self, index: int, path: str):
+        self.index = index
+        self.path = path
+        url = f"sqlite:///{path}"
+        self.engine = create_sqlite_engine(url, pool_size=SHARD_WRITE_POOL_SIZE)
+        self.read_engine = create_sqlite_engine(url, readonly=True, pool_size=SHARD_READ_POOL_SIZE)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.read_engine)
+
+
+class ShardRouter:
+    """
+    Maps a user to the database holding their tracking rows. With count=0
+    that is the main database, so callers do not branch on the setting.
+    """
+
+    def __init__(self, count: int = SHARD_COUNT, directory: str = SHARD_DIR):
+        if count and not SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+            print("KOZA_TRACKER_SHARDS is for SQLite only: tracking tables stay in the main database")
+            count = 0
+        self.count = count
+        self.shards: List[Shard] = [Shard(i, shard_path(i, directory)) for i in range(count)]
+        for shard in self.shards:
+            # Each shard gets its own group-commit writer (started with the main one)
+            group_commit.writers[shard.engine] = group_commit.GroupCommitWriter(shard.engine)
+
+    @property
+    def enabled(self) -> bool:
+        return self.count > 0
+
+    def shard_for(self, user_id: int) -> Optional[Shard]:
+        """None when sharding is off (the main database)."""
+        return self.shards[jump_hash(user_id, self.count)] if self.enabled else None
+
+    def session(self, user_id: int, readonly: bool = False) -> Session:
+        shard = self.shard_for(user_id)
+        if shard is None:
+            return ReadSessionLocal() if readonly else SessionLocal()
+        return shard.ReadSessionLocal() if readonly else shard.SessionLocal()
+
+    def location(self, user_id: int) -> str:
+        """Database file holding the user's rows (rebalance compares these)."""
+        shard = self.shard_for(user_id)
+        return shard.path if shard else make_url(SQLALCHEMY_DATABASE_URL).database
+
+    def locations(self) -> List[tuple]:
+        """(path, sessionmaker) of every database holding tracking rows."""
+        if not self.enabled:
+            return [(make_url(SQLALCHEMY_DATABASE_URL).database, SessionLocal)]
+        return [(shard.path, shard.SessionLocal) for shard in self.shards]
+
+    # --- Cross-user jobs ---
+    def scatter_gather(self, fn: Callable[[Session], T], readonly: bool = True) -> List[T]:
+        """
+        Runs fn(session) against every shard in parallel threads and returns
+        the results in shard order (one call on the main database when off).
+        For the rare cross-user jobs, e.g. the water reminder sweep.
+        """
+        def run(factory):
+            db = factory()
+            try:
+                return fn(db)
+            finally:
+                db.close()
+
+        if not self.enabled:
+            return [run(ReadSessionLocal if readonly else SessionLocal)]
+        factories = [s.ReadSessionLocal if readonly else s.SessionLocal for s in self.shards]
+        with ThreadPoolExecutor(max_workers=self.count, thread_name_prefix="shard") as pool:
+            return list(pool.map(run, factories))
+
+    def gather_rows(self, statement) -> list:
+        """scatter_gather for a single SELECT: the rows of every shard, concatenated."""
+        return [row for rows in self.scatter_gather(lambda db: db.execute(statement).all()) for row in rows]
+
+    # --- Lifecycle ---
+    def migrate(self):
+        from .schema import upgrade_database
+
+        # Same migrations as the main database; only the tracking tables are used
+        for shard in self.shards:
+            upgrade_database(bind=shard.engine)
+
+    def dispose(self):
+        for shard in self.shards:
+            shard.engine.dispose()
+            shard.read_engine.dispose()
+
+
+tracker_shards = ShardRouter()
+
+
+@contextmanager
+def tracker_session(db: Session, user_id: int):
+    """
+    Session for the user's tracking rows: `db` itself when sharding is off,
+    otherwise a session on the user's shard (read-only if `db` is).
+    """
+    if not tracker_shards.enabled:
+        yield db
+        return
+    session = tracker_shards.session(user_id, readonly=db.get_bind() is read_engine)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+# --- Rebalance ---
+def _columns(model) -> list:
+    # Rows get new ids in their new database (ids are only unique per file)
+    return [c for c in model.__table__.columns if not c.primary_key]
+
+
+def rebalance(source: ShardRouter, target: ShardRouter, batch_users: int = REBALANCE_BATCH_USERS) -> Counter:
+    """
+    Moves every user's tracking rows from the `source` layout to the `target`
+    layout. Per batch of users: the copies are written to their new database
+    first (replacing leftovers of an interrupted run), then deleted from the
+    old one, so the tool can be re-run after a crash. Run with the API stopped.
+
+    The user's tracker tombstones move along. Copies get new ids, so they are
+    stamped updated_at=now behind a table-wide tombstone: the next delta sync
+    drops the cached rows and downloads the copies.
+    """
+    from .sync import record_deletion  # core.sync imports this module
+
+    target.migrate()
+    Deleted = all_models.DeletedRow.__table__
+    deleted_columns = _columns(all_models.DeletedRow)
+    moved: Counter = Counter()
+    for path, source_session in source.locations():
+        db = source_session()
+        try:
+            for model in SHARDED_MODELS:
+                table = model.__table__
+                tombstones = (Deleted.c.table_name == table.name)
+                # Users with only tombstones left in this table move too
+                owners = select(table.c.user_id).union(select(Deleted.c.user_id).where(tombstones))
+                user_ids = [u for (u,) in db.execute(owners)
+                            if u is not None and target.location(u) != path]
+                columns = _columns(model)
+                for start in range(0, len(user_ids), batch_users):
+                    batch = user_ids[start:start + batch_users]
+                    now = datetime.utcnow()
+                    rows = db.execute(select(*columns).where(table.c.user_id.in_(batch))).mappings().all()
+                    deleted = db.execute(select(*deleted_columns)
+                                         .where(Deleted.c.user_id.in_(batch), tombstones)).mappings().all()
+                    # New database -> (its users in this batch, their rows, their tombstones)
+                    by_target: Dict[str, tuple] = {}
+                    for user_id in batch:
+                        by_target.setdefault(target.location(user_id), ([], [], []))[0].append(user_id)
+                    for row in rows:
+                        by_target[target.location(row["user_id"])][1].append(dict(row, updated_at=now))
+                    for row in deleted:
+                        by_target[target.location(row["user_id"])][2].append(dict(row))
+                    for users, target_rows, target_deleted in by_target.values():
+                        out = target.session(users[0])
+                        try:
+                            out.execute(delete(table).where(table.c.user_id.in_(users)))
+                            out.execute(delete(Deleted).where(Deleted.c.user_id.in_(users), tombstones))
+                            if target_rows:
+                                out.connection().execute(insert(table), target_rows)
+                            if target_deleted:
+                                out.connection().execute(insert(Deleted), target_deleted)
+                            for user_id in users:
+                                record_deletion(out, user_id, table.name)
+                            out.commit()
+                        finally:
+                            out.close()
+                    db.execute(delete(table).where(table.c.user_id.in_(batch)))
+                    db.execute(delete(Deleted).where(Deleted.c.user_id.in_(batch), tombstones))
+                    db.commit()
+                    moved[model.__tablename__] += len(rows)
+                    moved[Deleted.name] += len(deleted)
+        finally:
+            db.close()
+    return moved
+
+
+def status(router: ShardRouter) -> Dict[str, Counter]:
+    counts = {}
+    for path, session in router.locations():
+        db = session()
+        try:
+            counts[path] = Counter({
+                m.__tablename__: db.execute(select(func.count()).select_from(m.__table__)).scalar()
+                for m in SHARDED_MODELS
+            })
+        finally:
+            db.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="Rows per shard for the current KOZA_TRACKER_SHARDS")
+    move = commands.add_parser("rebalance", help="Move tracking rows between shard layouts")
+    move.add_argument("--from", dest="source", type=int, required=True, help="Current shard count (0 = main db)")
+    move.add_argument("--to", dest="target", type=int, required=True, help="New shard count (0 = main db)")
+    move.add_argument("--dir", default=SHARD_DIR, help="Directory of the shard files")
+    args = parser.parse_args()
+
+    from .schema import upgrade_database
+
+    upgrade_database()
+    if args.command == "status":
+        for path, counts in status(tracker_shards).items():
+            print(f"{path}: " + ", ".join(f"{table} {n:,}" for table, n in sorted(counts.items())))
+        sys.exit(0)
+
+    source, target = ShardRouter(args.source, args.dir), ShardRouter(args.target, args.dir)
+    moved = rebalance(source, target)
+    print(f"Moved {sum(moved.values()):,} rows: {dict(moved)}")
+    for path, counts in status(target).items():
+        print(f"{path}: {sum(counts.values()):,} rows")
+    print(f"Restart the API with KOZA_TRACKER_SHARDS={args.target}")
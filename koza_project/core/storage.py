@@ -0,0 +1,277 @@
+"""
+Pluggable blob storage for uploads.
+
+KOZA_STORAGE_BACKEND=local (default) keeps files under koza_project/static and
+serves them from /static. KOZA_STORAGE_BACKEND=s3 stores them in an
+S3-compatible bucket (AWS, MinIO, or a local moto server for testing):
+
+    KOZA_S3_BUCKET, KOZA_S3_ENDPOINT_URL, KOZA_S3_REGION,
+    KOZA_S3_PUBLIC_URL (optional CDN/public base, otherwise pre-signed GETs)
+
+Both backends hand out pre-signed upload and download URLs, so image bytes
+can go straight between the client and the storage.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode
+
+from starlette.responses import RedirectResponse
+
+from .assets import PrecompressedStaticFiles
+from .tokens import AUTH_SECRET
+
+LOCAL_ROOT = os.path.join(os.path.dirname(__file__), "..", "static")
+PRESIGN_EXPIRES_SECONDS = 15 * 60
+DOWNLOAD_EXPIRES_SECONDS = 60 * 60
+
+# Signs the local backend's upload URLs. Without KOZA_STORAGE_SECRET it is derived from the
+# required KOZA_AUTH_SECRET, so every worker (and a restarted one) accepts the same URLs.
+STORAGE_SECRET = os.getenv("KOZA_STORAGE_SECRET") or hmac.new(AUTH_SECRET, b"koza-storage", hashlib.sha256).hexdigest()
+
+
+class StorageBackend:
+    """Interface shared by the local and S3 backends. Keys look like 'blobs/ab/cd/<sha>.png'."""
+
+    is_local = False
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def read_head(self, key: str, length: int) -> bytes:
+        raise NotImplementedError
+
+    def put_file(self, local_path: str, key: str, content_type: str):
+        """Stores a local file under `key`. The local file is consumed (moved or deleted)."""
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+    def list_keys(self, prefix: str) -> Iterator[Tuple[str, float]]:
+        """Yields (key, last_modified_epoch)."""
+        raise NotImplementedError
+
+    @contextmanager
+    def local_copy(self, key: str):
+        """A local file path with the object's content (for thumbnailing)."""
+        raise NotImplementedError
+
+    def url_for(self, key: str) -> str:
+        raise NotImplementedError
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256: str) -> Dict[str, object]:
+        """
+        Returns {"method", "url", "headers"} for a direct upload of exactly
+        `size` bytes whose SHA-256 must equal `sha256`.
+        """
+        raise NotImplementedError
+
+    def static_app(self):
+        """ASGI app mounted at /static."""
+        raise NotImplementedError
+
+
+# --- Local filesystem ---
+def sign_local_upload(key: str, content_type: str, size: int, sha256: str, expires: int) -> str:
+    message = f"{key}\n{content_type}\n{size}\n{sha256}\n{expires}".encode()
+    return hmac.new(STORAGE_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+
+class LocalStorage(StorageBackend):
+    is_local = True
+
+    def __init__(self, root: str = LOCAL_ROOT, url_prefix: str = "/static/"):
+        self.root = root
+        self.url_prefix = url_prefix
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def read_head(self, key, length):
+        with open(self.path(key), "rb") as f:
+            return f.read(length)
+
+    def put_file(self, local_path, key, content_type):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(local_path, target)
+
+    def delete_prefix(self, prefix):
+        folder_key, name_prefix = prefix.rsplit("/", 1)
+        folder = self.path(folder_key)
+        if not os.path.isdir(folder):
+            return
+        for name in os.listdir(folder):
+            if name.startswith(name_prefix):
+                try:
+                    os.remove(os.path.join(folder, name))
+                except FileNotFoundError:
+                    pass
+
+    def list_keys(self, prefix):
+        base = self.path(prefix) if prefix else self.root
+        for root, dirs, files in os.walk(base):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                full = os.path.join(root, name)
+                try:
+                    mtime = os.path.getmtime(full)
+                except FileNotFoundError:
+                    continue
+                yield os.path.relpath(full, self.root).replace(os.sep, "/"), mtime
+
+    @contextmanager
+    def local_copy(self, key):
+        yield self.path(key)
+
+    def url_for(self, key):
+        return self.url_prefix + key
+
+    def presign_upload(self, key, content_type, size, sha256):
+        expires = int(time.time()) + PRESIGN_EXPIRES_SECONDS
+        query = urlencode({
+            "key": key, "content_type": content_type, "size": size, "sha256": sha256,
+            "expires": expires, "sig": sign_local_upload(key, content_type, size, sha256, expires)
+        })
+        # No separate storage server locally: the API accepts the signed PUT itself
+        return {"method": "PUT", "url": f"/api/storage/upload?{query}", "headers": {"Content-Type": content_type}}
+
+    def static_app(self):
+        # Blob names are content hashes, so they never change under the same URL
+        blob_dir = os.path.realpath(self.path("blobs")) + os.sep
+        return PrecompressedStaticFiles(directory=self.root, immutable=lambda path: path.startswith(blob_dir))
+
+
+# --- S3 compatible ---
+class S3Storage(StorageBackend):
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, region: Optional[str] = None,
+                 public_url: Optional[str] = None):
+        import boto3  # Optional dependency, only needed for KOZA_STORAGE_BACKEND=s3
+
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def size(self, key):
+        head = self._head(key)
+        return head["ContentLength"] if head else None
+
+    def read_head(self, key, length):
+        obj = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=0-{length - 1}")
+        return obj["Body"].read()
+
+    def put_file(self, local_path, key, content_type):
+        self.client.upload_file(local_path, self.bucket, key, ExtraArgs={
+            "ContentType": content_type,
+            # Content-addressed keys never change, so they can be cached forever
+            "CacheControl": "public, max-age=31536000, immutable",
+        })
+        os.remove(local_path)
+
+    def delete_prefix(self, prefix):
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            keys = [{"Key": o["Key"]} for o in page.get("Contents", [])]
+            if keys:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": keys})
+
+    def list_keys(self, prefix):
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            for o in page.get("Contents", []):
+                yield o["Key"], o["LastModified"].timestamp()
+
+    @contextmanager
+    def local_copy(self, key):
+        folder = tempfile.mkdtemp(prefix="koza-")
+        path = os.path.join(folder, os.path.basename(key))
+        try:
+            self.client.download_file(self.bucket, key, path)
+            yield path
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def url_for(self, key):
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=DOWNLOAD_EXPIRES_SECONDS
+        )
+
+    def presign_upload(self, key, content_type, size, sha256):
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        # Length and checksum are signed: S3 rejects any other size or content
+        url = self.client.generate_presigned_url("put_object", Params={
+            "Bucket": self.bucket, "Key": key, "ContentType": content_type,
+            "ContentLength": size, "ChecksumSHA256": checksum,
+            "CacheControl": "public, max-age=31536000, immutable",
+        }, ExpiresIn=PRESIGN_EXPIRES_SECONDS)
+        return {"method": "PUT", "url": url, "headers": {
+            "Content-Type": content_type,
+            "x-amz-checksum-sha256": checksum,
+            "Cache-Control": "public, max-age=31536000, immutable",
+        }}
+
+    def static_app(self):
+        storage = self
+
+        async def app(scope, receive, send):
+            # Old /static/<key> links redirect to the bucket
+            key = scope["path"].lstrip("/")
+            await RedirectResponse(storage.url_for(key), status_code=307)(scope, receive, send)
+        return app
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def create_storage() -> StorageBackend:
+    backend = os.getenv("KOZA_STORAGE_BACKEND", "local").lower()
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.environ["KOZA_S3_BUCKET"],
+            endpoint_url=os.getenv("KOZA_S3_ENDPOINT_URL"),
+            region=os.getenv("KOZA_S3_REGION"),
+            public_url=os.getenv("KOZA_S3_PUBLIC_URL"),
+        )
+    return LocalStorage()
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
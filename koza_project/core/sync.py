@@ -0,0 +1,199 @@
+"""
+Delta sync: what changed for one user since a cursor (GET /api/sync/changes).
+
+Each source (the user's logs, profile, favorites, new forum posts and the
+deletion tombstones) is read with a keyset on (updated_at, id) through its
+(user_id, updated_at) index, at most PAGE_SIZE rows per source and call.
+The cursor is opaque to clients: a watermark, plus the position of every
+source that was cut off by the page size (has_more).
+
+Writes stamp updated_at before they commit, so a row can become visible
+with a timestamp slightly in the past. The watermark therefore stays
+SAFETY_LAG behind the server clock: the next call re-sends the last few
+seconds (clients upsert by id) instead of missing a late commit.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..models import all_models
+from .shards import tracker_session, tracker_shards
+from .storage import get_storage
+
+PAGE_SIZE = 500
+SAFETY_LAG = timedelta(seconds=5)
+# First sync: forum posts of the last week (older ones through /api/forum/posts)
+FORUM_INITIAL_WINDOW = timedelta(days=7)
+EPOCH = datetime(1970, 1, 1)
+
+Position = Tuple[datetime, int]  # (updated_at, id) of the last row sent
+
+M = all_models
+# name -> (model, columns); all keyed by user_id, tracker tables live in the user's shard
+USER_SOURCES = {
+    "water_logs": (M.WaterLog, ("id", "amount_ml", "created_at", "updated_at")),
+    "kick_logs": (M.KickLog, ("id", "start_time", "end_time", "total_kicks", "note", "created_at", "updated_at")),
+    "weight_logs": (M.WeightLog, ("id", "weight_kg", "week_no", "date", "created_at", "updated_at")),
+    "daily_logs": (M.DailyLog, ("id", "date", "water_intake_ml", "mood", "weight_kg", "updated_at")),
+    "photo_logs": (M.PhotoLog, ("id", "week", "photo_path", "created_at", "updated_at")),
+    "appointments": (M.Appointment, ("id", "doctor_name", "date", "notes", "remind_at", "created_at", "updated_at")),
+}
+TRACKER_SOURCES = {m.__tablename__ for m in (M.WaterLog, M.KickLog, M.WeightLog, M.DailyLog)}
+PROFILE_COLUMNS = (
+    "id", "name", "email", "last_period_date", "estimated_due_date", "badge", "water_reminder_enabled",
+    "notify_forum_replies", "notify_weekly_summary", "auto_anonymous_post", "height_cm", "baby_name",
+    "pregnancy_count", "city", "district", "updated_at",
+)
+PROFILE_DETAIL_COLUMNS = (
+    "id", "height_cm", "starting_weight_kg", "birth_date", "city", "district", "baby_name",
+    "pregnancy_count", "updated_at",
+)
+POST_COLUMNS = ("id", "title", "content", "author_id", "category", "is_flagged", "created_at", "updated_at")
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+# --- Cursor ---
+def _micros(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+def encode_cursor(watermark: datetime, positions: Dict[str, Position]) -> str:
+    data = {"w": _micros(watermark)}
+    if positions:
+        data["p"] = {name: [_micros(ts), row_id] for name, (ts, row_id) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Dict[str, Position]]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        positions = {name: (_from_micros(ts), int(row_id)) for name, (ts, row_id) in data.get("p", {}).items()}
+        return _from_micros(data["w"]), positions
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError, OverflowError):
+        raise InvalidCursor("Invalid sync cursor")
+
+
+# --- Reading ---
+def _page(db: Session, model, columns, where, start: Position, stamp: str = "updated_at", limit: int = PAGE_SIZE):
+    """Rows after `start` in (stamp, id) order; one more than `limit` tells that the page was cut off."""
+    stamp_col = getattr(model, stamp)
+    query = (select(*(getattr(model, c) for c in columns))
+             .where(*where, tuple_(stamp_col, model.id) > tuple_(literal(start[0]), literal(start[1])))
+             .order_by(stamp_col, model.id).limit(limit + 1))
+    result = db.execute(query)
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+class Changeset:
+    def __init__(self, cursor: Optional[str], now: datetime):
+        self.full = cursor is None
+        self.watermark, self.positions = decode_cursor(cursor) if cursor else (None, {})
+        self.now = now
+        self.next_positions: Dict[str, Position] = {}
+        self.changes: Dict[str, object] = {}
+        self.deleted: List[dict] = []
+
+    def start(self, name: str) -> Position:
+        if name in self.positions:
+            return self.positions[name]
+        if self.watermark is not None:
+            return (self.watermark, 0)
+        return (self.now - FORUM_INITIAL_WINDOW, 0) if name == "forum_posts" else (EPOCH, 0)
+
+    def take(self, name: str, rows: List[dict], stamp: str = "updated_at") -> List[dict]:
+        """Trims the look-ahead row and remembers where a cut-off source continues."""
+        if len(rows) > PAGE_SIZE:
+            rows = rows[:PAGE_SIZE]
+            self.next_positions[name] = (rows[-1][stamp], rows[-1]["id"])
+        return rows
+
+    def result(self) -> dict:
+        watermark = self.now - SAFETY_LAG
+        if self.watermark is not None:
+            watermark = max(watermark, self.watermark)  # never move back (clock steps)
+        return {
+            "cursor": encode_cursor(watermark, self.next_positions),
+            "has_more": bool(self.next_positions),
+            "full": self.full,
+            "changes": self.changes,
+            "deleted": self.deleted,
+        }
+
+
+def _tombstones(changes: Changeset, db: Session, user_id: int, name: str) -> bool:
+    """Adds the deletions of one database; True if favorites were removed."""
+    D = all_models.DeletedRow
+    rows = changes.take(name, _page(db, D, ("id", "table_name", "row_id", "deleted_at"), [D.user_id == user_id],
+                                    changes.start(name), stamp="deleted_at"), stamp="deleted_at")
+    favorites_removed = False
+    for row in rows:
+        if row["table_name"] == all_models.FavoriteName.__tablename__:
+            favorites_removed = True  # favorites are re-sent as a whole set
+        else:
+            changes.deleted.append({"table": row["table_name"], "id": row["row_id"]})
+    return favorites_removed
+
+
+def collect_changes(db: Session, user_id: int, cursor: Optional[str] = None) -> dict:
+    """
+    The calling user's changes since `cursor` (everything without one; the
+    client then replaces its cache, `full` is true). Raises InvalidCursor.
+    """
+    changes = Changeset(cursor, datetime.utcnow())
+
+    User, Profile = all_models.User, all_models.UserProfile
+    profile = _page(db, User, PROFILE_COLUMNS, [User.id == user_id], changes.start("profile"))
+    if profile:
+        changes.changes["profile"] = profile[0]
+    details = _page(db, Profile, PROFILE_DETAIL_COLUMNS, [Profile.user_id == user_id], changes.start("profile_details"))
+    if details:
+        changes.changes["profile_details"] = details[0]
+
+    with tracker_session(db, user_id) as tdb:
+        for name, (model, columns) in USER_SOURCES.items():
+            source_db = tdb if name in TRACKER_SOURCES else db
+            rows = changes.take(name, _page(source_db, model, columns, [model.user_id == user_id], changes.start(name)))
+            if name == "photo_logs":
+                storage = get_storage()
+                for row in rows:
+                    row["url"] = storage.url_for(row["photo_path"])
+            if rows:
+                changes.changes[name] = rows
+        favorites_removed = _tombstones(changes, db, user_id, "deleted")
+        if tracker_shards.enabled:
+            favorites_removed |= _tombstones(changes, tdb, user_id, "deleted_tracker")
+
+    # Favorites: the whole (small) set whenever one was added or removed
+    Fav = all_models.FavoriteName
+    if favorites_removed or _page(db, Fav, ("id",), [Fav.user_id == user_id], changes.start("favorites"), limit=0):
+        changes.changes["favorites"] = [i for (i,) in db.execute(
+            select(Fav.baby_name_id).where(Fav.user_id == user_id).order_by(Fav.baby_name_id))]
+
+    Post = all_models.ForumPost
+    posts = changes.take("forum_posts", _page(db, Post, POST_COLUMNS, [], changes.start("forum_posts")))
+    if posts:
+        changes.changes["forum_posts"] = posts
+
+    return changes.result()
+
+
+# --- Writing ---
+def record_deletion(db: Session, user_id: int, table: str, row_id: Optional[int] = None):
+    """
+    Adds a tombstone to `db` (commit with the delete itself). Without
+    row_id it stands for every row of the table for that user.
+    """
+    db.add(all_models.DeletedRow(user_id=user_id, table_name=table, row_id=row_id))
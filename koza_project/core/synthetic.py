@@ -0,0 +1,335 @@
+"""
+Synthetic data for scale testing.
+
+Fills users, user_profiles, forum_posts, forum_comments, water_logs,
+kick_logs, weight_logs, photo_logs, favorite_names and user_blocks with
+plausible shapes: a few authors write most of the forum (power law),
+water is logged several times a day with per-user adherence, kick counting
+starts in the third trimester, texts are Turkish. Rows are written with
+batched Core inserts; new rows are appended after the existing ids.
+
+Photo logs point at a small set of dummy JPEG blobs (stored_blobs rows with
+matching ref counts); --images also writes those files to the storage backend.
+
+Usage:
+    python -m koza_project.core.synthetic --users 100000 --days 60 --images
+"""
+import argparse
+import hashlib
+import io
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from ..database import insert_ignore
+from ..models import all_models
+from .blobstore import CONTENT_TYPES, TMP_DIR, blob_key, ensure_dirs
+from .shards import SHARDED_MODELS, tracker_shards
+from .storage import get_storage
+
+FIRST_NAMES = ["Ayşe", "Fatma", "Zeynep", "Elif", "Merve", "Büşra", "Esra", "Selin", "Derya", "Gül", "Özge",
+               "Şeyma", "Kübra", "Tuğba", "Ebru", "Cansu", "İrem", "Nur", "Hatice", "Emine", "Çiğdem", "Deniz"]
+CITIES = {"İstanbul": ["Kadıköy", "Üsküdar", "Beşiktaş", "Bakırköy", "Ataşehir"],
+          "Ankara": ["Çankaya", "Keçiören", "Yenimahalle"], "İzmir": ["Karşıyaka", "Bornova", "Buca"],
+          "Bursa": ["Nilüfer", "Osmangazi"], "Antalya": ["Muratpaşa", "Konyaaltı"], "Konya": ["Selçuklu", "Meram"]}
+CATEGORY_WEIGHTS = {"Hamilelik Günlüğü": 35, "Beslenme": 20, "Doğum Hazırlıkları": 15, "Bebek Bakımı": 15,
+                    "Dertleşme Köşesi": 15}
+TOPICS = ["mide bulantısı", "bel ağrısı", "demir takviyesi", "ultrason sonucu", "şeker yüklemesi", "bebek odası",
+          "hastane çantası", "normal doğum", "sezaryen", "uyku düzeni", "kilo alımı", "tekme sayımı",
+          "folik asit", "kahve tüketimi", "yüzme", "bebek ismi", "emzirme", "ödem", "kramplar", "aşerme"]
+TITLES = ["{week}. haftada {topic}", "{topic} normal mi?", "{topic} hakkında tavsiye", "{topic} yaşayan var mı?",
+          "Bugün {topic} ile ilgili doktora gittim", "{topic} için ne yapıyorsunuz?"]
+OPENINGS = ["Merhaba anneler,", "Selam kızlar,", "Günaydın herkese,", "Sevgili anne adayları,", "Arkadaşlar,"]
+SENTENCES = ["Son birkaç gündür {topic} yüzünden çok zorlanıyorum.", "Doktorum endişelenecek bir şey olmadığını söyledi.",
+             "Sizde de böyle oldu mu merak ediyorum.", "Eşim çok destek oluyor ama yine de kaygılanıyorum.",
+             "Bebeğim bugün çok hareketliydi, içim rahatladı.", "Bol su içmeye ve yürüyüş yapmaya çalışıyorum.",
+             "Bir sonraki kontrolüm {week}. haftada.", "Önerilerinizi bekliyorum, şimdiden teşekkürler.",
+             "Akşamları durum daha da kötüleşiyor.", "İnternette okuduklarım kafamı karıştırdı."]
+COMMENTS = ["Bende de aynısı oldu, geçiyor merak etme.", "Doktoruna mutlaka danış canım.", "Çok geçmiş olsun 🌸",
+            "Bol su iç ve dinlen, bana çok iyi geldi.", "Biz de aynı haftadayız, takipteyim.",
+            "Ilık duş ve yürüyüş işe yarıyor.", "Allah kolaylık versin, sağlıkla kucağına al.",
+            "Bu çok normal, ikinci trimesterde azaldı bende.", "Ben de merak ediyordum, teşekkürler paylaştığın için.",
+            "Demir ilacını portakal suyuyla içince daha iyi oldu."]
+WATER_AMOUNTS = [150, 200, 250, 330, 500]
+WATER_WEIGHTS = [10, 35, 30, 15, 10]
+
+WRITE_BATCH = 20_000
+POSTER_RATIO = 0.3   # share of users who ever start a topic
+POST_ALPHA = 1.2     # Pareto shape of posts per poster (smaller: heavier tail)
+MAX_POSTS_PER_USER = 2_000
+
+
+# --- Text ---
+def _title(rng: random.Random, week: int) -> str:
+    return rng.choice(TITLES).format(topic=rng.choice(TOPICS), week=week).capitalize()
+
+
+def _content(rng: random.Random, week: int) -> str:
+    topic = rng.choice(TOPICS)
+    body = " ".join(s.format(topic=topic, week=week) for s in rng.sample(SENTENCES, rng.randint(1, 5)))
+    return f"{rng.choice(OPENINGS)} {body}"
+
+
+def _comment(rng: random.Random) -> str:
+    return " ".join(rng.sample(COMMENTS, 1 if rng.random() < 0.7 else 2))
+
+
+# --- Dummy images ---
+def dummy_images(count: int, seed: int = 1) -> List[Tuple[str, str, bytes]]:
+    """`count` distinct small JPEGs as (sha256, ext, bytes)."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    images = []
+    for i in range(count):
+        img = Image.new("RGB", (320, 240), tuple(rng.randrange(256) for _ in range(3)))
+        ImageDraw.Draw(img).ellipse((100, 60, 220, 180), fill=tuple(rng.randrange(256) for _ in range(3)))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=80)
+        data = buf.getvalue()
+        images.append((hashlib.sha256(data).hexdigest(), ".jpg", data))
+    return images
+
+
+def write_images(images: List[Tuple[str, str, bytes]]):
+    """Puts the dummy files into the storage backend at their blob keys (existing ones are kept)."""
+    storage = get_storage()
+    ensure_dirs()
+    for sha, ext, data in images:
+        key = blob_key(sha, ext)
+        if storage.exists(key):
+            continue
+        fd, temp_path = tempfile.mkstemp(dir=TMP_DIR)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        storage.put_file(temp_path, key, CONTENT_TYPES[ext])
+
+
+# --- Generator ---
+class _Writer:
+    """
+    Buffers rows per table and flushes them as Core executemany inserts (not
+    the ORM bulk path). Tracking rows go to their user's shard when
+    KOZA_TRACKER_SHARDS is set (core.shards).
+    """
+
+    def __init__(self, db: Session, batch_size: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.rows: Dict[tuple, list] = {}
+        self.counts: Counter = Counter()
+
+    def add(self, model, row: dict):
+        shard = tracker_shards.shard_for(row["user_id"]) if model in SHARDED_MODELS else None
+        key = (model, shard.index if shard else None)
+        rows = self.rows.setdefault(key, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self.flush(key)
+
+    def _write(self, db: Session, model, rows: list):
+        db.connection().execute(insert(model.__table__), rows)
+        db.commit()
+
+    def flush(self, key=None):
+        for k in [key] if key is not None else list(self.rows):
+            rows = self.rows.pop(k, None)
+            if not rows:
+                continue
+            model, shard_index = k
+            if shard_index is None:
+                self._write(self.db, model, rows)
+            else:
+                shard_db = tracker_shards.shards[shard_index].SessionLocal()
+                try:
+                    self._write(shard_db, model, rows)
+                finally:
+                    shard_db.close()
+            self.counts[model.__tablename__] += len(rows)
+
+
+def _next_id(db: Session, model) -> int:
+    return (db.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def generate(db: Session, users: int, days: int = 30, seed: int = 1, batch_size: int = WRITE_BATCH,
+             image_variants: int = 32, images: Optional[List[Tuple[str, str, bytes]]] = None,
+             now: Optional[datetime] = None) -> Counter:
+    """
+    Appends `users` synthetic users and their activity over the last `days`
+    days (up to `now`, default the current time). Returns the number of
+    inserted rows per table.
+    """
+    rng = random.Random(seed)
+    writer = _Writer(db, batch_size)
+    now = (now or datetime.utcnow()).replace(microsecond=0)
+    today = now.date()
+    window_start = today - timedelta(days=days - 1)
+
+    # Users and profiles
+    first_user = _next_id(db, all_models.User)
+    user_ids = range(first_user, first_user + users)
+    lmps: List[date] = []
+    for uid in user_ids:
+        lmp = today - timedelta(days=rng.randint(10, 285))
+        city = rng.choice(list(CITIES))
+        district = rng.choice(CITIES[city])
+        lmps.append(lmp)
+        writer.add(all_models.User, {
+            "id": uid, "name": f"{rng.choice(FIRST_NAMES)} {uid}", "email": f"synthetic_{uid}@koza.com",
+            "last_period_date": lmp, "estimated_due_date": lmp + timedelta(days=280), "badge": "Yeni Anne",
+            "city": city, "district": district, "pregnancy_count": rng.choices([1, 2, 3], [60, 30, 10])[0],
+        })
+        writer.add(all_models.UserProfile, {
+            "user_id": uid, "height_cm": round(rng.gauss(163, 6), 1), "starting_weight_kg": round(rng.gauss(62, 9), 1),
+            "city": city, "district": district,
+        })
+    writer.flush()
+
+    def week_of(i: int, day: date) -> int:
+        return (day - lmps[i]).days // 7
+
+    # Forum: a minority of users posts, with a heavy tail of very active authors
+    first_post = _next_id(db, all_models.ForumPost)
+    post_id = first_post
+    post_times: List[datetime] = []
+    posters: List[int] = []
+    categories, category_weights = list(CATEGORY_WEIGHTS), list(CATEGORY_WEIGHTS.values())
+    for i, uid in enumerate(user_ids):
+        if rng.random() >= POSTER_RATIO:
+            continue
+        posters.append(uid)
+        for _ in range(min(MAX_POSTS_PER_USER, int(rng.paretovariate(POST_ALPHA)))):
+            created = now - timedelta(seconds=rng.randrange(days * 86400))
+            week = max(1, week_of(i, created.date()))
+            writer.add(all_models.ForumPost, {
+                "id": post_id, "title": _title(rng, week), "content": _content(rng, week),
+                "category": rng.choices(categories, category_weights)[0], "author_id": uid, "created_at": created,
+            })
+            post_times.append(created)
+            post_id += 1
+    writer.flush()
+
+    # Comments: most topics get a few replies, some threads get long; regulars reply more
+    for offset, posted in enumerate(post_times):
+        for _ in range(min(500, int(rng.paretovariate(1.4)) - 1 + rng.randint(0, 2))):
+            author = rng.choice(posters) if posters and rng.random() < 0.5 else rng.choice(user_ids)
+            created = min(now, posted + timedelta(minutes=int(rng.expovariate(1 / 240))))
+            writer.add(all_models.ForumComment, {
+                "post_id": first_post + offset, "author_id": author, "content": _comment(rng),
+                "like_count": int(rng.paretovariate(1.8)) - 1, "is_helpful_count": int(rng.paretovariate(2.5)) - 1,
+                "created_at": created,
+            })
+    writer.flush()
+
+    # Trackers: daily water, third-trimester kick counts, weekly weight and bump photos
+    images = images if images is not None else dummy_images(image_variants, seed)
+    photo_refs: Counter = Counter()
+    for i, uid in enumerate(user_ids):
+        adherence = rng.betavariate(4, 2)
+        for d in range(days):
+            day = window_start + timedelta(days=d)
+            midnight = datetime.combine(day, datetime.min.time())
+            if rng.random() < adherence:
+                drinks = rng.randint(3, 10)
+                amounts = rng.choices(WATER_AMOUNTS, WATER_WEIGHTS, k=drinks)
+                for second, amount in zip(sorted(rng.sample(range(7 * 3600, 23 * 3600), drinks)), amounts):
+                    writer.add(all_models.WaterLog, {
+                        "user_id": uid, "created_at": midnight + timedelta(seconds=second), "amount_ml": amount,
+                    })
+            if week_of(i, day) >= 28 and rng.random() < adherence * 0.8:
+                start = midnight + timedelta(minutes=rng.randint(19 * 60, 22 * 60))
+                end = start + timedelta(minutes=rng.randint(5, 60))
+                writer.add(all_models.KickLog, {
+                    "user_id": uid, "start_time": start, "end_time": end, "total_kicks": rng.randint(6, 25),
+                    "note": None, "created_at": end,
+                })
+
+        start_weight = rng.gauss(62, 9)
+        takes_photos = rng.random() < 0.4
+        for week in range(6, min(41, week_of(i, today) + 1)):
+            day = lmps[i] + timedelta(days=week * 7 + rng.randint(0, 6))
+            if day > today:
+                break
+            if rng.random() < 0.5:
+                gain = min(week, 13) * 0.1 + max(0, week - 13) * 0.45
+                writer.add(all_models.WeightLog, {
+                    "user_id": uid, "weight_kg": round(start_weight + gain + rng.gauss(0, 0.4), 1),
+                    "week_no": week, "date": day, "created_at": datetime.combine(day, datetime.min.time()),
+                })
+            if takes_photos and rng.random() < 0.5:
+                sha, ext, _ = rng.choice(images)
+                photo_refs[(sha, ext)] += 1
+                writer.add(all_models.PhotoLog, {
+                    "user_id": uid, "week": week, "photo_path": blob_key(sha, ext),
+                    "created_at": datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.randint(8, 22)),
+                })
+    writer.flush()
+
+    # Photo logs hold one reference each on their blob
+    sizes = {(sha, ext): len(data) for sha, ext, data in images}
+    Blob = all_models.StoredBlob
+    for (sha, ext), refs in photo_refs.items():
+        db.execute(insert_ignore(db, Blob).values(sha256=sha, ext=ext, size=sizes[(sha, ext)], ref_count=0))
+        db.execute(update(Blob).where(Blob.sha256 == sha).values(ref_count=Blob.ref_count + refs, released_at=None))
+    db.commit()
+
+    # Favorite names and blocks
+    name_ids = [row[0] for row in db.execute(select(all_models.BabyName.id))]
+    for uid in user_ids:
+        if name_ids and rng.random() < 0.5:
+            for name_id in rng.sample(name_ids, min(len(name_ids), rng.randint(1, 15))):
+                writer.add(all_models.FavoriteName, {"user_id": uid, "baby_name_id": name_id})
+        if users > 1 and rng.random() < 0.02:
+            for blocked in {rng.choice(user_ids) for _ in range(rng.randint(1, 3))} - {uid}:
+                writer.add(all_models.UserBlock, {
+                    "blocker_id": uid, "blocked_id": blocked, "created_at": now - timedelta(days=rng.randrange(days)),
+                })
+    writer.flush()
+
+    if db.bind.dialect.name == "postgresql":
+        # Users and posts were inserted with explicit ids: move their sequences past them
+        for table in (all_models.User.__tablename__, all_models.ForumPost.__tablename__):
+            db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+        db.commit()
+    return writer.counts
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal
+    from ..api.routes_names import seed_names
+    from .schema import upgrade_database
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=30, help="Days of tracker history")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=WRITE_BATCH)
+    parser.add_argument("--image-variants", type=int, default=32, help="Distinct dummy photos")
+    parser.add_argument("--images", action="store_true", help="Also write the dummy photos to storage")
+    args = parser.parse_args()
+
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        seed_names(db)  # favorites need baby_names
+        images = dummy_images(args.image_variants, args.seed)
+        if args.images:
+            write_images(images)
+        started = time.perf_counter()
+        counts = generate(db, args.users, args.days, args.seed, args.batch_size, images=images)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    for table, rows in counts.items():
+        print(f"{table:<16} {rows:>12,}")
+    total = sum(counts.values())
+    print(f"Inserted {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)"
+          + (f", wrote {len(images)} dummy photos" if args.images else ""))
@@ -0,0 +1,196 @@
+import asyncio
+import importlib.util
+import os
+import sys
+from typing import Dict, List, Optional
+
+from .storage import get_storage
+
+# Pillow is optional: without it photos are served at original size.
+# It is imported where images are decoded (worker processes), not with the API.
+HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+
+# Longest edge in pixels for each derivative size
+SIZES = {"thumb": 320, "medium": 1280}
+FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}), "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif"}
+
+_pool = None  # ProcessPoolExecutor, created on the first upload
+
+
+def derivative_name(filename: str, size: str, fmt: str) -> str:
+    """photo.png -> photo.thumb.webp (stored next to the original)."""
+    stem = os.path.splitext(filename)[0]
+    ext = "jpg" if fmt == "jpeg" else fmt
+    return f"{stem}.{size}.{ext}"
+
+
+def is_derivative(filename: str) -> bool:
+    stem = os.path.splitext(filename)[0]
+    return os.path.splitext(stem)[1].lstrip(".") in SIZES
+
+
+def generate_derivatives(path: str) -> List[str]:
+    """
+    Writes every missing/outdated size and format for one original image.
+    Runs in a worker process. Idempotent: derivatives newer than the original
+    are left alone. Output carries no EXIF (orientation is applied first).
+    Returns the paths that were (re)generated.
+    """
+    if not HAS_PILLOW:
+        return []
+    from PIL import Image, ImageOps
+
+    folder, filename = os.path.split(path)
+    source_mtime = os.path.getmtime(path)
+    todo = []
+    for size, edge in SIZES.items():
+        for fmt in FORMATS:
+            target = os.path.join(folder, derivative_name(filename, size, fmt))
+            if not os.path.exists(target) or os.path.getmtime(target) < source_mtime:
+                todo.append((edge, fmt, target))
+    if not todo:
+        return []
+
+    written = []
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        for edge, fmt, target in todo:
+            resized = img.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+            pil_format, options = FORMATS[fmt]
+            if pil_format == "JPEG" and resized.mode != "RGB":
+                resized = resized.convert("RGB")
+            tmp = target + ".tmp"
+            # No exif= argument: metadata is not copied into the derivative
+            resized.save(tmp, pil_format, **options)
+            os.replace(tmp, target)
+            written.append(target)
+    return written
+
+
+def derivative_urls(web_path: str, disk_dir: str) -> Dict[str, object]:
+    """
+    Per-size URLs for a legacy photo stored in a local directory. Sizes that
+    are not generated yet (or when Pillow is missing) fall back to the original.
+    """
+    folder, filename = os.path.split(web_path)
+    urls = {"original": web_path}
+    for size in SIZES:
+        urls[size] = {}
+        for fmt in FORMATS:
+            name = derivative_name(filename, size, fmt)
+            exists = os.path.exists(os.path.join(disk_dir, name))
+            urls[size][fmt] = f"{folder}/{name}" if exists else web_path
+    return urls
+
+
+def blob_derivative_urls(key: str, ready: bool) -> Dict[str, object]:
+    """Per-size URLs for a photo in blob storage; `ready` comes from StoredBlob.derivatives_ready."""
+    storage = get_storage()
+    original = storage.url_for(key)
+    folder, filename = key.rsplit("/", 1)
+    urls = {"original": original}
+    for size in SIZES:
+        urls[size] = {
+            fmt: storage.url_for(f"{folder}/{derivative_name(filename, size, fmt)}") if ready else original
+            for fmt in FORMATS
+        }
+    return urls
+
+
+def generate_blob_derivatives(key: str) -> int:
+    """
+    Worker-process job for an image in the storage backend: works on a local
+    copy and uploads the derivatives next to the original when storage is remote.
+    """
+    storage = get_storage()
+    folder = key.rsplit("/", 1)[0]
+    with storage.local_copy(key) as path:
+        written = generate_derivatives(path)
+        if not storage.is_local:
+            for derived in written:
+                name = os.path.basename(derived)
+                mime = "image/webp" if name.endswith(".webp") else "image/jpeg"
+                storage.put_file(derived, f"{folder}/{name}", mime)
+    return len(written)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _pool = ProcessPoolExecutor(max_workers=max(1, min(4, (os.cpu_count() or 2) // 2)))
+    return _pool
+
+
+async def run_blob_derivatives(key: str) -> Optional[int]:
+    """
+    Generates the derivatives of a stored blob on the process pool and
+    returns how many were written (None without Pillow). Awaited by the
+    "blob_derivatives" background job, which retries failures.
+    """
+    if not HAS_PILLOW:
+        return None
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), generate_blob_derivatives, key)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def backfill(directory: str) -> int:
+    """Generates derivatives for every original image in a legacy upload `directory`."""
+    originals = [
+        os.path.join(directory, f) for f in sorted(os.listdir(directory))
+        if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS and not is_derivative(f) and not f.startswith(".")
+    ]
+    from concurrent.futures import ProcessPoolExecutor
+
+    count = 0
+    with ProcessPoolExecutor() as pool:
+        for path, result in zip(originals, pool.map(generate_derivatives, originals, chunksize=8)):
+            if result:
+                count += 1
+                print(f"Generated {len(result)} derivatives for {path}")
+    return count
+
+
+def backfill_blobs() -> int:
+    """Generates derivatives for every blob without them and marks them ready."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    from ..database import SessionLocal
+    from ..models import all_models
+    from .blobstore import blob_key, mark_derivatives_ready
+
+    Blob = all_models.StoredBlob
+    db = SessionLocal()
+    try:
+        pending = db.query(Blob.sha256, Blob.ext).filter(Blob.derivatives_ready.isnot(True)).all()
+    finally:
+        db.close()
+
+    keys = [blob_key(sha, ext) for sha, ext in pending]
+    with ProcessPoolExecutor() as pool:
+        for (sha, _), key, written in zip(pending, keys, pool.map(generate_blob_derivatives, keys, chunksize=8)):
+            mark_derivatives_ready(sha)
+            print(f"Generated {written} derivatives for {key}")
+    return len(keys)
+
+
+if __name__ == "__main__":
+    # Usage: python -m koza_project.core.thumbnails            (blob storage)
+    #        python -m koza_project.core.thumbnails ui/uploads (legacy upload dir)
+    if not HAS_PILLOW:
+        print("Pillow is not installed (pip install Pillow).")
+        sys.exit(1)
+    if len(sys.argv) > 2:
+        print("Usage: python -m koza_project.core.thumbnails [legacy_upload_dir]")
+        sys.exit(1)
+    count = backfill(sys.argv[1]) if len(sys.argv) == 2 else backfill_blobs()
+    print(f"Backfilled {count} photos.")
@@ -0,0 +1,133 @@
+"""
+Personal timeline (GET /api/timeline/{user_id}): a user's water, kick,
+weight, daily and photo logs and forum posts in one list, newest first.
+
+Every source is read as a lazy stream of keyset pages through its
+(user_id, <time>) index, and heapq.merge combines the k sorted streams: a
+page of N entries reads at most about N rows from each source, never a
+whole table. The cursor keeps one position per source (the last entry it
+contributed, null once it ran out), so the next page resumes every source
+where it stopped instead of re-reading or re-merging.
+"""
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..models import all_models
+from .shards import tracker_session
+from .storage import get_storage
+from .sync import InvalidCursor
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# First keyset page per source; doubles while the merge keeps drawing from it
+FIRST_BATCH = 16
+EPOCH = datetime(1970, 1, 1)
+
+Position = Tuple[datetime, int]  # (time, id) of the last entry returned
+
+M = all_models
+# type -> (model, owner column, time column, columns)
+SOURCES = {
+    "water": (M.WaterLog, "user_id", "created_at", ("id", "amount_ml", "created_at")),
+    "kick": (M.KickLog, "user_id", "created_at", ("id", "start_time", "end_time", "total_kicks", "note", "created_at")),
+    "weight": (M.WeightLog, "user_id", "created_at", ("id", "weight_kg", "week_no", "date", "created_at")),
+    "daily": (M.DailyLog, "user_id", "date", ("id", "date", "water_intake_ml", "mood", "weight_kg")),
+    "photo": (M.PhotoLog, "user_id", "created_at", ("id", "week", "photo_path", "created_at")),
+    "post": (M.ForumPost, "author_id", "created_at", ("id", "title", "category", "created_at")),
+}
+TRACKER_SOURCES = {"water", "kick", "weight", "daily"}
+# Sources keyed by a Date: placed at the start of their day
+DATE_SOURCES = {"daily"}
+
+
+# --- Cursor ---
+def encode_cursor(positions: Dict[str, Optional[Position]]) -> str:
+    data = {name: None if pos is None else [(pos[0] - EPOCH) // timedelta(microseconds=1), pos[1]]
+            for name, pos in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Optional[Position]]:
+    """Position per source; a missing source starts from its newest row, None means it is exhausted."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return {name: None if pos is None else (EPOCH + timedelta(microseconds=pos[0]), int(pos[1]))
+                for name, pos in data.items() if name in SOURCES}
+    except (binascii.Error, ValueError, TypeError, IndexError, AttributeError, OverflowError):
+        raise InvalidCursor("Invalid timeline cursor")
+
+
+# --- Reading ---
+def _at(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.combine(value, time.min)
+
+
+def _stream(db: Session, name: str, user_id: int, start: Optional[Position], limit: int,
+            ended: Set[str]) -> Iterator[tuple]:
+    """
+    (time, type, id, row) of one source, newest first, fetched in growing
+    keyset pages. Adds `name` to `ended` once every row has been consumed.
+    """
+    model, owner, stamp, columns = SOURCES[name]
+    stamp_col = getattr(model, stamp)
+    batch = min(FIRST_BATCH, limit)
+    while True:
+        where = [getattr(model, owner) == user_id, stamp_col.is_not(None)]
+        if start is not None:
+            value = start[0].date() if name in DATE_SOURCES else start[0]
+            where.append(tuple_(stamp_col, model.id) < tuple_(literal(value), literal(start[1])))
+        result = db.execute(select(*(getattr(model, c) for c in columns)).where(*where)
+                            .order_by(stamp_col.desc(), model.id.desc()).limit(batch))
+        keys = list(result.keys())
+        rows = [dict(zip(keys, row)) for row in result]
+        for row in rows:
+            yield _at(row[stamp]), name, row["id"], row
+        if len(rows) < batch:
+            ended.add(name)
+            return
+        start = (_at(rows[-1][stamp]), rows[-1]["id"])
+        batch = min(batch * 2, limit)
+
+
+def _entry(name: str, row: dict, at: datetime, storage) -> dict:
+    if name == "photo":
+        row["url"] = storage.url_for(row["photo_path"])
+    return {"type": name, "at": at, "data": row}
+
+
+def collect_timeline(db: Session, user_id: int, cursor: Optional[str] = None, limit: int = PAGE_SIZE) -> dict:
+    """
+    One page of the user's timeline after `cursor` (from the newest entry
+    without one). Raises InvalidCursor.
+    """
+    positions = decode_cursor(cursor) if cursor else {}
+    ended: Set[str] = set()
+    with tracker_session(db, user_id) as tdb:
+        streams = [
+            _stream(tdb if name in TRACKER_SOURCES else db, name, user_id, positions.get(name), limit + 1, ended)
+            for name in SOURCES if not (name in positions and positions[name] is None)
+        ]
+        # One look-ahead entry tells whether there is another page
+        merged = list(islice(heapq.merge(*streams, key=lambda e: e[:3], reverse=True), limit + 1))
+
+    has_more = len(merged) > limit
+    page = merged[:limit]
+    storage = get_storage()
+    for at, name, row_id, _ in page:
+        positions[name] = (at, row_id)
+    # A stream that ended had all of its rows on this page (the look-ahead never ends one)
+    for name in ended:
+        positions[name] = None
+    return {
+        "items": [_entry(name, row, at, storage) for at, name, _, row in page],
+        "cursor": encode_cursor(positions) if has_more else None,
+        "has_more": has_more,
+    }
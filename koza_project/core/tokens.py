@@ -0,0 +1,112 @@
+"""
+Stateless access tokens: "<payload>.<signature>", both base64url.
+The payload is {"sub": user_id, "exp": unix_time}; the signature is
+HMAC-SHA256 over the payload with KOZA_AUTH_SECRET, so verifying a token
+needs no database access.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+ACCESS_TOKEN_TTL_SECONDS = 30 * 24 * 60 * 60
+USER_CACHE_TTL_SECONDS = 60
+USER_CACHE_SIZE = 1024
+
+# Required to serve (check_auth_secret): a random per-process secret would log every user out
+# on each restart and reject tokens issued by another worker. KOZA_DEV_SECRETS=1 allows the
+# random fallback for local development and benchmarks.
+AUTH_SECRET_SET = bool(os.getenv("KOZA_AUTH_SECRET"))
+DEV_SECRETS = os.getenv("KOZA_DEV_SECRETS") == "1"
+AUTH_SECRET = (os.getenv("KOZA_AUTH_SECRET") or base64.urlsafe_b64encode(os.urandom(32)).decode()).encode()
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def check_auth_secret():
+    """Startup check: refuses to serve without KOZA_AUTH_SECRET unless KOZA_DEV_SECRETS=1."""
+    if AUTH_SECRET_SET:
+        return
+    if not DEV_SECRETS:
+        raise RuntimeError("KOZA_AUTH_SECRET is not set: tokens would not survive a restart or work across "
+                           "workers. Set it (e.g. `python -c \"import secrets; print(secrets.token_urlsafe(32))\"`), "
+                           "or KOZA_DEV_SECRETS=1 for local development.")
+    print("WARNING: KOZA_AUTH_SECRET is not set, using a random secret (KOZA_DEV_SECRETS=1): "
+          "tokens are lost on restart and not shared between workers")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(AUTH_SECRET, payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_token(user_id: int, ttl: int = ACCESS_TOKEN_TTL_SECONDS) -> str:
+    payload = _b64encode(json.dumps({"sub": user_id, "exp": int(time.time()) + ttl}, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token: str) -> int:
+    """Returns the user id of a valid, unexpired token. Raises InvalidToken otherwise."""
+    payload, _, signature = token.partition(".")
+    if not payload or not signature:
+        raise InvalidToken("Malformed token")
+    if not hmac.compare_digest(_sign(payload), signature):
+        raise InvalidToken("Bad signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+        user_id, expires = int(claims["sub"]), int(claims["exp"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidToken("Malformed token")
+    if expires < time.time():
+        raise InvalidToken("Token expired")
+    return user_id
+
+
+class TTLCache:
+    """Small thread-safe LRU with per-entry expiry (for detached User rows)."""
+
+    def __init__(self, ttl: float = USER_CACHE_TTL_SECONDS, maxsize: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+user_cache = TTLCache()
@@ -0,0 +1,264 @@
+"""baseline schema
+
+The schema that Base.metadata.create_all built for the original models,
+before migrations existed. Tables and indexes added to the models after that
+(appointments, stored_blobs, the unique favorites index) are created by 0002.
+Databases created that way are stamped with this revision on first start
+(core.schema.upgrade_database) instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 11:52:50.672525
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('baby_names',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('gender', sa.String(), nullable=True),
+    sa.Column('meaning', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_baby_names_id', 'baby_names', ['id'], unique=False)
+    op.create_index('ix_baby_names_name', 'baby_names', ['name'], unique=False)
+
+    op.create_table('nutrition_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_nutrition_items_id', 'nutrition_items', ['id'], unique=False)
+    op.create_index('ix_nutrition_items_name', 'nutrition_items', ['name'], unique=False)
+
+    op.create_table('pregnancy_data',
+    sa.Column('week_number', sa.Integer(), nullable=False),
+    sa.Column('baby_size_comparison', sa.String(), nullable=True),
+    sa.Column('baby_weight_grams', sa.Integer(), nullable=True),
+    sa.Column('baby_length_mm', sa.Integer(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('mother_advice', sa.Text(), nullable=True),
+    sa.Column('nutrition_advice', sa.Text(), nullable=True),
+    sa.Column('image_url', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('week_number')
+    )
+    op.create_index('ix_pregnancy_data_week_number', 'pregnancy_data', ['week_number'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('hashed_password', sa.String(), nullable=True),
+    sa.Column('last_period_date', sa.Date(), nullable=True),
+    sa.Column('estimated_due_date', sa.Date(), nullable=True),
+    sa.Column('badge', sa.String(), nullable=True),
+    sa.Column('water_reminder_enabled', sa.Boolean(), nullable=True),
+    sa.Column('notify_forum_replies', sa.Boolean(), nullable=True),
+    sa.Column('notify_weekly_summary', sa.Boolean(), nullable=True),
+    sa.Column('auto_anonymous_post', sa.Boolean(), nullable=True),
+    sa.Column('height_cm', sa.Float(), nullable=True),
+    sa.Column('baby_name', sa.String(), nullable=True),
+    sa.Column('pregnancy_count', sa.Integer(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('district', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    op.create_index('ix_users_name', 'users', ['name'], unique=False)
+
+    op.create_table('daily_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=True),
+    sa.Column('water_intake_ml', sa.Integer(), nullable=True),
+    sa.Column('mood', sa.String(), nullable=True),
+    sa.Column('weight_kg', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_daily_logs_id', 'daily_logs', ['id'], unique=False)
+
+    op.create_table('favorite_names',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('baby_name_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['baby_name_id'], ['baby_names.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_favorite_names_id', 'favorite_names', ['id'], unique=False)
+
+    op.create_table('forum_posts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('author_id', sa.Integer(), nullable=True),
+    sa.Column('is_flagged', sa.Boolean(), nullable=True),
+    sa.Column('flag_reason', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_forum_posts_category', 'forum_posts', ['category'], unique=False)
+    op.create_index('ix_forum_posts_id', 'forum_posts', ['id'], unique=False)
+    op.create_index('ix_forum_posts_title', 'forum_posts', ['title'], unique=False)
+
+    op.create_table('kick_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=True),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('total_kicks', sa.Integer(), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_kick_logs_id', 'kick_logs', ['id'], unique=False)
+
+    op.create_table('photo_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('week', sa.Integer(), nullable=True),
+    sa.Column('photo_path', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_photo_logs_id', 'photo_logs', ['id'], unique=False)
+
+    op.create_table('user_blocks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('blocker_id', sa.Integer(), nullable=True),
+    sa.Column('blocked_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['blocked_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['blocker_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_user_blocks_id', 'user_blocks', ['id'], unique=False)
+
+    op.create_table('user_profiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('height_cm', sa.Float(), nullable=True),
+    sa.Column('starting_weight_kg', sa.Float(), nullable=True),
+    sa.Column('birth_date', sa.Date(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('district', sa.String(), nullable=True),
+    sa.Column('baby_name', sa.String(), nullable=True),
+    sa.Column('pregnancy_count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index('ix_user_profiles_id', 'user_profiles', ['id'], unique=False)
+
+    op.create_table('water_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('amount_ml', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_water_logs_id', 'water_logs', ['id'], unique=False)
+
+    op.create_table('weight_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('weight_kg', sa.Float(), nullable=True),
+    sa.Column('week_no', sa.Integer(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_weight_logs_id', 'weight_logs', ['id'], unique=False)
+
+    op.create_table('forum_comments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=True),
+    sa.Column('author_id', sa.Integer(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('like_count', sa.Integer(), nullable=True),
+    sa.Column('is_helpful_count', sa.Integer(), nullable=True),
+    sa.Column('is_flagged', sa.Boolean(), nullable=True),
+    sa.Column('flag_reason', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['post_id'], ['forum_posts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_forum_comments_id', 'forum_comments', ['id'], unique=False)
+
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_forum_comments_id', table_name='forum_comments')
+
+    op.drop_table('forum_comments')
+    op.drop_index('ix_weight_logs_id', table_name='weight_logs')
+
+    op.drop_table('weight_logs')
+    op.drop_index('ix_water_logs_id', table_name='water_logs')
+
+    op.drop_table('water_logs')
+    op.drop_index('ix_user_profiles_id', table_name='user_profiles')
+
+    op.drop_table('user_profiles')
+    op.drop_index('ix_user_blocks_id', table_name='user_blocks')
+
+    op.drop_table('user_blocks')
+    op.drop_index('ix_photo_logs_id', table_name='photo_logs')
+
+    op.drop_table('photo_logs')
+    op.drop_index('ix_kick_logs_id', table_name='kick_logs')
+
+    op.drop_table('kick_logs')
+    op.drop_index('ix_forum_posts_title', table_name='forum_posts')
+    op.drop_index('ix_forum_posts_id', table_name='forum_posts')
+    op.drop_index('ix_forum_posts_category', table_name='forum_posts')
+
+    op.drop_table('forum_posts')
+    op.drop_index('ix_favorite_names_id', table_name='favorite_names')
+
+    op.drop_table('favorite_names')
+    op.drop_index('ix_daily_logs_id', table_name='daily_logs')
+
+    op.drop_table('daily_logs')
+    op.drop_index('ix_users_name', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+
+    op.drop_table('users')
+    op.drop_index('ix_pregnancy_data_week_number', table_name='pregnancy_data')
+
+    op.drop_table('pregnancy_data')
+    op.drop_index('ix_nutrition_items_name', table_name='nutrition_items')
+    op.drop_index('ix_nutrition_items_id', table_name='nutrition_items')
+
+    op.drop_table('nutrition_items')
+    op.drop_index('ix_baby_names_name', table_name='baby_names')
+    op.drop_index('ix_baby_names_id', table_name='baby_names')
+
+    op.drop_table('baby_names')
@@ -0,0 +1,103 @@
+"""appointments, stored blobs, unique favorites and hot path composite indexes
+
+Tables and indexes the models gained before migrations existed: persisted
+appointments (reminders), content-addressed upload blobs and the unique
+(user_id, baby_name_id) favorites index. Duplicate favorites left by the old
+select-then-insert toggle are dropped before that index is created.
+
+Then the hot path indexes: per-user tracker lookups, comments of a post,
+per-author forum stats and block checks. favorite_names.user_id is covered
+by ux_favorite_names_user_name (user_id first).
+
+Everything is created only if missing: a database built by create_all from
+newer models (stamped 0001) may already have some of it.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_water_logs_user_created', 'water_logs', ['user_id', 'created_at']),
+    ('ix_weight_logs_user_date', 'weight_logs', ['user_id', 'date']),
+    ('ix_kick_logs_user_created', 'kick_logs', ['user_id', 'created_at']),
+    ('ix_photo_logs_user_week', 'photo_logs', ['user_id', 'week']),
+    ('ix_daily_logs_user_date', 'daily_logs', ['user_id', 'date']),
+    ('ix_forum_comments_post_created', 'forum_comments', ['post_id', 'created_at']),
+    ('ix_forum_comments_author_likes', 'forum_comments', ['author_id', 'like_count']),
+    ('ix_forum_posts_author_created', 'forum_posts', ['author_id', 'created_at']),
+    ('ix_user_blocks_blocker_blocked', 'user_blocks', ['blocker_id', 'blocked_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('appointments'):
+        op.create_table('appointments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('doctor_name', sa.String(), nullable=True),
+        sa.Column('date', sa.Date(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('remind_at', sa.DateTime(), nullable=True),
+        sa.Column('reminder_sent_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_appointments_id', 'appointments', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_appointments_remind_at', 'appointments', ['remind_at'], unique=False, if_not_exists=True)
+    op.create_index('ix_appointments_user_id', 'appointments', ['user_id'], unique=False, if_not_exists=True)
+
+    if not inspector.has_table('stored_blobs'):
+        op.create_table('stored_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('ext', sa.String(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=True),
+        sa.Column('released_at', sa.DateTime(), nullable=True),
+        sa.Column('derivatives_ready', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+        )
+    op.create_index('ix_stored_blobs_ref_count', 'stored_blobs', ['ref_count'], unique=False, if_not_exists=True)
+
+    if 'ux_favorite_names_user_name' not in {i['name'] for i in inspector.get_indexes('favorite_names')}:
+        favorites = sa.table('favorite_names', sa.column('id'), sa.column('user_id'), sa.column('baby_name_id'))
+        keep = sa.select(sa.func.min(favorites.c.id)).group_by(favorites.c.user_id, favorites.c.baby_name_id)
+        op.execute(favorites.delete().where(favorites.c.id.not_in(keep)))
+        op.create_index('ux_favorite_names_user_name', 'favorite_names', ['user_id', 'baby_name_id'], unique=True)
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+    # Fresh statistics so the planner prefers the new indexes (sampled: fast on big tables)
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('PRAGMA analysis_limit=1000')
+        op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+    op.drop_index('ux_favorite_names_user_name', table_name='favorite_names')
+    op.drop_index('ix_stored_blobs_ref_count', table_name='stored_blobs')
+    op.drop_table('stored_blobs')
+    op.drop_index('ix_appointments_user_id', table_name='appointments')
+    op.drop_index('ix_appointments_remind_at', table_name='appointments')
+    op.drop_index('ix_appointments_id', table_name='appointments')
+    op.drop_table('appointments')
@@ -0,0 +1,52 @@
+"""forum search trigram indexes (PostgreSQL)
+
+GET /api/forum/posts?q= filters with ILIKE '%q%', which no B-tree can serve.
+On PostgreSQL, GIN pg_trgm indexes on title and content turn it into an
+index search. SQLite has no equivalent (ILIKE compiles to lower() LIKE
+lower() there): nothing to do. Skipped with a note when the server does
+not ship pg_trgm. Not declared on the models: see include_object in env.py.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 15:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_INDEXES = [
+    ('ix_forum_posts_title_trgm', 'forum_posts', 'title'),
+    ('ix_forum_posts_content_trgm', 'forum_posts', 'content'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+    if not available:
+        print("pg_trgm is not available on this server: forum search stays a sequential scan")
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(name, table, [column], postgresql_using='gin',
+                        postgresql_ops={column: 'gin_trgm_ops'}, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,55 @@
+"""background jobs and dead letters
+
+background_jobs holds the queued/running jobs of core.jobs when
+KOZA_JOBS_PERSIST=1; dead_jobs keeps the jobs that failed on every attempt.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('background_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_background_jobs_claimed_at', 'background_jobs', ['claimed_at'], unique=False)
+
+    op.create_table('dead_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('failed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_dead_jobs_failed_at', 'dead_jobs', ['failed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_dead_jobs_failed_at', table_name='dead_jobs')
+    op.drop_table('dead_jobs')
+    op.drop_index('ix_background_jobs_claimed_at', table_name='background_jobs')
+    op.drop_table('background_jobs')
@@ -0,0 +1,88 @@
+"""updated_at columns and deletion tombstones for delta sync
+
+Every domain table gets updated_at (set by the models on insert and update).
+Existing rows are backfilled with created_at where the table has one,
+otherwise with the epoch, so "changed since" comparisons never see NULL.
+Per-user tables are indexed on (user_id, updated_at) for
+GET /api/sync/changes; deleted_rows records deletions for the same endpoint.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EPOCH = datetime(1970, 1, 1)
+# table -> has created_at
+TABLES = {
+    'users': False,
+    'user_profiles': False,
+    'pregnancy_data': False,
+    'forum_posts': True,
+    'forum_comments': True,
+    'daily_logs': False,
+    'user_blocks': True,
+    'water_logs': True,
+    'kick_logs': True,
+    'weight_logs': True,
+    'baby_names': False,
+    'favorite_names': False,
+    'photo_logs': True,
+    'nutrition_items': False,
+    'appointments': True,
+    'stored_blobs': True,
+}
+INDEXES = [
+    ('ix_forum_posts_updated', 'forum_posts', ['updated_at', 'id']),
+    ('ix_daily_logs_user_updated', 'daily_logs', ['user_id', 'updated_at']),
+    ('ix_water_logs_user_updated', 'water_logs', ['user_id', 'updated_at']),
+    ('ix_kick_logs_user_updated', 'kick_logs', ['user_id', 'updated_at']),
+    ('ix_weight_logs_user_updated', 'weight_logs', ['user_id', 'updated_at']),
+    ('ix_favorite_names_user_updated', 'favorite_names', ['user_id', 'updated_at']),
+    ('ix_photo_logs_user_updated', 'photo_logs', ['user_id', 'updated_at']),
+    ('ix_appointments_user_updated', 'appointments', ['user_id', 'updated_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, has_created_at in TABLES.items():
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        t = sa.table(table, sa.column('updated_at', sa.DateTime()), sa.column('created_at', sa.DateTime()))
+        value = sa.func.coalesce(t.c.created_at, EPOCH) if has_created_at else sa.literal(EPOCH, sa.DateTime())
+        op.execute(t.update().values(updated_at=value))
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+    op.create_table('deleted_rows',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_deleted_rows_user_deleted', 'deleted_rows', ['user_id', 'deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_deleted_rows_user_deleted', table_name='deleted_rows')
+    op.drop_table('deleted_rows')
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for table in reversed(list(TABLES)):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
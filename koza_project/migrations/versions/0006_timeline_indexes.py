@@ -0,0 +1,39 @@
+"""timeline indexes
+
+(user_id, created_at) on weight_logs and photo_logs, so that
+GET /api/timeline/{user_id} reads every source newest first through an
+index (water, kick, daily logs and forum posts already have one).
+IF NOT EXISTS: a database built by create_all from newer models may have them.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 20:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_weight_logs_user_created', 'weight_logs', ['user_id', 'created_at']),
+    ('ix_photo_logs_user_created', 'photo_logs', ['user_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,35 @@
+"""unsent reminder index
+
+Replaces ix_appointments_remind_at with (reminder_sent_at, remind_at). The
+reminder window query (reminder_sent_at IS NULL AND remind_at <= horizon,
+without a lower bound on the first load after a start) then reads only the
+unsent reminders instead of every reminder ever sent.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_appointments_unsent_remind_at', 'appointments', ['reminder_sent_at', 'remind_at'],
+                    unique=False, if_not_exists=True)
+    op.drop_index('ix_appointments_remind_at', table_name='appointments', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_appointments_remind_at', 'appointments', ['remind_at'], unique=False, if_not_exists=True)
+    op.drop_index('ix_appointments_unsent_remind_at', table_name='appointments', if_exists=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Text, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
 from ..database import Base
@@ -27,6 +27,7 @@ class User(Base):
     pregnancy_count = Column(Integer, default=1)
     city = Column(String, nullable=True)
     district = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Delta sync (core.sync)
     
     daily_logs = relationship("DailyLog", back_populates="user")
     profile = relationship("UserProfile", uselist=False, back_populates="user")
@@ -46,6 +47,7 @@ class UserProfile(Base):
     district = Column(String, nullable=True)
     baby_name = Column(String, nullable=True)
     pregnancy_count = Column(Integer, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user = relationship("User", back_populates="profile")
     # posts = relationship("ForumPost", back_populates="author") # Error: ForumPost links to User, not UserProfile
@@ -62,6 +64,7 @@ class PregnancyData(Base):
     mother_advice = Column(Text) # Anneye Tavsiyeler
     nutrition_advice = Column(Text) # Haftanın Önerilen Besini
     image_url = Column(String) # Visual reference
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class ForumPost(Base):
     __tablename__ = "forum_posts"
@@ -74,10 +77,17 @@ class ForumPost(Base):
     is_flagged = Column(Boolean, default=False)
     flag_reason = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     author = relationship("User", back_populates="posts")
     comments = relationship("ForumComment", back_populates="post")
 
+    __table_args__ = (
+        Index("ix_forum_posts_author_created", "author_id", "created_at"),
+        # New/edited posts since a sync cursor
+        Index("ix_forum_posts_updated", "updated_at", "id"),
+    )
+
 class ForumComment(Base):
     __tablename__ = "forum_comments"
 
@@ -90,22 +100,36 @@ class ForumComment(Base):
     is_flagged = Column(Boolean, default=False)
     flag_reason = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     post = relationship("ForumPost", back_populates="comments")
     author = relationship("User", back_populates="comments")
 
+    __table_args__ = (
+        # Comments of a post, in order
+        Index("ix_forum_comments_post_created", "post_id", "created_at"),
+        # Badge stats (count / sum of likes per author) without touching the table
+        Index("ix_forum_comments_author_likes", "author_id", "like_count"),
+    )
+
 class DailyLog(Base):
     __tablename__ = "daily_logs"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    date = Column(Date, default=datetime.utcnow().date)
+    date = Column(Date, default=lambda: datetime.utcnow().date()) # per insert, not the import-time date
     water_intake_ml = Column(Integer, default=0)
     mood = Column(String) # e.g., "Happy", "Tired"
     weight_kg = Column(Float)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user = relationship("User", back_populates="daily_logs")
 
+    __table_args__ = (
+        Index("ix_daily_logs_user_date", "user_id", "date"),
+        Index("ix_daily_logs_user_updated", "user_id", "updated_at"),
+    )
+
 class UserBlock(Base):
     __tablename__ = "user_blocks"
 
@@ -113,6 +137,11 @@ class UserBlock(Base):
     blocker_id = Column(Integer, ForeignKey("users.id"))
     blocked_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_user_blocks_blocker_blocked", "blocker_id", "blocked_id"),
+    )
 
 class WaterLog(Base):
     __tablename__ = "water_logs"
@@ -121,6 +150,14 @@ class WaterLog(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     amount_ml = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Today's total / last log of a user: a range on created_at within one user
+        Index("ix_water_logs_user_created", "user_id", "created_at"),
+        # Delta sync: a user's rows changed since a cursor
+        Index("ix_water_logs_user_updated", "user_id", "updated_at"),
+    )
 
 class KickLog(Base):
     __tablename__ = "kick_logs"
@@ -132,6 +169,12 @@ class KickLog(Base):
     total_kicks = Column(Integer)
     note = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_kick_logs_user_created", "user_id", "created_at"),
+        Index("ix_kick_logs_user_updated", "user_id", "updated_at"),
+    )
 
 class WeightLog(Base):
     __tablename__ = "weight_logs"
@@ -142,6 +185,14 @@ class WeightLog(Base):
     week_no = Column(Integer)
     date = Column(Date, default=date.today)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_weight_logs_user_date", "user_id", "date"),
+        Index("ix_weight_logs_user_updated", "user_id", "updated_at"),
+        # Personal timeline: a user's rows newest first
+        Index("ix_weight_logs_user_created", "user_id", "created_at"),
+    )
 
 class BabyName(Base):
     __tablename__ = "baby_names"
@@ -149,12 +200,20 @@ class BabyName(Base):
     name = Column(String, index=True)
     gender = Column(String) # 'K', 'E', 'U' (Kız, Erkek, Üniseks)
     meaning = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
 class FavoriteName(Base):
     __tablename__ = "favorite_names"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     baby_name_id = Column(Integer, ForeignKey("baby_names.id"))
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # One row per (user, name); also covers "favorites of user X" lookups index-only
+        Index("ux_favorite_names_user_name", "user_id", "baby_name_id", unique=True),
+        Index("ix_favorite_names_user_updated", "user_id", "updated_at"),
+    )
 
 class PhotoLog(Base):
     __tablename__ = "photo_logs"
@@ -163,6 +222,13 @@ class PhotoLog(Base):
     week = Column(Integer)
     photo_path = Column(String) # URL/Path to stored image
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_photo_logs_user_week", "user_id", "week"),
+        Index("ix_photo_logs_user_updated", "user_id", "updated_at"),
+        Index("ix_photo_logs_user_created", "user_id", "created_at"),
+    )
 
 class NutritionItem(Base):
     __tablename__ = "nutrition_items"
@@ -171,3 +237,76 @@ class NutritionItem(Base):
     category = Column(String) # e.g. "Deniz Ürünleri", "Bitki Çayları"
     status = Column(String) # "SAFE", "CAUTION", "BANNED"
     description = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Appointment(Base):
+    __tablename__ = "appointments"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    doctor_name = Column(String)
+    date = Column(Date)
+    notes = Column(Text, nullable=True)
+    remind_at = Column(DateTime) # When the reminder should fire (UTC)
+    reminder_sent_at = Column(DateTime, nullable=True) # Set once fired, never re-sent
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Reminder window: unsent reminders (reminder_sent_at IS NULL) by time, sent ones are skipped
+        Index("ix_appointments_unsent_remind_at", "reminder_sent_at", "remind_at"),
+        Index("ix_appointments_user_updated", "user_id", "updated_at"),
+    )
+
+class StoredBlob(Base):
+    """Content-addressed upload (file name = sha256), shared by all references."""
+    __tablename__ = "stored_blobs"
+    sha256 = Column(String(64), primary_key=True)
+    ext = Column(String)
+    size = Column(Integer)
+    ref_count = Column(Integer, default=0, index=True)
+    released_at = Column(DateTime, nullable=True) # Last time ref_count was decremented
+    derivatives_ready = Column(Boolean, default=False) # Thumbnails generated in storage
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class BackgroundJob(Base):
+    """Queued/running job of core.jobs, kept until it finishes (KOZA_JOBS_PERSIST=1)."""
+    __tablename__ = "background_jobs"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    payload = Column(Text, nullable=False) # JSON kwargs of the handler
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    claimed_at = Column(DateTime, default=datetime.utcnow) # Lease of the process running it
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_background_jobs_claimed_at", "claimed_at"),
+    )
+
+class DeadJob(Base):
+    """Dead-letter table: jobs that failed on every attempt."""
+    __tablename__ = "dead_jobs"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer)
+    error = Column(Text)
+    failed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class DeletedRow(Base):
+    """
+    Tombstone for delta sync: a row the client may have cached was deleted.
+    row_id NULL means every row of the table for that user (data reset).
+    Tracker tables record theirs in the user's tracker shard (core.shards).
+    """
+    __tablename__ = "deleted_rows"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_deleted_rows_user_deleted", "user_id", "deleted_at"),
+    )
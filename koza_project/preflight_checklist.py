@@ -1,5 +1,4 @@
 import requests
-import time
 import os
 import re
 
@@ -17,24 +16,13 @@ def print_warn(msg):
     print(f"[WARN]: {msg}")
 
 def check_api_health():
-    print("\n--- 1. API Health & Latency ---")
-    endpoints = [
-        "/",
-        "/api/pregnancy/status?user_id=1",
-        "/api/names/?user_id=1",
-        "/api/nutrition/?search=Sushi"
-    ]
-    
-    for ep in endpoints:
-        start = time.time()
+    print("\n--- 1. API Health ---")
+    # Latency is measured under load by: python -m koza_project.benchmarks.load_test
+    for ep in ["/", "/api/names/?user_id=1", "/api/nutrition/?search=Sushi"]:
         try:
             res = requests.get(f"{BASE_URL}{ep}")
-            duration = (time.time() - start) * 1000
             if res.status_code == 200:
-                if duration < 200:
-                    print_pass(f"{ep} ({duration:.2f}ms)")
-                else:
-                    print_warn(f"{ep} is slow ({duration:.2f}ms)")
+                print_pass(ep)
             else:
                 print_fail(f"{ep} returned {res.status_code}")
         except:
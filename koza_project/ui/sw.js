@@ -1,15 +1,17 @@
-const CACHE_NAME = 'koza-v12';
+// Both constants are generated by `python -m koza_project.core.assets`
+// (versioned from the asset manifest); these values are only used when serving the sources.
+const CACHE_NAME = 'koza-dev';
 const ASSETS_TO_CACHE = [
-    '/',
-    '/index.html',
-    '/diary.html',
-    '/css/style.css',
-    '/js/app.js',
-    '/manifest.json',
-    '/baby_names.html',
-    '/gallery.html',
-    '/nutrition.html',
-    '/hospital_bag.html'
+    '/ui/',
+    '/ui/index.html',
+    '/ui/diary.html',
+    '/ui/css/style.css',
+    '/ui/js/app.js',
+    '/ui/manifest.json',
+    '/ui/baby_names.html',
+    '/ui/gallery.html',
+    '/ui/nutrition.html',
+    '/ui/hospital_bag.html'
 ];
 
 // Install Event: Cache Core Assets
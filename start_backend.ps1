@@ -4,4 +4,6 @@ $venv = "$backendPath\.venv\Scripts\python.exe"
 $workingDir = "C:\Users\Enes\Desktop\happy mom"
 
 Set-Location $workingDir
+# Local development only: a random token secret per start (production sets KOZA_AUTH_SECRET)
+$env:KOZA_DEV_SECRETS = "1"
 & $venv -m uvicorn koza_project.api.main:app --host 0.0.0.0 --port 8001